@@ -0,0 +1,302 @@
+import json
+import math
+import os
+import time
+from collections import deque
+
+from controller.param_applier import apply_sysctl_params, rollback
+
+# 审计日志（每个决策一行 JSON）
+AUDIT_PATH = "controller/guard_audit.jsonl"
+
+# 守护信号及方向：+1 越大越好，-1 越小越好。
+# "throughput" 由 throughput_fn 按负载类型逐个采样点计算（默认为在线调优的奖励函数）
+GUARD_SIGNALS = {
+    "throughput": 1,
+    "psi_cpu_some": -1,
+    "psi_memory_some": -1,
+    "psi_io_some": -1,
+    "runqueue_wait_ms_per_sec": -1,
+    "pgmajfault_per_sec": -1
+}
+
+# 均值变化小于该相对幅度（或该信号的绝对下限 MIN_ABS_EFFECTS）时即使显著也不算退化，避免噪声很小时误判
+MIN_REL_EFFECT = 0.05
+
+# 各信号的最小绝对变化：PSI 为百分比（avg10），1 个百分点以内视为噪声；
+# 运行队列等待为全核合计 ms/s；throughput 量纲随奖励函数而定，只看相对幅度
+MIN_ABS_EFFECTS = {
+    "throughput": 0.0,
+    "psi_cpu_some": 1.0,
+    "psi_memory_some": 1.0,
+    "psi_io_some": 1.0,
+    "runqueue_wait_ms_per_sec": 5.0,
+    "pgmajfault_per_sec": 5.0
+}
+# 未在 MIN_ABS_EFFECTS 中列出的自定义信号使用的下限
+MIN_ABS_EFFECT = 1e-3
+
+
+def welch_t_test(a, b):
+    """
+    Welch t 检验（不假设方差相等），返回 (t, 自由度, 双侧 p 值)；样本不足时 p=1
+    """
+    n1, n2 = len(a), len(b)
+    if n1 < 2 or n2 < 2:
+        return 0.0, 0.0, 1.0
+    m1, m2 = sum(a) / n1, sum(b) / n2
+    v1 = sum((x - m1) ** 2 for x in a) / (n1 - 1)
+    v2 = sum((x - m2) ** 2 for x in b) / (n2 - 1)
+    se2 = v1 / n1 + v2 / n2
+    if se2 == 0:
+        return 0.0, float(n1 + n2 - 2), 1.0 if m1 == m2 else 0.0
+    t = (m2 - m1) / math.sqrt(se2)
+    df = se2 ** 2 / ((v1 / n1) ** 2 / (n1 - 1) + (v2 / n2) ** 2 / (n2 - 1))
+    try:
+        from scipy.stats import t as t_dist
+        p = float(2 * t_dist.sf(abs(t), df))
+    except ImportError:
+        # 没有 scipy 时用正态近似（小样本下略偏激进）
+        p = math.erfc(abs(t) / math.sqrt(2))
+    return t, df, p
+
+
+def holm_reject(p_values, alpha):
+    """
+    Holm 逐步校正：{name: p} → 在族错误率 alpha 下被拒绝（显著）的名字集合
+    """
+    rejected = set()
+    ordered = sorted(p_values.items(), key=lambda item: item[1])
+    for rank, (name, p) in enumerate(ordered):
+        if p >= alpha / (len(ordered) - rank):
+            break
+        rejected.add(name)
+    return rejected
+
+
+def _default_throughput(workload, metrics):
+    from optimizer.online_tuner import default_reward
+    return default_reward(workload, [metrics])
+
+
+class TuningGuard:
+    """
+    参数变更守护：
+    - 平时持续维护最近 baseline_samples 个采样点作为基线；负载类型变化时基线清空，
+      只与同一负载类型下的基线比较
+    - apply() 应用参数并记录快照，之后跳过 settle_samples 个点，再采集 canary_samples 个点作为金丝雀窗口；
+      金丝雀观察期内或新负载下的基线尚未采满时，参数排队（只保留最新一组），条件满足后由 observe() 应用
+    - 窗口满后对每个信号做 Welch t 检验，并用 Holm 校正控制多个信号的族错误率：
+      任一信号朝坏的方向显著变化（校正后显著且超过该信号的最小幅度）即按快照回滚到最近一次确认良好的状态，否则确认变更
+    - 每个决策写入 JSONL 审计日志
+    """
+
+    def __init__(self, baseline_samples=12, canary_samples=12, settle_samples=2, alpha=0.05,
+                 signals=None, throughput_fn=None, audit_path=AUDIT_PATH,
+                 apply_fn=apply_sysctl_params, rollback_fn=rollback):
+        self.baseline_samples = baseline_samples
+        self.canary_samples = canary_samples
+        self.settle_samples = settle_samples
+        self.alpha = alpha
+        self.signals = signals or GUARD_SIGNALS
+        self.throughput_fn = throughput_fn or _default_throughput
+        self.audit_path = audit_path
+        self.apply_fn = apply_fn
+        self.rollback_fn = rollback_fn
+
+        self.baseline = deque(maxlen=baseline_samples)
+        self.baseline_workload = None
+        self.canary = None       # 进行中的变更：{"params", "snapshot", "workload", "baseline", "samples", "skip"}
+        self.pending = None      # 排队中的变更：{"params", "workload", "source"}
+        self.last_decision = None
+
+    # -------- 审计 --------
+    def audit(self, event, **fields):
+        entry = {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "event": event, **fields}
+        if self.audit_path:
+            directory = os.path.dirname(self.audit_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.audit_path, "a") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        return entry
+
+    # -------- 信号 --------
+    def signal_values(self, workload, metrics):
+        values = {}
+        for signal in self.signals:
+            if signal == "throughput":
+                value = self.throughput_fn(workload, metrics)
+            else:
+                value = metrics.get(signal, 0)
+            try:
+                values[signal] = float(value)
+            except (TypeError, ValueError):
+                values[signal] = 0.0
+        return values
+
+    @property
+    def in_canary(self):
+        return self.canary is not None
+
+    def baseline_ready(self, workload):
+        """
+        基线是否已在该负载类型下采满
+        """
+        return self.baseline_workload == workload and len(self.baseline) >= self.baseline_samples
+
+    # -------- 变更 --------
+    def apply(self, params, workload, source="model", queue=True):
+        """
+        经守护应用一组参数。金丝雀观察期内、或该负载类型下的基线尚未采满时不立即应用：
+        queue=True 时排队等待 observe() 在条件满足后应用，否则直接放弃（由调用方稍后重试）。
+        返回 apply_sysctl_params 的报告（附带 guard 字段说明守护状态，deferred=True 表示未应用）
+        """
+        if self.in_canary or not self.baseline_ready(workload):
+            state = "canary_in_progress" if self.in_canary else "baseline_pending"
+            if self.in_canary:
+                print("⏳ 上一次参数变更仍在金丝雀观察期，暂不应用新的参数")
+            else:
+                print(f"⏳ {workload} 负载下的基线尚未采满（{len(self.baseline)}/{self.baseline_samples}），暂不应用新的参数")
+            if queue:
+                self.pending = {"params": params, "workload": workload, "source": source}
+            self.audit("deferred", workload=workload, source=source, params=params, reason=state, queued=queue)
+            return {"success": False, "applied": {}, "skipped": [], "unsupported": [], "failed": {},
+                    "rolled_back": [], "snapshot": {}, "latency_ms": 0.0, "guard": state, "deferred": True}
+
+        self.pending = None
+        report = self.apply_fn(params)
+        self.audit("apply", workload=workload, source=source, params=params,
+                   applied=report["applied"], snapshot=report["snapshot"], success=report["success"])
+        if report["success"] and report["applied"]:
+            baseline = list(self.baseline)
+            if len(baseline) < 2:
+                print("⚠️ 基线采样不足，本次变更无法做退化检测")
+            self.canary = {
+                "params": report["applied"],
+                "snapshot": report["snapshot"],
+                "workload": workload,
+                "baseline": baseline,
+                "samples": [],
+                "skip": self.settle_samples
+            }
+            report["guard"] = "canary"
+        return report
+
+    def observe(self, metrics, workload):
+        """
+        每个采样周期调用一次。金丝雀窗口结束时返回决策（commit / revert / inconclusive），否则返回 None
+        """
+        values = self.signal_values(workload, metrics)
+        if not self.in_canary:
+            self._add_baseline(values, workload)
+            self._apply_pending(workload)
+            return None
+
+        canary = self.canary
+        if workload != canary["workload"]:
+            # 负载类型变了，前后窗口不可比：保留变更，但不作为“确认良好”
+            decision = self._finish("inconclusive", reason=f"负载类型变化：{canary['workload']} ➜ {workload}")
+            self._add_baseline(values, workload)
+            return decision
+        if canary["skip"] > 0:
+            canary["skip"] -= 1
+            return None
+
+        canary["samples"].append(values)
+        if len(canary["samples"]) < self.canary_samples:
+            return None
+        return self.evaluate()
+
+    def _add_baseline(self, values, workload):
+        if workload != self.baseline_workload:
+            # 不同负载类型下的指标不可比：基线从新负载重新采集
+            self.baseline.clear()
+            self.baseline_workload = workload
+        self.baseline.append(values)
+
+    def _apply_pending(self, workload):
+        pending = self.pending
+        if pending is None:
+            return
+        if pending["workload"] != workload:
+            # 推荐针对的负载已经结束，不再应用
+            self.pending = None
+            self.audit("dropped", workload=pending["workload"], source=pending["source"], params=pending["params"],
+                       reason=f"负载类型变化：{pending['workload']} ➜ {workload}")
+        elif self.baseline_ready(workload):
+            print(f"▶️ 基线已就绪，应用排队中的参数（{pending['source']}）")
+            self.apply(pending["params"], workload, source=pending["source"])
+
+    def compare(self, baseline, samples):
+        """
+        逐信号比较基线与金丝雀窗口，返回 {signal: {baseline_mean, canary_mean, p_value, regression}}；
+        p_value 为未校正值，regression 按 Holm 校正后的显著性判断
+        """
+        results = {}
+        p_values = {}
+        for signal, direction in self.signals.items():
+            a = [s[signal] for s in baseline]
+            b = [s[signal] for s in samples]
+            _, _, p = welch_t_test(a, b)
+            mean_a = sum(a) / len(a) if a else 0.0
+            mean_b = sum(b) / len(b) if b else 0.0
+            worsening = (mean_b - mean_a) * direction < 0
+            effect = abs(mean_b - mean_a)
+            floor = MIN_ABS_EFFECTS.get(signal, MIN_ABS_EFFECT)
+            material = effect > max(MIN_REL_EFFECT * abs(mean_a), floor)
+            p_values[signal] = p
+            results[signal] = {
+                "baseline_mean": round(mean_a, 6),
+                "canary_mean": round(mean_b, 6),
+                "p_value": round(p, 6),
+                "regression": bool(worsening and material)
+            }
+        significant = holm_reject(p_values, self.alpha)
+        for signal, result in results.items():
+            result["regression"] = result["regression"] and signal in significant
+        return results
+
+    def evaluate(self):
+        canary = self.canary
+        stats = self.compare(canary["baseline"], canary["samples"])
+        regressions = [signal for signal, result in stats.items() if result["regression"]]
+        if not regressions:
+            return self._finish("commit", stats=stats)
+
+        failed = self.rollback_fn(canary["snapshot"])
+        print(f"↩️ 检测到性能退化（{', '.join(regressions)}），已回滚到变更前的参数")
+        return self._finish("revert", stats=stats, regressions=regressions, rollback_failed=failed)
+
+    def _finish(self, event, **fields):
+        canary = self.canary
+        self.canary = None
+        self.baseline_workload = canary["workload"]
+        if event == "commit":
+            # 变更被确认：金丝雀窗口成为新的基线
+            self.baseline.clear()
+            self.baseline.extend(canary["samples"][-self.baseline_samples:])
+            print(f"✅ 参数变更已确认，无性能退化（{canary['workload']}）")
+        elif event == "revert":
+            self.baseline.clear()
+            self.baseline.extend(canary["baseline"])
+        self.last_decision = self.audit(event, workload=canary["workload"], params=canary["params"],
+                                        snapshot=canary["snapshot"], **fields)
+        return self.last_decision
+
+
+def read_audit_log(path=AUDIT_PATH, limit=50):
+    """
+    读取最近 limit 条审计记录（最新在前）
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        lines = deque(f, maxlen=limit)
+    entries = []
+    for line in reversed(lines):
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue
+    return entries
@@ -1,18 +1,251 @@
-import subprocess
 import os
+import time
 
-def apply_sysctl_params(param_dict):
+from sysparams.sysctl import read_sysctl, sysctl_path, invalidate
+from sysparams.io import (BLOCK_PATH, TUNABLE_QUEUE_PARAMS, list_block_devices,
+                          read_queue_param, parse_scheduler)
+
+
+def format_value(value):
+    """
+    将参数值转换为写入 /proc/sys 的文本：整数型浮点（如 pandas 读出的 60.0）去掉小数，
+    多值参数（如 tcp_rmem）统一为单空格分隔
+    """
+    if not isinstance(value, str):
+        try:
+            if float(value).is_integer():
+                value = int(value)
+        except (TypeError, ValueError):
+            pass
+    return " ".join(str(value).split())
+
+
+def write_sysctl(key, value, root=None):
+    """
+    直接写 /proc/sys/...，不再 fork sysctl 命令；非法参数名（含 "/"、".." 等）由 sysctl_path 拒绝
+    """
+    with open(sysctl_path(key, root), "w") as f:
+        f.write(value)
+
+
+def take_snapshot(keys, root=None):
+    """
+    读取一组参数的当前值（用于回滚 / 审计）
+    """
+    return {key: format_value(read_sysctl(key, ttl=0, root=root)) for key in keys}
+
+
+def rollback(snapshot, root=None):
+    """
+    按快照恢复参数（逆序写回），返回恢复失败的参数
+    """
+    failed = {}
+    for key, value in reversed(list(snapshot.items())):
+        try:
+            write_sysctl(key, value, root)
+        except OSError as e:
+            failed[key] = str(e)
+    invalidate(list(snapshot.keys()), root)
+    return failed
+
+
+def apply_sysctl_params(param_dict, root=None):
+    """
+    以事务方式应用一组 sysctl 参数：
+    1. 校验参数名并与当前值做 diff：未变化的参数跳过；本机内核没有的参数
+       （如 5.13 起移到 debugfs 的 kernel.sched_*）记为 unsupported 并跳过，不影响其余参数
+    2. 记录将被修改参数的原值快照
+    3. 逐个写入 /proc/sys，任一失败则按快照回滚已写入的参数（只有写入阶段是全有或全无）
+    返回执行报告：applied / skipped / unsupported / failed / rolled_back / snapshot / latency_ms
+    """
+    start = time.perf_counter()
+    report = {
+        "success": True,
+        "applied": {},
+        "skipped": [],
+        "unsupported": [],
+        "failed": {},
+        "rolled_back": [],
+        "snapshot": {},
+        "latency_ms": 0.0
+    }
+
+    # Step 1: diff（非法参数名整体放弃；本机不存在的参数跳过）
+    changes = {}
     for key, value in param_dict.items():
-        # 特殊处理 TCP 内存等空格参数加引号
-        if isinstance(value, str) and " " in value:
-            value_str = f'"{value}"'
+        target = format_value(value)
+        try:
+            sysctl_path(key, root)
+        except ValueError as e:
+            report["failed"][key] = str(e)
+            continue
+        current = read_sysctl(key, ttl=0, root=root, default=None)
+        if current is None:
+            report["unsupported"].append(key)
+            continue
+        current = format_value(current)
+        if current == target:
+            report["skipped"].append(key)
+        else:
+            changes[key] = target
+            report["snapshot"][key] = current
+
+    if report["unsupported"]:
+        print(f"⏭️ 本机内核不支持 {len(report['unsupported'])} 个参数，已跳过：{report['unsupported']}")
+
+    if report["failed"]:
+        report["success"] = False
+        for key, reason in report["failed"].items():
+            print(f"❌ 应用失败：{key}，{reason}")
+        print("⚠️ 参数组合校验未通过，未做任何修改")
+        report["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return report
+
+    # Step 2: 逐个写入，失败则回滚
+    for key, target in changes.items():
+        try:
+            write_sysctl(key, target, root)
+            report["applied"][key] = target
+        except OSError as e:
+            report["success"] = False
+            report["failed"][key] = str(e)
+            print(f"❌ 应用失败：{key}={target}，错误：{e}")
+            applied_snapshot = {k: report["snapshot"][k] for k in report["applied"]}
+            rollback_failed = rollback(applied_snapshot, root)
+            report["rolled_back"] = [k for k in applied_snapshot if k not in rollback_failed]
+            for k, reason in rollback_failed.items():
+                print(f"❌ 回滚失败：{k}，错误：{reason}")
+            print(f"↩️ 已回滚 {len(report['rolled_back'])} 个参数")
+            report["applied"] = {}
+            break
+
+    # 参数已变化，让读取缓存立即失效
+    invalidate(list(changes.keys()), root)
+
+    if report["success"]:
+        for key, target in report["applied"].items():
+            print(f"✅ 已应用参数：{key}={target}")
+        if report["skipped"]:
+            print(f"⏭️ {len(report['skipped'])} 个参数已是目标值，跳过")
+
+    report["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return report
+
+
+# -------- 块设备队列参数 --------
+# 写入顺序：切换调度器会重置 nr_requests，必须先写调度器
+BLOCK_PARAM_ORDER = ["scheduler", "nr_requests", "read_ahead_kb", "max_sectors_kb"]
+
+
+def _block_order(param):
+    return BLOCK_PARAM_ORDER.index(param) if param in BLOCK_PARAM_ORDER else len(BLOCK_PARAM_ORDER)
+
+
+def block_param_path(device, param, block_path=None):
+    """
+    /sys/block/<dev>/queue/<param>：设备必须是 list_block_devices() 列出的块设备，
+    参数必须在 TUNABLE_QUEUE_PARAMS 中，含 "/"、".." 的名字一律拒绝（ValueError）
+    """
+    device, param = str(device), str(param)
+    for name in (device, param):
+        if not name or "/" in name or "\\" in name or ".." in name:
+            raise ValueError(f"非法的块设备参数路径：{device}/{param}")
+    if param not in TUNABLE_QUEUE_PARAMS:
+        raise ValueError(f"不可调的块设备参数：{param}")
+    if device not in list_block_devices(block_path):
+        raise ValueError(f"未知的块设备：{device}")
+    return os.path.join(block_path or BLOCK_PATH, device, "queue", param)
+
+
+def _block_items(block_params):
+    items = []
+    for device, params in block_params.items():
+        for param in sorted(params, key=_block_order):
+            items.append((device, param, format_value(params[param])))
+    return items
+
+
+def apply_block_params(block_params, block_path=None):
+    """
+    以事务方式应用块设备队列参数 {dev: {param: value}}：
+    与当前值 diff → 记录快照 → 按顺序写入 /sys/block/<dev>/queue/<param>，任一失败则按快照回滚。
+    返回与 apply_sysctl_params 相同结构的报告（键为 "dev/param"）
+    """
+    start = time.perf_counter()
+    report = {
+        "success": True,
+        "applied": {},
+        "skipped": [],
+        "unsupported": [],
+        "failed": {},
+        "rolled_back": [],
+        "snapshot": {},
+        "latency_ms": 0.0
+    }
+
+    changes = []
+    for device, param, target in _block_items(block_params):
+        key = f"{device}/{param}"
+        try:
+            block_param_path(device, param, block_path)
+        except ValueError as e:
+            report["failed"][key] = str(e)
+            continue
+        current = read_queue_param(device, param, block_path)
+        if current == "N/A":
+            report["failed"][key] = "参数不存在或不可读"
+            continue
+        if param == "scheduler":
+            current = parse_scheduler(current)[0]
+        if current == target:
+            report["skipped"].append(key)
         else:
-            value_str = str(value)
-        
-        # 正常的 sysctl 参数处理
+            changes.append((device, param, target))
+            report["snapshot"][key] = current
+
+    if report["failed"]:
+        report["success"] = False
+        for key, reason in report["failed"].items():
+            print(f"❌ 应用失败：{key}，{reason}")
+        print("⚠️ 块设备参数校验未通过，未做任何修改")
+        report["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return report
+
+    written = []
+    for device, param, target in changes:
+        key = f"{device}/{param}"
+        if param == "nr_requests" and (device, "scheduler") in written:
+            # 切换调度器后内核已重置队列深度，按切换后的值重新比较
+            if read_queue_param(device, param, block_path) == target:
+                report["skipped"].append(key)
+                continue
         try:
-            cmd = f"sysctl -w {key}={value_str}"
-            subprocess.run(cmd, shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            print(f"✅ 已应用参数：{key}={value}")
-        except subprocess.CalledProcessError as e:
-            print(f"❌ 应用失败：{key}={value}，错误：{e}")
+            with open(block_param_path(device, param, block_path), "w") as f:
+                f.write(target)
+            report["applied"][key] = target
+            written.append((device, param))
+        except OSError as e:
+            report["success"] = False
+            report["failed"][key] = str(e)
+            print(f"❌ 应用失败：{key}={target}，错误：{e}")
+            # 回滚时同样先恢复调度器，再恢复其余参数
+            for dev, prm in sorted(written, key=lambda item: _block_order(item[1])):
+                old_key = f"{dev}/{prm}"
+                try:
+                    with open(block_param_path(dev, prm, block_path), "w") as f:
+                        f.write(report["snapshot"][old_key])
+                    report["rolled_back"].append(old_key)
+                except OSError as rollback_error:
+                    print(f"❌ 回滚失败：{old_key}，错误：{rollback_error}")
+            print(f"↩️ 已回滚 {len(report['rolled_back'])} 个块设备参数")
+            report["applied"] = {}
+            break
+
+    if report["success"]:
+        for key, target in report["applied"].items():
+            print(f"✅ 已应用块设备参数：{key}={target}")
+        if report["skipped"]:
+            print(f"⏭️ {len(report['skipped'])} 个块设备参数已是目标值，跳过")
+
+    report["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return report
@@ -1,103 +1,45 @@
 import os
+import math
 import time
-import subprocess
 import pandas as pd
-from itertools import islice
 
 from monitor.collector import collect_all_metrics
 from sysparams.collector import collect_all_sysparams
 from controller.param_applier import apply_sysctl_params
+from optimizer.param_search import sample_configs
+from optimizer.train_param_model import SCORE_VERSION, SCORE_VERSION_COL
 import workloads.cpu_bound as cpu_workload
 import workloads.io_bound as io_workload
 import workloads.memory_bound as mem_workload
 import workloads.mixed as mixed_workload
+import workloads.network_bound as net_workload
+from workloads.pool import BENCHMARK_KEYS
 
-from itertools import product
-
-# ✅ 参数组合空间（系统可调参数）
-def generate_param_grid():
-    # kernel params
-    sched_latency_ns = [16000000, 24000000, 32000000]
-    sched_migration_cost_ns = [250000, 500000, 750000]
-    sched_wakeup_granularity_ns = [2000000, 4000000, 6000000]
-    sched_min_granularity_ns = [1500000, 3000000, 4500000]
-    sched_child_runs_first = [0, 1]
-    sched_autogroup_enabled = [0, 1]
-    sched_rr_timeslice_ms = [50, 100, 150]
-    # vm params
-    swappiness = [30, 60, 90]
-    dirty_ratio = [5, 10, 15]
-    dirty_background_ratio = [3, 5, 7]
-    dirty_expire_centisecs = [1500, 3000, 4500]
-    dirty_writeback_centisecs = [250, 500, 750]
-    min_free_kbytes = [int(90112 * 0.5), 90112, int(90112 * 1.5)]
-    overcommit_memory = [0, 1, 2]
-    overcommit_ratio = [25, 50, 75]
-    vfs_cache_pressure = [100, 200, 300]
-
-    # net params
-    somaxconn = [2048, 4096, 8192]
-    tcp_fin_timeout = [30, 60, 90]
-    tcp_tw_reuse = [0, 1, 2]
-    tcp_syncookies = [0, 1]
-    tcp_max_syn_backlog = [2048, 4096, 8192]
-    tcp_rmems = [
-        "4096 65536 2097152",
-        "4096 131072 6291456",
-        "8192 262144 8388608"
-    ]
-    tcp_wmems = [
-        "4096 8192 2097152",
-        "4096 16384 4194304",
-        "8192 32768 8388608"
-    ]
-     
-    for combo in product(
-        sched_latency_ns, sched_migration_cost_ns, sched_wakeup_granularity_ns,
-        sched_min_granularity_ns, sched_child_runs_first, sched_autogroup_enabled,
-        sched_rr_timeslice_ms,
-        swappiness, dirty_ratio, dirty_background_ratio,
-        dirty_expire_centisecs, dirty_writeback_centisecs, min_free_kbytes,
-        overcommit_memory, overcommit_ratio, vfs_cache_pressure,
-        somaxconn, tcp_fin_timeout, tcp_tw_reuse, tcp_syncookies, tcp_max_syn_backlog,
-        tcp_rmems, tcp_wmems
-    ):
-        yield {
-            "kernel.sched_latency_ns": combo[0],
-            "kernel.sched_migration_cost_ns": combo[1],
-            "kernel.sched_wakeup_granularity_ns": combo[2],
-            "kernel.sched_min_granularity_ns": combo[3],
-            "kernel.sched_child_runs_first": combo[4],
-            "kernel.sched_autogroup_enabled": combo[5],
-            "kernel.sched_rr_timeslice_ms": combo[6],
-
-            "vm.swappiness": combo[7],
-            "vm.dirty_ratio": combo[8],
-            "vm.dirty_background_ratio": combo[9],
-            "vm.dirty_expire_centisecs": combo[10],
-            "vm.dirty_writeback_centisecs": combo[11],
-            "vm.min_free_kbytes": combo[12],
-            "vm.overcommit_memory": combo[13],
-            "vm.overcommit_ratio": combo[14],
-            "vm.vfs_cache_pressure": combo[15],
-
-            "net.core.somaxconn": combo[16],
-            "net.ipv4.tcp_fin_timeout": combo[17],
-            "net.ipv4.tcp_tw_reuse": combo[18],
-            "net.ipv4.tcp_syncookies": combo[19],
-            "net.ipv4.tcp_max_syn_backlog": combo[20],
-            "net.ipv4.tcp_rmem": combo[21],
-            "net.ipv4.tcp_wmem": combo[22],
-
-        }
-
+# 各负载的基准入口：返回 ops / bytes / 吞吐 / p50/p95/p99 延迟
 WORKLOADS = {
-    "cpu_bound": cpu_workload.run,
-    "io_bound": io_workload.run,
-    "memory_bound": mem_workload.run,
-    "mixed": mixed_workload.run
+    "cpu_bound": cpu_workload.benchmark,
+    "io_bound": io_workload.benchmark,
+    "memory_bound": mem_workload.benchmark,
+    "mixed": mixed_workload.benchmark,
+    "network_bound": net_workload.benchmark
 }
 
+# perf_score 中尾延迟的权重
+LATENCY_WEIGHT = 0.5
+
+
+def compute_perf_score(result):
+    """
+    性能分数 = log(1 + 吞吐 ops/s) - LATENCY_WEIGHT × log(1 + p99 延迟 ms)。
+    取对数使不同负载（每秒几十次到上万次操作）的分数落在相近的量级。
+    修改公式时需同步提升 train_param_model.SCORE_VERSION，训练端据此不混用新旧分数
+    """
+    if not result:
+        return 0.0
+    throughput = math.log1p(max(result.get("ops_per_sec", 0), 0))
+    tail = math.log1p(max(result.get("p99_ms", 0), 0))
+    return round(throughput - LATENCY_WEIGHT * tail, 4)
+
 def sample_metrics(duration, interval, workload_label):
     samples = []
     start_time = time.time()
@@ -107,7 +49,8 @@ def sample_metrics(duration, interval, workload_label):
 
     while time.time() < end_time:
         runtime_metrics = collect_all_metrics()
-        sysparams = collect_all_sysparams()
+        # 每台机器的块设备不同，blk_{dev}_* 不写入共享的训练数据
+        sysparams = collect_all_sysparams(include_block=False)
         combined = {**runtime_metrics, **sysparams}
         combined["workload_type"] = workload_label
 
@@ -117,59 +60,85 @@ def sample_metrics(duration, interval, workload_label):
         samples.append(combined)
         time.sleep(interval)
 
-    # 计算性能指标
+    # 采样窗口信息（性能分数由负载的基准结果计算，见 run_config）
     exec_time = time.time() - start_time
     cpu_avg = sum(cpu_usages) / len(cpu_usages) if cpu_usages else 0
 
-    #print(cpu_avg)
-
     for row in samples:
         row["exec_time"] = round(exec_time, 2)
         row["cpu_avg"] = round(cpu_avg, 2)
-        try:
-            row["perf_score"] = round(
-                0.6 * (1 / exec_time) +
-                0.4 * (cpu_avg / 100.0), 2
-            )
-        except ZeroDivisionError:
-            row["perf_score"] = 0.0
 
     return samples
 
 
-def generate_sysparam_training_data():
+def run_config(workload_type, param_config, duration=10, interval=2):
+    """
+    应用一组参数并运行一次负载基准，返回采样结果（顺序生成与 data/sweep.py 的 worker 共用）。
+    每条样本附带本次基准的吞吐与延迟，perf_score 由它们计算
+    """
+    from threading import Thread
+    report = apply_sysctl_params(param_config)
+    if not report["success"]:
+        # 参数没有生效时测到的是旧参数下的性能，不能记为这组参数的样本
+        raise RuntimeError(f"参数应用失败：{report['failed']}")
+    print("▶ 运行负载任务...")
+    result = {}
+    t = Thread(target=lambda: result.update(WORKLOADS[workload_type](duration)))
+    t.start()
+    samples = sample_metrics(duration=duration, interval=interval, workload_label=workload_type)
+    t.join()
+
+    bench = {key: result.get(key, 0) for key in BENCHMARK_KEYS}
+    perf_score = compute_perf_score(result)
+    for row in samples:
+        row.update(bench)
+        row["perf_score"] = perf_score
+        row[SCORE_VERSION_COL] = SCORE_VERSION
+    return samples
+
+
+def append_training_rows(df, output_path):
+    """
+    追加样本并保持列集合一致：列与已有表头相同（缺失列留空）时直接追加；
+    出现新列（如新增的竞争类指标）时按列并集重写整个文件，避免 header=False 追加造成错列
+    """
+    if not os.path.exists(output_path):
+        df.to_csv(output_path, index=False)
+        return
+    header = list(pd.read_csv(output_path, nrows=0).columns)
+    new_columns = [c for c in df.columns if c not in header]
+    if not new_columns:
+        df.reindex(columns=header).to_csv(output_path, mode="a", index=False, header=False)
+        return
+    print(f"ℹ️ 训练数据新增列 {new_columns}，按新列集合重写 {output_path}")
+    merged = pd.concat([pd.read_csv(output_path), df], ignore_index=True, sort=False)
+    tmp_path = f"{output_path}.tmp"
+    merged.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
+
+
+def generate_sysparam_training_data(strategy="lhs", budget=100):
     output_path = "data/sysparam_training_data.csv"
     os.makedirs("data", exist_ok=True)
-    param_list = list(islice(generate_param_grid(), 100))  # 限制最多 100 组
+    param_list = sample_configs(strategy, budget)  # 固定预算，覆盖全部参数维度
     all_data = []
 
-    for workload_type, workload_func in WORKLOADS.items():
+    for workload_type in WORKLOADS:
         print(f"\n💼 工作负载：{workload_type}")
         for i, param_config in enumerate(param_list):
             print(f"⚙️ 应用参数组合 {i+1}/{len(param_list)}")
-            apply_sysctl_params(param_config)
 
             try:
-                print("▶ 运行负载任务...")
-                from threading import Thread
-                t = Thread(target=workload_func, args=(10,))
-                t.start()
-                samples = sample_metrics(duration=10, interval=2, workload_label=workload_type)
-                t.join()
-                all_data.extend(samples)
+                all_data.extend(run_config(workload_type, param_config))
             except Exception as e:
                 print(f"❌ 运行失败：{e}")
                 continue
 
             # 保存阶段性数据
-            df = pd.DataFrame(all_data)
-            if os.path.exists(output_path):
-                df.to_csv(output_path, mode="a", index=False, header=False)
-            else:
-                df.to_csv(output_path, index=False)
+            append_training_rows(pd.DataFrame(all_data), output_path)
             all_data.clear()
 
-    print(f"\n✅ 数据采集完成，结果保存至 {output_path}")
+    print(f"\n✅ 数据采集完成，结果保存至 {output_path}（并行/可断点续跑请使用 python -m data.sweep）")
 
 if __name__ == "__main__":
     generate_sysparam_training_data()
\ No newline at end of file
@@ -8,6 +8,7 @@ import workloads.cpu_bound as cpu_workload
 import workloads.io_bound as io_workload
 import workloads.memory_bound as mem_workload
 import workloads.mixed as mixed_workload
+import workloads.network_bound as net_workload
 
 from itertools import product
 
@@ -36,7 +37,8 @@ WORKLOADS = {
     "cpu_bound": cpu_workload.run,
     "io_bound": io_workload.run,
     "memory_bound": mem_workload.run,
-    "mixed": mixed_workload.run
+    "mixed": mixed_workload.run,
+    "network_bound": net_workload.run
 }
 
 def sample_metrics(duration, interval, label, param_config):
@@ -1,7 +1,9 @@
 import subprocess
 import time
 import pandas as pd
+from threading import Thread
 from monitor.collector import collect_all_metrics
+import workloads.network_bound as net_workload
 
 def run_stress_cpu(duration=10):
     return subprocess.Popen(['stress', '--cpu', '4', '--timeout', str(duration)])
@@ -50,6 +52,12 @@ def generate_all():
     mem_proc.wait()
     io_proc.terminate()
 
+    # Network Bound：回环地址上的大块传输 / 短连接 / RPC
+    net_thread = Thread(target=net_workload.run, args=(30,))
+    net_thread.start()
+    all_data += sample_metrics("network_bound", duration=30)
+    net_thread.join()
+
     # 清理文件
     subprocess.run(["rm", "-f", "tempfile"])
 
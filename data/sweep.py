@@ -0,0 +1,337 @@
+"""
+可断点续跑的并行参数扫描：
+
+    python -m data.sweep init --strategy lhs --budget 100      # 生成 (负载, 参数组合) 任务队列
+    python -m data.sweep run --worker "ssh node1" --worker "ssh node2" --remote-dir /opt/tuner
+    python -m data.sweep status
+    python -m data.sweep export                                 # 合并结果为 CSV（默认 data/sweep_export.csv）
+
+任务队列保存在 SQLite 中，已完成的 (workload, config) 不会重复执行；协调进程被中断后
+再次 run 会把未完成的 running 任务放回队列。每个 worker 槽位以子进程执行任务
+（python -m data.sweep run-job，任务从 stdin 传入、结果从 stdout 返回），
+--worker 给出的命令前缀决定任务在哪里运行：ssh 到其他主机、systemd-run 放进独立 cgroup、
+unshare -n 放进独立网络命名空间等。ssh 前缀的任务在远端用 --python（默认 python3）于
+--remote-dir 目录下执行，其它前缀在本机以 --remote-dir（默认当前目录）为工作目录执行。
+注意 kernel.* / vm.* 参数是整机全局的，只有 net.* 在网络命名空间内隔离：
+同一主机上并行的多个 worker 会相互覆盖这些参数，可信的并行扫描需要每个 worker 一台主机/虚拟机。
+结果按 workload 分目录写入列式分片（有 pyarrow 时为 Parquet，否则 CSV），每个任务一个分片。
+"""
+import argparse
+import glob
+import json
+import os
+import shlex
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+import pandas as pd
+
+DB_PATH = "data/sweep.db"
+PARTS_DIR = "data/sweep_parts"
+# 导出到单独的文件，不覆盖仓库中的训练数据（确认后再手动合并）
+EXPORT_PATH = "data/sweep_export.csv"
+
+# ssh 前缀下远端使用的解释器
+REMOTE_PYTHON = "python3"
+
+# 子进程输出中携带结果的行前缀（负载本身也可能向 stdout 打印）
+RESULT_MARKER = "SWEEP_RESULT "
+
+MAX_ATTEMPTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    workload TEXT NOT NULL,
+    config_key TEXT NOT NULL,
+    config TEXT NOT NULL,
+    duration REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    started_at REAL,
+    finished_at REAL,
+    output TEXT,
+    error TEXT,
+    UNIQUE (workload, config_key)
+)
+"""
+
+
+def connect(db_path=DB_PATH):
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(_SCHEMA)
+    return conn
+
+
+def config_key(config):
+    return json.dumps(config, sort_keys=True)
+
+
+# -------- 任务队列 --------
+def init_sweep(conn, workloads, configs, duration=10):
+    """
+    写入 workloads × configs 的任务；已存在的 (workload, config) 保持原状态，返回新增任务数
+    """
+    before = conn.total_changes
+    conn.execute("BEGIN")
+    for workload in workloads:
+        for config in configs:
+            conn.execute(
+                "INSERT OR IGNORE INTO jobs (workload, config_key, config, duration) VALUES (?, ?, ?, ?)",
+                (workload, config_key(config), json.dumps(config), duration)
+            )
+    conn.execute("COMMIT")
+    return conn.total_changes - before
+
+
+def requeue_stale(conn):
+    """
+    协调进程异常退出后残留的 running 任务放回队列
+    """
+    return conn.execute("UPDATE jobs SET status = 'pending', worker = NULL WHERE status = 'running'").rowcount
+
+
+def claim_job(conn, worker, max_attempts=MAX_ATTEMPTS):
+    """
+    原子地领取一个待执行任务（pending，或失败次数未超限的 failed）
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    row = conn.execute(
+        "SELECT id, workload, config, duration FROM jobs "
+        "WHERE status = 'pending' OR (status = 'failed' AND attempts < ?) "
+        "ORDER BY attempts, id LIMIT 1",
+        (max_attempts,)
+    ).fetchone()
+    if row is None:
+        conn.execute("COMMIT")
+        return None
+    conn.execute(
+        "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, started_at = ? WHERE id = ?",
+        (worker, time.time(), row[0])
+    )
+    conn.execute("COMMIT")
+    return {"id": row[0], "workload": row[1], "config": json.loads(row[2]), "duration": row[3]}
+
+
+def finish_job(conn, job_id, output=None, error=None):
+    status = "done" if error is None else "failed"
+    conn.execute(
+        "UPDATE jobs SET status = ?, finished_at = ?, output = ?, error = ? WHERE id = ?",
+        (status, time.time(), output, error, job_id)
+    )
+
+
+def sweep_status(conn):
+    rows = conn.execute("SELECT workload, status, COUNT(*) FROM jobs GROUP BY workload, status").fetchall()
+    status = {}
+    for workload, state, count in rows:
+        status.setdefault(workload, {})[state] = count
+    return status
+
+
+# -------- 结果分片 --------
+def _has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def write_part(samples, workload, job_id, parts_dir=PARTS_DIR):
+    """
+    一个任务的结果写成一个分片：parts_dir/workload=<名称>/part-<id>.<parquet|csv>，
+    先写临时文件再 os.replace，读者不会看到写了一半的分片
+    """
+    directory = os.path.join(parts_dir, f"workload={workload}")
+    os.makedirs(directory, exist_ok=True)
+    df = pd.DataFrame(samples)
+    ext = "parquet" if _has_pyarrow() else "csv"
+    path = os.path.join(directory, f"part-{job_id:06d}.{ext}")
+    tmp_path = f"{path}.tmp"
+    if ext == "parquet":
+        df.to_parquet(tmp_path, index=False, compression="zstd")
+    else:
+        df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_sweep_results(parts_dir=PARTS_DIR):
+    """
+    读取全部分片并合并为一个 DataFrame
+    """
+    frames = []
+    for path in sorted(glob.glob(os.path.join(parts_dir, "workload=*", "part-*"))):
+        if path.endswith(".parquet"):
+            frames.append(pd.read_parquet(path))
+        elif path.endswith(".csv"):
+            frames.append(pd.read_csv(path))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True, sort=False)
+
+
+# -------- 执行 --------
+def run_job_from_stdin():
+    """
+    worker 端入口：从 stdin 读取任务，运行负载，把采样结果以一行 JSON 写到 stdout
+    """
+    from data.generate_param_sysdata import run_config
+
+    job = json.loads(sys.stdin.read())
+    samples = run_config(job["workload"], job["config"], duration=job["duration"])
+    sys.stdout.write(RESULT_MARKER + json.dumps(samples, default=str) + "\n")
+    sys.stdout.flush()
+
+
+def is_remote(prefix):
+    return bool(prefix) and os.path.basename(prefix[0]) == "ssh"
+
+
+def worker_host(prefix):
+    """
+    worker 实际运行所在的主机：ssh 前缀为目标主机，其它前缀（systemd-run / unshare 等）都在本机
+    """
+    return prefix[-1] if is_remote(prefix) else "localhost"
+
+
+def execute_job(job, prefix=(), python=None, timeout=None, remote_dir=None):
+    """
+    以子进程（可带 ssh / systemd-run / unshare 等前缀）执行任务，返回采样结果列表。
+    ssh 前缀时 python 默认为远端的 python3，并先 cd 到远端仓库目录 remote_dir
+    """
+    prefix = list(prefix)
+    cwd = None
+    if is_remote(prefix):
+        python = python or REMOTE_PYTHON
+        remote = f"exec {shlex.quote(python)} -m data.sweep run-job"
+        if remote_dir:
+            remote = f"cd {shlex.quote(remote_dir)} && {remote}"
+        # ssh 把其余参数拼成一条命令交给远端 shell 解析
+        command = prefix + [remote]
+    else:
+        command = prefix + [python or sys.executable, "-m", "data.sweep", "run-job"]
+        cwd = remote_dir
+    timeout = timeout or job["duration"] * 3 + 60
+    proc = subprocess.run(command, input=json.dumps(job), capture_output=True, text=True,
+                          timeout=timeout, cwd=cwd)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    stderr = proc.stderr.strip().splitlines()
+    reason = stderr[-1] if stderr else f"退出码 {proc.returncode}"
+    raise RuntimeError(f"任务无结果输出：{reason}")
+
+
+def _worker_loop(db_path, name, prefix, python, parts_dir, max_attempts, remote_dir):
+    conn = connect(db_path)
+    while True:
+        job = claim_job(conn, name, max_attempts)
+        if job is None:
+            break
+        print(f"⚙️ [{name}] 任务 {job['id']}：{job['workload']}")
+        try:
+            samples = execute_job(job, prefix, python, remote_dir=remote_dir)
+            path = write_part(samples, job["workload"], job["id"], parts_dir)
+            finish_job(conn, job["id"], output=path)
+            print(f"✅ [{name}] 任务 {job['id']} 完成（{len(samples)} 条样本）")
+        except Exception as e:
+            finish_job(conn, job["id"], error=str(e))
+            print(f"❌ [{name}] 任务 {job['id']} 失败：{e}")
+    conn.close()
+
+
+def run_sweep(db_path=DB_PATH, workers=None, python=None, parts_dir=PARTS_DIR,
+              max_attempts=MAX_ATTEMPTS, remote_dir=None):
+    """
+    协调进程：每个 worker 命令前缀对应一个执行槽位（线程只负责派发，负载在子进程中运行）。
+    workers 为空时在本机串行执行；python 为空时本机用当前解释器、ssh 远端用 python3
+    """
+    workers = workers or [""]
+    conn = connect(db_path)
+    stale = requeue_stale(conn)
+    if stale:
+        print(f"↩️ {stale} 个未完成任务已放回队列")
+    conn.close()
+    hosts = [worker_host(shlex.split(w)) for w in workers]
+    shared = sorted({host for host in hosts if hosts.count(host) > 1})
+    if shared:
+        print(f"⚠️ 同一主机上的多个 worker 共享 kernel/vm 参数，结果可能相互干扰：{', '.join(shared)}")
+
+    threads = []
+    for i, worker in enumerate(workers):
+        name = worker.split()[-1] if worker else f"local-{i}"
+        t = threading.Thread(
+            target=_worker_loop,
+            args=(db_path, f"{name}#{i}", shlex.split(worker), python, parts_dir, max_attempts, remote_dir),
+            daemon=True
+        )
+        t.start()
+        threads.append(t)
+    for t in threads:
+        t.join()
+
+    conn = connect(db_path)
+    print(f"\n📊 扫描状态：{sweep_status(conn)}")
+    conn.close()
+
+
+def export_results(parts_dir=PARTS_DIR, output_path=EXPORT_PATH):
+    df = load_sweep_results(parts_dir)
+    if df.empty:
+        print("⚠️ 没有可导出的结果")
+        return df
+    df.to_csv(output_path, index=False)
+    print(f"✅ 已导出 {len(df)} 条样本到 {output_path}")
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="并行、可断点续跑的参数扫描")
+    parser.add_argument("--db", default=DB_PATH, help="任务队列数据库")
+    parser.add_argument("--parts-dir", default=PARTS_DIR, help="结果分片目录")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_init = sub.add_parser("init", help="生成任务队列")
+    p_init.add_argument("--strategy", default="lhs", help="参数采样策略（random / lhs / sobol）")
+    p_init.add_argument("--budget", type=int, default=100, help="参数组合数量")
+    p_init.add_argument("--duration", type=float, default=10, help="每个任务的负载时长（秒）")
+    p_init.add_argument("--seed", type=int, default=42)
+
+    p_run = sub.add_parser("run", help="执行队列中的任务")
+    p_run.add_argument("--worker", action="append", default=[],
+                       help='worker 命令前缀，可重复，如 "ssh node1"、"systemd-run --scope -p CPUQuota=200%%"')
+    p_run.add_argument("--python", default=None, help="worker 端的 Python 解释器（默认本机为当前解释器，ssh 远端为 python3）")
+    p_run.add_argument("--remote-dir", default=None, help="worker 端的仓库目录（ssh 远端先 cd 到该目录）")
+    p_run.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+
+    sub.add_parser("status", help="查看扫描进度")
+    sub.add_parser("run-job", help="（内部）执行 stdin 中的单个任务")
+    p_export = sub.add_parser("export", help="合并结果为 CSV（不会覆盖训练数据）")
+    p_export.add_argument("--output", default=EXPORT_PATH)
+
+    args = parser.parse_args()
+    if args.command == "init":
+        from data.generate_param_sysdata import WORKLOADS
+        from optimizer.param_search import sample_configs
+        conn = connect(args.db)
+        added = init_sweep(conn, list(WORKLOADS), sample_configs(args.strategy, args.budget, args.seed),
+                           args.duration)
+        print(f"✅ 新增 {added} 个任务，当前状态：{sweep_status(conn)}")
+    elif args.command == "run":
+        run_sweep(args.db, args.worker, args.python, args.parts_dir, args.max_attempts, args.remote_dir)
+    elif args.command == "status":
+        print(sweep_status(connect(args.db)))
+    elif args.command == "run-job":
+        run_job_from_stdin()
+    elif args.command == "export":
+        export_results(args.parts_dir, args.output)
@@ -8,31 +8,39 @@ from threading import Thread
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from monitor.collector import collect_all_metrics
+from monitor.ringbuffer import read_latest_metrics
 from optimizer.param_recommender import recommend_params
 from controller.param_applier import apply_sysctl_params
+from workloads.pool import BENCHMARK_KEYS
 
 # 配置
 SAMPLE_INTERVAL = 1
 SAMPLE_DURATION = 10  # 秒
 OUTPUT_DIR = "evaluation"
-SUPPORTED_WORKLOADS = ["cpu_bound", "io_bound", "memory_bound", "mixed"]
+SUPPORTED_WORKLOADS = ["cpu_bound", "io_bound", "memory_bound", "mixed", "network_bound"]
 
 def sample_metrics_during_workload(tag, workload_func):
+    """
+    运行一次负载基准并同时采样系统指标，返回 (指标 DataFrame, 基准结果)
+    """
     data = []
     end_time = time.time() + SAMPLE_DURATION
 
-    t = Thread(target=workload_func, args=(SAMPLE_DURATION,))
+    result = {}
+    t = Thread(target=lambda: result.update(workload_func(SAMPLE_DURATION)))
     t.start()
 
     while time.time() < end_time:
-        metrics = collect_all_metrics()
+        metrics = read_latest_metrics()
         metrics["phase"] = tag
         data.append(metrics)
         time.sleep(SAMPLE_INTERVAL)
 
     t.join()
-    return pd.DataFrame(data)
+    df = pd.DataFrame(data)
+    for key in BENCHMARK_KEYS:
+        df[key] = result.get(key, 0)
+    return df, result
 
 def main():
     if len(sys.argv) < 2:
@@ -42,7 +50,7 @@ def main():
     workload_type = sys.argv[1]
     if workload_type not in SUPPORTED_WORKLOADS:
         print(f"❌ 不支持的负载类型：{workload_type}")
-        print("✅ 支持：cpu_bound, io_bound, memory_bound, mixed")
+        print(f"✅ 支持：{', '.join(SUPPORTED_WORKLOADS)}")
         return
 
     os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -51,25 +59,35 @@ def main():
     workload_module = importlib.import_module(f"workloads.{workload_type}")
 
     print(f"\n📊 阶段 1：采集优化前性能数据（{workload_type}）...")
-    df_before = sample_metrics_during_workload("before", workload_module.run)
+    df_before, bench_before = sample_metrics_during_workload("before", workload_module.benchmark)
 
     print("\n⚙️ 阶段 2：应用 AI 推荐参数...")
-    metrics = collect_all_metrics()
+    metrics = read_latest_metrics()
     metrics["workload_type"] = workload_type
     param_dict = recommend_params(metrics)
     apply_sysctl_params(param_dict)
 
     print(f"\n📊 阶段 3：采集优化后性能数据（{workload_type}）...")
-    df_after = sample_metrics_during_workload("after", workload_module.run)
+    df_after, bench_after = sample_metrics_during_workload("after", workload_module.benchmark)
 
     print("\n💾 正在保存数据和图表...")
     df_all = pd.concat([df_before, df_after], ignore_index=True)
     csv_path = f"{OUTPUT_DIR}/{workload_type}_eval_data.csv"
     df_all.to_csv(csv_path, index=False)
 
-    # 性能提升评估
-    print("\n📈 性能提升评估：")
-    for metric in ["cpu_percent", "mem_percent", "write_bytes"]:
+    # 性能提升评估：以负载实测的吞吐与延迟为准
+    print("\n🏁 负载基准（优化前 ➜ 优化后）：")
+    for metric, higher_is_better in [("ops_per_sec", True), ("bytes_per_sec", True),
+                                     ("p50_ms", False), ("p95_ms", False), ("p99_ms", False)]:
+        before_val = bench_before.get(metric, 0)
+        after_val = bench_after.get(metric, 0)
+        pct = (after_val - before_val) / before_val * 100 if before_val else float("inf")
+        better = (after_val >= before_val) == higher_is_better
+        symbol = "改善" if better else "变差"
+        print(f"- {metric}：{before_val:.4g} ➜ {after_val:.4g}（{symbol} {pct:+.1f}%）")
+
+    print("\n📈 系统指标变化：")
+    for metric in ["cpu_percent", "mem_percent", "read_bytes_per_sec", "write_bytes_per_sec"]:
         before_avg = df_before[metric].mean()
         after_avg = df_after[metric].mean()
         unit = "%" if "percent" in metric else ("MB/s" if "bytes" in metric else "")
@@ -86,7 +104,7 @@ def main():
 
     # 绘图
     plt.figure(figsize=(12, 6))
-    for metric in ["cpu_percent", "mem_percent", "write_bytes"]:
+    for metric in ["cpu_percent", "mem_percent", "read_bytes_per_sec", "write_bytes_per_sec"]:
         plt.plot(df_all["timestamp"], df_all[metric], label=metric)
     plt.xticks(rotation=45)
     plt.title(f"{workload_type.upper()} Performance Comparison (Before vs After Tuning)")
@@ -0,0 +1,134 @@
+"""
+节点代理：只负责采样与应用参数，分类、推荐与模型训练都在协调器上完成
+
+    FLEET_TOKEN=<共享令牌> python -m fleet.agent --coordinator http://10.0.0.1:8700 --interval 5 --batch 6
+
+每 interval 秒采集一次指标（优先读采样守护进程的环形缓冲），攒满 batch 个采样点后
+gzip 压缩为一个批次上传；协调器在响应中下发该节点的推荐参数，代理经变更守护应用，
+守护的决策（确认 / 回滚）随下一批次回报。上传失败时批次保留在本地（有上限），下次一并重试。
+下发的参数只有全部在参数空间内且通过 validate_config 校验时才会应用，其余整组拒绝并回报。
+"""
+import argparse
+import socket
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+
+from fleet.protocol import DEFAULT_PORT, INGEST_PATH, TOKEN_HEADER, encode_batch, decode_batch, default_token
+from monitor.ringbuffer import read_latest_metrics
+from optimizer.param_space import validate_config
+
+# 上传失败时本地最多保留的采样点数（更早的丢弃）
+MAX_PENDING = 720
+
+UPLOAD_TIMEOUT = 10.0
+
+
+class NodeAgent:
+    def __init__(self, coordinator, node_id=None, batch_size=6, apply=True, guard=None,
+                 collect_fn=read_latest_metrics, token=None):
+        self.url = coordinator.rstrip("/") + INGEST_PATH
+        self.token = token
+        self.node_id = node_id or socket.gethostname()
+        self.batch_size = batch_size
+        self.apply = apply
+        self.collect_fn = collect_fn
+        self.guard = guard
+        if self.guard is None and apply:
+            from controller.guard import TuningGuard
+            self.guard = TuningGuard(audit_path=f"controller/guard_audit_{self.node_id}.jsonl")
+
+        self.pending = deque(maxlen=MAX_PENDING)
+        self.events = []          # 待回报的应用 / 守护决策
+        self.applied_version = 0  # 已处理的推荐版本
+        self.workload = None      # 协调器给出的当前负载类型（守护按它比较前后窗口）
+
+    def sample(self):
+        metrics = self.collect_fn()
+        self.pending.append(metrics)
+        if self.guard is not None and self.workload is not None:
+            decision = self.guard.observe(metrics, self.workload)
+            if decision is not None:
+                self.events.append({"event": decision["event"], "time": decision["time"],
+                                    "regressions": decision.get("regressions", [])})
+        return metrics
+
+    def upload(self):
+        """
+        上传积压的采样点，返回协调器响应（失败返回 None，数据保留待重试）
+        """
+        if not self.pending:
+            return None
+        samples = list(self.pending)
+        body = encode_batch({
+            "node_id": self.node_id,
+            "applied_version": self.applied_version,
+            "events": self.events,
+            "samples": samples
+        })
+        headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        if self.token:
+            headers[TOKEN_HEADER] = self.token
+        request = urllib.request.Request(self.url, data=body, method="POST", headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=UPLOAD_TIMEOUT) as response:
+                reply = decode_batch(response.read(), response.headers.get("Content-Encoding"))
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            print(f"⚠️ 上传失败（{len(samples)} 个采样点待重试）：{e}")
+            return None
+
+        for _ in samples:
+            self.pending.popleft()
+        self.events = []
+        self.handle_reply(reply)
+        return reply
+
+    def handle_reply(self, reply):
+        self.workload = reply.get("workload", self.workload)
+        recommendation = reply.get("recommendation")
+        if not recommendation or recommendation["version"] <= self.applied_version:
+            return
+
+        params = recommendation["params"]
+        event = {"event": "recommendation", "version": recommendation["version"], "params": params}
+        errors = validate_config(params) if isinstance(params, dict) else ["参数格式不正确"]
+        if errors:
+            # 协调器只应下发参数空间内的合法取值，其它内容一律不写入本机
+            print(f"❌ 拒绝协调器下发的参数：{errors}")
+            event.update(event="rejected", errors=errors)
+        elif not self.apply:
+            print(f"📝 [dry-run] 协调器推荐参数（{self.workload}）：{params}")
+        elif self.guard is not None:
+            report = self.guard.apply(params, self.workload, source="fleet", queue=False)
+            if report.get("deferred"):
+                return  # 守护未就绪（观察期 / 基线未采满），下一批次重新下发
+            event.update(success=report["success"], applied=report["applied"], failed=report["failed"])
+        self.applied_version = recommendation["version"]
+        self.events.append(event)
+
+    def run(self, interval=5.0):
+        print(f"🛰️ 节点代理 {self.node_id} 已启动 → {self.url}")
+        try:
+            while True:
+                self.sample()
+                if len(self.pending) >= self.batch_size:
+                    self.upload()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print("⛔ 用户终止，上传剩余采样点...")
+            self.upload()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="集群模式节点代理")
+    parser.add_argument("--coordinator", default=f"http://127.0.0.1:{DEFAULT_PORT}", help="协调器地址")
+    parser.add_argument("--node-id", default=None, help="节点标识（默认主机名）")
+    parser.add_argument("--interval", type=float, default=5, help="采样间隔（秒）")
+    parser.add_argument("--batch", type=int, default=6, help="每批上传的采样点数")
+    parser.add_argument("--dry-run", action="store_true", help="只打印推荐参数，不应用")
+    parser.add_argument("--token", default=default_token(), help="共享令牌（默认读取环境变量 FLEET_TOKEN）")
+    args = parser.parse_args()
+
+    NodeAgent(args.coordinator, args.node_id, args.batch, apply=not args.dry_run,
+              token=args.token).run(args.interval)
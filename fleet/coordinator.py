@@ -0,0 +1,237 @@
+"""
+集群模式协调器：汇总各节点代理上传的指标，集中做负载识别与参数推荐
+
+    FLEET_TOKEN=<共享令牌> python -m fleet.coordinator --host 0.0.0.0 --port 8700
+
+- 每个节点独立维护滑动窗口负载识别（WorkloadStream），负载类型变化时用共享的推荐模型
+  生成该节点的参数并在上传响应中下发（带版本号，代理确认后不再重复下发）
+- 模型只在协调器上加载，由注册表热重载，节点本身不再训练和推理。汇总日志（带 node_id 列）中的
+  workload_type 是协调器自己识别出的伪标签，不用于训练：用它训练负载分类模型只会强化模型自身的错误。
+  模型仍应在带真实标签的数据上训练（如 generate_training_data 采集的数据），更新后的模型文件同样会被热重载
+- GET /nodes 返回各节点的负载、最近上报时间、已确认的推荐版本与守护决策
+- 默认只监听 127.0.0.1；监听其它地址时必须配置共享令牌（--token 或环境变量 FLEET_TOKEN），
+  请求头 X-Fleet-Token 不匹配的请求返回 401。令牌以明文传输，跨不可信网络时应置于 TLS 反向代理之后
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fleet.protocol import (DEFAULT_HOST, DEFAULT_PORT, INGEST_PATH, NODES_PATH, TOKEN_HEADER,
+                            encode_batch, decode_batch, default_token, check_token)
+from monitor.metric_log import MetricLogWriter
+from optimizer.workload_stream import WorkloadStream, DEFAULT_WINDOW
+
+FLEET_LOG_PATH = "data/fleet_metrics.csv"
+
+# 超过该时间（秒）未上报的节点标记为失联
+STALE_AFTER = 120.0
+
+# 每个节点保留的最近事件数
+MAX_EVENTS = 20
+
+# 单个请求体上限（压缩后字节数）
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+# 解压后的请求体上限，防止高压缩比的 gzip 炸弹耗尽内存
+MAX_DECODED_BYTES = 64 * 1024 * 1024
+
+
+def _default_recommend(metrics):
+    from optimizer.param_recommender import recommend_params
+    return recommend_params(metrics)
+
+
+class Coordinator:
+    def __init__(self, log_path=FLEET_LOG_PATH, log_format="csv", class_window=DEFAULT_WINDOW,
+                 min_dwell=3, recommend_fn=None, stale_after=STALE_AFTER):
+        self.log_writer = MetricLogWriter(log_path, fmt=log_format) if log_path else None
+        self.class_window = class_window
+        self.min_dwell = min_dwell
+        self.recommend_fn = recommend_fn or _default_recommend
+        self.stale_after = stale_after
+        self.nodes = {}
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+
+    def _node(self, node_id):
+        node = self.nodes.get(node_id)
+        if node is None:
+            node = self.nodes[node_id] = {
+                "stream": WorkloadStream(window=self.class_window, min_dwell=self.min_dwell),
+                "workload": None,
+                "confidence": 0.0,
+                "last_seen": 0.0,
+                "samples": 0,
+                "recommendation": None,
+                "applied_version": 0,
+                "events": deque(maxlen=MAX_EVENTS)
+            }
+            print(f"🛰️ 新节点接入：{node_id}")
+        return node
+
+    def ingest(self, payload):
+        """
+        处理一个上传批次，返回给该节点的响应：当前负载类型、置信度与待应用的推荐参数
+        """
+        node_id = str(payload["node_id"])
+        samples = payload.get("samples", [])
+        rows = []
+        with self._lock:
+            node = self._node(node_id)
+            node["last_seen"] = time.time()
+            node["samples"] += len(samples)
+            node["applied_version"] = max(node["applied_version"], int(payload.get("applied_version") or 0))
+            node["events"].extend(payload.get("events", []))
+
+            changed = False
+            for metrics in samples:
+                decision = node["stream"].update(metrics)
+                node["workload"], node["confidence"] = decision["workload"], decision["confidence"]
+                changed = changed or decision["changed"]
+                rows.append({**metrics, "node_id": node_id, "workload_type": node["workload"],
+                             "workload_confidence": node["confidence"]})
+            workload = node["workload"]
+
+        # 写日志与模型推理较慢，不占用节点状态锁，其它节点的批次可以并行处理
+        if self.log_writer is not None:
+            with self._log_lock:
+                for row in rows:
+                    self.log_writer.write(row)
+        params = self.recommend_fn({**samples[-1], "workload_type": workload}) if changed and samples else None
+
+        with self._lock:
+            if params:
+                self._recommend(node_id, node, workload, params)
+            recommendation = node["recommendation"]
+            if recommendation is not None and recommendation["version"] <= node["applied_version"]:
+                recommendation = None
+            return {"workload": node["workload"], "confidence": node["confidence"],
+                    "recommendation": recommendation}
+
+    def _recommend(self, node_id, node, workload, params):
+        if workload != node["workload"]:
+            return  # 推理期间该节点的负载又变了，以后续批次的推荐为准
+        current = node["recommendation"]
+        if current is not None and current["params"] == params:
+            return
+        version = max(current["version"] if current else 0, node["applied_version"]) + 1
+        node["recommendation"] = {"version": version, "workload": workload, "params": params}
+        print(f"⚙️ 节点 {node_id} 负载为 {workload}，下发第 {version} 版推荐参数")
+
+    def summary(self):
+        now = time.time()
+        with self._lock:
+            return [{
+                "node_id": node_id,
+                "workload": node["workload"],
+                "confidence": node["confidence"],
+                "samples": node["samples"],
+                "last_seen": node["last_seen"],
+                "stale": now - node["last_seen"] > self.stale_after,
+                "recommended_version": node["recommendation"]["version"] if node["recommendation"] else 0,
+                "applied_version": node["applied_version"],
+                "events": list(node["events"])
+            } for node_id, node in sorted(self.nodes.items())]
+
+    def close(self):
+        with self._log_lock:
+            if self.log_writer is not None:
+                self.log_writer.close()
+
+    def flush(self):
+        with self._log_lock:
+            if self.log_writer is not None:
+                self.log_writer.flush()
+
+
+def make_handler(coordinator, token=None):
+    class Handler(BaseHTTPRequestHandler):
+        def _authorized(self):
+            if check_token(token, self.headers.get(TOKEN_HEADER)):
+                return True
+            self._send(401, {"error": "invalid token"})
+            return False
+
+        def _send(self, status, payload, compress=False):
+            if compress:
+                body = encode_batch(payload)
+            else:
+                body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            if compress:
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if not self._authorized():
+                return
+            if self.path != INGEST_PATH:
+                self._send(404, {"error": "not found"})
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            if length <= 0 or length > MAX_BODY_BYTES:
+                self._send(413, {"error": "invalid body size"})
+                return
+            try:
+                payload = decode_batch(self.rfile.read(length), self.headers.get("Content-Encoding"),
+                                       max_size=MAX_DECODED_BYTES)
+                reply = coordinator.ingest(payload)
+            except (ValueError, KeyError, TypeError, OSError) as e:
+                self._send(400, {"error": str(e)})
+                return
+            self._send(200, reply, compress=True)
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            if self.path != NODES_PATH:
+                self._send(404, {"error": "not found"})
+                return
+            self._send(200, coordinator.summary())
+
+        def log_message(self, format, *args):
+            pass  # 每个批次一条访问日志太吵
+
+    return Handler
+
+
+def serve(coordinator, host=DEFAULT_HOST, port=DEFAULT_PORT, token=None):
+    """
+    启动 HTTP 服务（每个请求一个线程），返回 server，调用方负责 serve_forever / shutdown。
+    token 非空时所有请求都必须携带匹配的 X-Fleet-Token 请求头
+    """
+    return ThreadingHTTPServer((host, port), make_handler(coordinator, token))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="集群模式协调器")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="监听地址（非本机地址时必须配置共享令牌）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--log-path", default=FLEET_LOG_PATH, help="汇总指标日志")
+    parser.add_argument("--log-format", default="csv", choices=["csv", "parquet"])
+    parser.add_argument("--class-window", type=int, default=DEFAULT_WINDOW, help="负载识别滑动窗口（采样点数）")
+    parser.add_argument("--min-dwell", type=int, default=3, help="负载标签切换前的最短驻留（采样点数）")
+    parser.add_argument("--token", default=default_token(), help="共享令牌（默认读取环境变量 FLEET_TOKEN）")
+    args = parser.parse_args()
+
+    if args.host not in ("127.0.0.1", "localhost", "::1") and not args.token:
+        print(f"❌ 监听 {args.host} 时必须通过 --token 或环境变量 FLEET_TOKEN 配置共享令牌")
+        sys.exit(1)
+
+    coordinator = Coordinator(args.log_path, args.log_format, args.class_window, args.min_dwell)
+    server = serve(coordinator, args.host, args.port, args.token)
+    print(f"🛰️ 协调器已启动：http://{args.host}:{args.port}{INGEST_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("⛔ 用户终止，正在保存汇总日志...")
+    finally:
+        server.server_close()
+        coordinator.close()
@@ -0,0 +1,74 @@
+import gzip
+import hmac
+import io
+import json
+import os
+
+# 协调器默认监听地址与端口（默认只监听本机，跨主机部署需显式指定 --host 并配置共享令牌）
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8700
+
+# 共享令牌：代理在请求头中携带，协调器校验；未通过命令行指定时读取环境变量
+TOKEN_HEADER = "X-Fleet-Token"
+TOKEN_ENV = "FLEET_TOKEN"
+
+# 上传接口：POST gzip 压缩的 JSON 批次
+INGEST_PATH = "/ingest"
+NODES_PATH = "/nodes"
+
+COMPRESS_LEVEL = 6
+
+# 分块解压的块大小
+DECODE_CHUNK = 64 * 1024
+
+
+def encode_batch(payload):
+    """
+    dict → gzip(JSON) 字节；numpy 标量等非 JSON 类型按字符串/数值兜底
+    """
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+    return gzip.compress(data.encode("utf-8"), compresslevel=COMPRESS_LEVEL)
+
+
+def decode_batch(body, encoding="gzip", max_size=None):
+    """
+    gzip(JSON) 字节 → dict；max_size 限制解压后的字节数，分块解压，超过时抛出 ValueError 而不是继续占用内存
+    """
+    if encoding == "gzip":
+        body = _gunzip(body, max_size)
+    elif max_size is not None and len(body) > max_size:
+        raise ValueError(f"请求体超过 {max_size} 字节")
+    return json.loads(body.decode("utf-8"))
+
+
+def _gunzip(body, max_size=None):
+    chunks, size = [], 0
+    with gzip.GzipFile(fileobj=io.BytesIO(body)) as f:
+        while True:
+            chunk = f.read(DECODE_CHUNK)
+            if not chunk:
+                break
+            size += len(chunk)
+            if max_size is not None and size > max_size:
+                raise ValueError(f"解压后的请求体超过 {max_size} 字节")
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def default_token():
+    return os.environ.get(TOKEN_ENV) or None
+
+
+def check_token(expected, provided):
+    """
+    常数时间比较令牌；协调器未配置令牌时不校验
+    """
+    if not expected:
+        return True
+    return bool(provided) and hmac.compare_digest(expected.encode("utf-8"), provided.encode("utf-8"))
+
+
+def _json_default(value):
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
@@ -1,28 +1,178 @@
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 from datetime import datetime
+
 from monitor.cpu import get_cpu_info
-from monitor.gpu import get_gpu_info
+from monitor.gpu import get_gpu_info, EMPTY_GPU_INFO
 from monitor.memory import get_memory_info
 from monitor.io_runtime import get_disk_io
 from monitor.network import get_network_info
 from monitor.tcp import get_tcp_congestion
+from monitor.process import get_process_info
+from monitor.pressure import get_pressure_info, get_sched_info, get_vmstat_info
+
+# TCP 拥塞算法编码（用于模型推理）
+TCP_CONGESTION_CODES = {
+    "cubic": 0,
+    "bbr": 1,
+    "reno": 2
+}
+
+# 采集插件注册表：name -> 配置
+# - cost="low"：纯内存 / /proc 读取，在调用线程中直接执行
+# - cost="high"：可能阻塞（驱动调用、外部命令），放到后台线程并发执行，受 timeout 约束
+# - period：采样周期（秒），周期内复用上一次结果；0 表示每次都采
+PROBES = {}
+
+_results = {}   # name -> 上一次成功采集的结果
+_last_run = {}  # name -> 上一次发起采集的单调时间
+_pending = {}   # name -> 尚未完成的 Future
+_stats = {}     # name -> 延迟、超时、异常计数
+_lock = threading.Lock()
+
+# 同时在跑的阻塞插件线程数上限；同一插件上一次调用未返回时不会再次提交，
+# 因此卡死的插件最多占住一个线程，不会无限制地新建线程。
+# 线程为 daemon：卡死的驱动调用不会阻塞解释器退出（SIGTERM / atexit 刷日志的路径）
+PROBE_WORKERS = 4
+_slots = threading.BoundedSemaphore(PROBE_WORKERS)
+
+
+def register_probe(name, func, cost="low", period=0.0, timeout=1.0, default=None):
+    """
+    注册采集插件。func 无参数、返回 dict；default 为首次超时/失败时的兜底结果
+    """
+    PROBES[name] = {
+        "func": func,
+        "cost": cost,
+        "period": period,
+        "timeout": timeout,
+        "default": default or {}
+    }
+    _stats[name] = {"last_latency_ms": 0.0, "timeouts": 0, "errors": 0}
+
+
+def unregister_probe(name):
+    PROBES.pop(name, None)
+    for table in (_results, _last_run, _pending, _stats):
+        table.pop(name, None)
+
+
+def _run_probe(name, func):
+    start = time.perf_counter()
+    try:
+        result = func()
+    except Exception:
+        with _lock:
+            _stats[name]["errors"] += 1
+        raise
+    with _lock:
+        _results[name] = result
+        _stats[name]["last_latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+
+def _submit(name, func):
+    """
+    在 daemon 线程中执行阻塞插件，返回 Future：卡死的驱动调用不会拖住主循环。
+    所有线程槽位都被占用（多个插件卡死）时返回 None，本轮使用缓存结果
+    """
+    if not _slots.acquire(blocking=False):
+        return None
+    future = Future()
+
+    def worker():
+        try:
+            future.set_result(_run_probe(name, func))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            _slots.release()
+
+    threading.Thread(target=worker, name=f"probe-{name}", daemon=True).start()
+    return future
+
+
+def _cached(name):
+    return _results.get(name, PROBES[name]["default"])
+
 
 def collect_all_metrics():
+    now = time.monotonic()
     data = {}
-    data.update(get_cpu_info())
-    data.update(get_gpu_info())
-    data.update(get_memory_info())
-    data.update(get_disk_io())
-    data.update(get_network_info())
-    data.update(get_tcp_congestion())
+    waiting = {}
+
+    for name, probe in PROBES.items():
+        if probe["period"] > 0 and now - _last_run.get(name, float("-inf")) < probe["period"]:
+            data.update(_cached(name))  # 未到采样周期，复用上次结果
+            continue
+
+        if probe["cost"] != "high":
+            _last_run[name] = now
+            try:
+                data.update(_run_probe(name, probe["func"]))
+            except Exception:
+                data.update(_cached(name))
+            continue
+
+        future = _pending.get(name)
+        if future is not None and not future.done():
+            # 上一轮仍未返回（如 GPU 驱动卡死）：超时已在那一轮计过，不重复计数，也不再提交新任务
+            data.update(_cached(name))
+            continue
+
+        _last_run[name] = now
+        future = _submit(name, probe["func"])
+        if future is None:
+            data.update(_cached(name))
+            continue
+        _pending[name] = future
+        waiting[name] = now + probe["timeout"]
+
+    # 并发等待阻塞插件，每个插件各自受 timeout 约束
+    for name, deadline in sorted(waiting.items(), key=lambda item: item[1]):
+        try:
+            result = _pending[name].result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeout:
+            with _lock:
+                _stats[name]["timeouts"] += 1
+            result = _cached(name)
+        except Exception:
+            result = _cached(name)
+        data.update(result)
+
     data["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     # ✅ 添加这个（用于模型推理）
     algo = data.get("tcp_congestion_control", "unknown")
-    data["tcp_congestion_encoded"] = {
-        "cubic": 0,
-        "bbr": 1,
-        "reno": 2
-    }.get(algo, -1)
+    data["tcp_congestion_encoded"] = TCP_CONGESTION_CODES.get(algo, -1)
 
     return data
 
+
+def get_probe_stats():
+    """
+    返回各插件的最近一次延迟与累计超时/异常次数
+    """
+    with _lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
+
+
+# 内置插件
+register_probe("cpu", get_cpu_info)
+register_probe("gpu", get_gpu_info, cost="high", timeout=0.5, default=EMPTY_GPU_INFO)
+register_probe("memory", get_memory_info)
+register_probe("disk_io", get_disk_io)
+register_probe("network", get_network_info)
+register_probe("tcp", get_tcp_congestion, period=5.0)
+register_probe("process", get_process_info, period=5.0)  # 按进程 / cgroup 归因
+register_probe("psi", get_pressure_info)
+register_probe("sched", get_sched_info)
+register_probe("vmstat", get_vmstat_info)
+
+
+if __name__ == "__main__":
+    import json
+    collect_all_metrics()
+    print(json.dumps(collect_all_metrics(), indent=2))
+    print(json.dumps(get_probe_stats(), indent=2))
@@ -1,16 +1,108 @@
 import psutil
 
-def get_cpu_info():
-    return {
-        "cpu_percent": psutil.cpu_percent(interval=1),
-        "load_avg_1": psutil.getloadavg()[0],
-        "load_avg_5": psutil.getloadavg()[1],
-        "load_avg_15": psutil.getloadavg()[2]
+PROC_STAT = "/proc/stat"
+
+# /proc/stat 中 cpu 行的字段顺序（guest/guest_nice 已计入 user/nice，不重复统计）
+CPU_MODES = ["user", "nice", "system", "idle", "iowait", "irq", "softirq", "steal"]
+
+# 对外输出的分模式占比
+REPORT_MODES = ["user", "system", "iowait", "steal", "softirq"]
+
+# 上一次的 /proc/stat 快照（增量计算用）
+_last_snapshot = None
+
+
+def read_cpu_times(path=PROC_STAT):
+    """
+    读取 /proc/stat，返回 {"cpu": [...], "cpu0": [...], ...}，值为各模式的 jiffies
+    """
+    times = {}
+    with open(path, "r") as f:
+        for line in f:
+            if not line.startswith("cpu"):
+                break  # cpu 行都在文件开头
+            parts = line.split()
+            values = [int(v) for v in parts[1:len(CPU_MODES) + 1]]
+            values += [0] * (len(CPU_MODES) - len(values))  # 老内核字段较少
+            times[parts[0]] = values
+    return times
+
+
+def _delta_percent(prev, cur):
+    """
+    根据两次快照的差值计算各模式占比（%）
+    """
+    delta = [max(c - p, 0) for p, c in zip(prev, cur)]
+    total = sum(delta)
+    if total == 0:
+        return None
+    modes = dict(zip(CPU_MODES, delta))
+    busy = total - modes["idle"] - modes["iowait"]
+    result = {"percent": round(busy * 100.0 / total, 1)}
+    for mode in REPORT_MODES:
+        result[mode] = round(modes[mode] * 100.0 / total, 1)
+    return result
+
+
+def sample_cpu_usage():
+    """
+    非阻塞采样：与上一次调用的快照做差，首次调用时以开机以来的累计值计算。
+    返回 (总体占比, 每核占比列表)
+    """
+    global _last_snapshot
+    cur = read_cpu_times()
+    prev = _last_snapshot or {name: [0] * len(CPU_MODES) for name in cur}
+    _last_snapshot = cur
+
+    zero = {"percent": 0.0, **{mode: 0.0 for mode in REPORT_MODES}}
+    overall = _delta_percent(prev.get("cpu", cur["cpu"]), cur["cpu"]) or zero
+
+    per_core = []
+    core_names = sorted((n for n in cur if n != "cpu"), key=lambda n: int(n[3:]))
+    for name in core_names:
+        usage = _delta_percent(prev.get(name, [0] * len(CPU_MODES)), cur[name])
+        per_core.append(usage["percent"] if usage else 0.0)
+
+    return overall, per_core
+
+
+def get_cpu_info(per_core=False):
+    """
+    采集 CPU 指标（不再阻塞 1 秒）：
+    - cpu_percent：距上次采样的总体使用率
+    - cpu_user/system/iowait/steal/softirq：分模式占比
+    - cpu_core_max/min：各核使用率的最大/最小值（反映负载是否集中在少数核）
+    - per_core=True 时额外输出 cpu{N}_percent
+    """
+    load_1, load_5, load_15 = psutil.getloadavg()
+
+    try:
+        overall, cores = sample_cpu_usage()
+    except (OSError, ValueError, KeyError):
+        # 非 Linux 环境没有 /proc/stat，退回 psutil 的非阻塞模式
+        cores = psutil.cpu_percent(interval=None, percpu=True)
+        overall = {"percent": psutil.cpu_percent(interval=None)}
+        overall.update({mode: 0.0 for mode in REPORT_MODES})
+
+    data = {
+        "cpu_percent": overall["percent"],
+        "load_avg_1": load_1,
+        "load_avg_5": load_5,
+        "load_avg_15": load_15
     }
+    for mode in REPORT_MODES:
+        data[f"cpu_{mode}"] = overall[mode]
+    data["cpu_core_max"] = max(cores) if cores else overall["percent"]
+    data["cpu_core_min"] = min(cores) if cores else overall["percent"]
+
+    if per_core:
+        for i, value in enumerate(cores):
+            data[f"cpu{i}_percent"] = value
+
+    return data
 
 
 if __name__ == "__main__":
     import json
-    cpu_data = get_cpu_info()
+    cpu_data = get_cpu_info(per_core=True)
     print(json.dumps(cpu_data, indent=2))
-
@@ -1,21 +1,231 @@
+import atexit
+import shutil
 import subprocess
+import threading
 
-def get_gpu_info(gpu_id=0):
-    try:
-        cmd = f"nvidia-smi --query-gpu=utilization.gpu,memory.used,temperature.gpu,power.draw --format=csv,noheader,nounits -i {gpu_id}"
-        output = subprocess.check_output(cmd, shell=True).decode().strip()
-        util, mem, temp, power = output.split(', ')
-        return {
-            "gpu_util": float(util),
-            "gpu_mem_used": float(mem),
-            "gpu_temp": float(temp),
-            "gpu_power": float(power)
-        }
-    except:
+# 单卡指标字段（与历史训练数据列名保持一致：历史数据只采集了 0 号卡，这些列始终是 0 号卡的值）
+GPU_FIELDS = ["gpu_util", "gpu_mem_used", "gpu_temp", "gpu_power"]
+SMI_QUERY = "index,utilization.gpu,memory.used,temperature.gpu,power.draw"
+
+# 全部卡的汇总指标（新列名，不改变历史列的含义）
+GPU_AGGREGATE_FIELDS = ["gpu_util_avg", "gpu_mem_used_total", "gpu_temp_max", "gpu_power_total"]
+
+# 无 GPU 或采样失败时的兜底值（gpu_count 为 -1 表示未知）
+EMPTY_GPU_INFO = {**{field: -1 for field in GPU_FIELDS + GPU_AGGREGATE_FIELDS}, "gpu_count": -1}
+
+
+class NullBackend:
+    """
+    无 GPU 时的空实现：不产生任何系统调用
+    """
+    name = "none"
+
+    def device_count(self):
+        return 0
+
+    def sample(self, index):
+        return None
+
+    def close(self):
+        pass
+
+
+class NvmlBackend:
+    """
+    基于 NVML（pynvml）的持久句柄，初始化一次后每次采样只是几次库函数调用
+    """
+    name = "nvml"
+
+    def __init__(self):
+        import pynvml
+        self._nvml = pynvml
+        pynvml.nvmlInit()
+        self._handles = [
+            pynvml.nvmlDeviceGetHandleByIndex(i)
+            for i in range(pynvml.nvmlDeviceGetCount())
+        ]
+
+    def device_count(self):
+        return len(self._handles)
+
+    def sample(self, index):
+        nvml = self._nvml
+        handle = self._handles[index]
+        try:
+            power = nvml.nvmlDeviceGetPowerUsage(handle) / 1000.0  # mW → W
+        except nvml.NVMLError:
+            power = -1  # 部分型号不支持功耗读取
         return {
-            "gpu_util": -1,
-            "gpu_mem_used": -1,
-            "gpu_temp": -1,
-            "gpu_power": -1
+            "gpu_util": float(nvml.nvmlDeviceGetUtilizationRates(handle).gpu),
+            "gpu_mem_used": nvml.nvmlDeviceGetMemoryInfo(handle).used / 1024 ** 2,  # MiB，与 nvidia-smi 一致
+            "gpu_temp": float(nvml.nvmlDeviceGetTemperature(handle, nvml.NVML_TEMPERATURE_GPU)),
+            "gpu_power": power
         }
 
+    def close(self):
+        try:
+            self._nvml.nvmlShutdown()
+        except Exception:
+            pass
+
+
+class SmiLoopBackend:
+    """
+    没有 pynvml 时的退路：常驻一个 nvidia-smi --loop-ms 进程，后台线程持续读取最新一行，
+    采样时只读内存中的缓存
+    """
+    name = "nvidia-smi"
+
+    def __init__(self, interval_ms=1000):
+        listing = subprocess.run(["nvidia-smi", "-L"], capture_output=True, text=True, check=True)
+        self._count = len([line for line in listing.stdout.splitlines() if line.startswith("GPU ")])
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._proc = subprocess.Popen(
+            ["nvidia-smi", f"--query-gpu={SMI_QUERY}", "--format=csv,noheader,nounits",
+             f"--loop-ms={interval_ms}"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        )
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def _read_loop(self):
+        for line in self._proc.stdout:
+            try:
+                index, util, mem, temp, power = [v.strip() for v in line.split(",")]
+                values = {
+                    "gpu_util": float(util),
+                    "gpu_mem_used": float(mem),
+                    "gpu_temp": float(temp),
+                    "gpu_power": float(power) if power not in ("[N/A]", "N/A") else -1
+                }
+            except ValueError:
+                continue
+            with self._lock:
+                self._latest[int(index)] = values
+
+    def device_count(self):
+        return self._count
+
+    def sample(self, index):
+        with self._lock:
+            return self._latest.get(index)
+
+    def close(self):
+        if self._proc.poll() is None:
+            self._proc.terminate()
+
+
+class FakeBackend:
+    """
+    测试用后端：按给定的每卡指标返回，用于无 GPU 机器上验证采集逻辑
+    """
+    name = "fake"
+
+    def __init__(self, samples):
+        self.samples = list(samples)
+
+    def device_count(self):
+        return len(self.samples)
+
+    def sample(self, index):
+        return self.samples[index]
+
+    def close(self):
+        pass
+
+
+def detect_backend():
+    """
+    启动时探测一次可用的 GPU 后端：NVML → 常驻 nvidia-smi → 空实现
+    """
+    try:
+        return NvmlBackend()
+    except Exception:
+        pass
+    if shutil.which("nvidia-smi"):
+        try:
+            return SmiLoopBackend()
+        except Exception:
+            pass
+    return NullBackend()
+
+
+# 全局后端（首次采样时探测）
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = detect_backend()
+    return _backend
+
+
+def set_backend(backend):
+    """
+    替换 GPU 后端（测试时注入 FakeBackend）
+    """
+    global _backend
+    if _backend is not None:
+        _backend.close()
+    _backend = backend
+
+
+@atexit.register
+def _close_backend():
+    if _backend is not None:
+        _backend.close()
+
+
+def get_gpu_info(gpu_id=None):
+    """
+    采集 GPU 指标（所有返回路径都带 gpu_count）：
+    - gpu_id 指定时返回该卡的 gpu_util/gpu_mem_used/gpu_temp/gpu_power
+    - 否则 gpu_util/gpu_mem_used/gpu_temp/gpu_power 为 0 号卡的值（与历史训练数据一致），
+      全部卡的汇总另见 gpu_util_avg / gpu_mem_used_total / gpu_temp_max / gpu_power_total，
+      多卡时额外输出 gpu{N}_* 分卡指标
+    """
+    backend = get_backend()
+    count = backend.device_count()
+    if count == 0:
+        return {**EMPTY_GPU_INFO, "gpu_count": 0}
+
+    if gpu_id is not None:
+        try:
+            sample = backend.sample(gpu_id)
+        except Exception:
+            sample = None
+        return {**{field: -1 for field in GPU_FIELDS}, **(sample or {}), "gpu_count": count}
+
+    samples = []
+    for i in range(count):
+        try:
+            samples.append(backend.sample(i))
+        except Exception:
+            samples.append(None)
+    valid = [s for s in samples if s]
+    if not valid:
+        return {**EMPTY_GPU_INFO, "gpu_count": count}
+
+    data = {field: samples[0][field] if samples[0] else -1 for field in GPU_FIELDS}
+    data.update({
+        "gpu_util_avg": sum(s["gpu_util"] for s in valid) / len(valid),
+        "gpu_mem_used_total": sum(s["gpu_mem_used"] for s in valid),
+        "gpu_temp_max": max(s["gpu_temp"] for s in valid),
+        "gpu_power_total": sum(max(s["gpu_power"], 0) for s in valid),
+        "gpu_count": count
+    })
+    if count > 1:
+        for i, sample in enumerate(samples):
+            for field in GPU_FIELDS:
+                value = sample[field] if sample else -1
+                data[field.replace("gpu_", f"gpu{i}_", 1)] = value
+
+    return data
+
+
+if __name__ == "__main__":
+    import json
+    print(f"GPU 后端：{get_backend().name}")
+    print(json.dumps(get_gpu_info(), indent=2))
@@ -1,9 +1,62 @@
 import psutil
 
-def get_disk_io():
-    io = psutil.disk_io_counters()
+from monitor.rates import compute_rates, safe_ratio
+
+# 参与速率换算的磁盘计数器
+DISK_COUNTERS = ["read_bytes", "write_bytes", "read_count", "write_count", "busy_time"]
+
+
+def _disk_counters(io):
+    return {key: getattr(io, key, 0) for key in DISK_COUNTERS}
+
+
+def _disk_rates(namespace, io):
+    """
+    将 psutil 的累计磁盘计数器转换为吞吐、IOPS、平均请求大小和繁忙度
+    """
+    rates = compute_rates(namespace, _disk_counters(io))
     return {
+        "read_bytes_per_sec": round(rates["read_bytes"], 1),
+        "write_bytes_per_sec": round(rates["write_bytes"], 1),
+        "read_iops": round(rates["read_count"], 2),
+        "write_iops": round(rates["write_count"], 2),
+        "avg_read_size": round(safe_ratio(rates["read_bytes"], rates["read_count"]), 1),
+        "avg_write_size": round(safe_ratio(rates["write_bytes"], rates["write_count"]), 1),
+        # busy_time 单位为毫秒，换算为繁忙百分比
+        "disk_util": round(min(rates["busy_time"] / 10.0, 100.0), 1)
+    }
+
+
+def get_disk_io_per_device():
+    """
+    按块设备返回速率指标：{"nvme0n1": {...}, "sda": {...}}
+    """
+    results = {}
+    for dev, io in psutil.disk_io_counters(perdisk=True).items():
+        results[dev] = _disk_rates(f"disk:{dev}", io)
+    return results
+
+
+def get_disk_io(per_device=False):
+    """
+    采集磁盘 I/O 指标：
+    - read_bytes/write_bytes：累计字节数（仅用于日志，随开机时间单调增长，不宜作为特征）
+    - *_per_sec / *_iops / avg_*_size / disk_util：距上次采样的速率
+    - per_device=True 时额外输出 disk_{dev}_* 分设备指标
+    """
+    io = psutil.disk_io_counters()
+    if io is None:
+        return {}
+
+    data = {
         "read_bytes": io.read_bytes,
         "write_bytes": io.write_bytes
     }
+    data.update(_disk_rates("disk", io))
+
+    if per_device:
+        for dev, dev_rates in get_disk_io_per_device().items():
+            for key, value in dev_rates.items():
+                data[f"disk_{dev}_{key.removeprefix('disk_')}"] = value
 
+    return data
@@ -0,0 +1,241 @@
+import atexit
+import csv
+import glob
+import os
+import signal
+import sys
+import time
+from datetime import datetime
+
+SUPPORTED_FORMATS = ["csv", "parquet"]
+
+# 已知的字符串列（parquet schema 用），其余列按 float64 存储
+_STRING_COLUMNS = {"timestamp", "tcp_congestion_control", "workload_type", "phase",
+                   "top_process", "top_cgroup", "top_cgroup_workload", "node_id"}
+
+
+def _normalize(row):
+    """
+    统一列类型：数值一律转 float，其余转字符串，保证同一文件内 schema 稳定
+    """
+    result = {}
+    for key, value in row.items():
+        if isinstance(value, (int, float)):
+            result[key] = float(value)
+        elif value is None:
+            result[key] = None
+        else:
+            result[key] = str(value)
+    return result
+
+
+class MetricLogWriter:
+    """
+    流式指标日志：
+    - 按 batch_size 行或 flush_interval 秒批量落盘，内存占用恒定
+    - 文件超过 max_bytes 或打开超过 rotate_interval 秒时轮转，
+      旧文件重命名为 <name>-<时间戳>.<后缀>
+    - 出现新的列时同样轮转，保证每个文件的表头/schema 一致
+    - fmt="parquet" 时以 Arrow 行组追加写入（需要 pyarrow）
+    """
+
+    def __init__(self, path, fmt="csv", batch_size=20, flush_interval=30.0,
+                 max_bytes=64 * 1024 * 1024, rotate_interval=24 * 3600):
+        if fmt not in SUPPORTED_FORMATS:
+            raise ValueError(f"不支持的日志格式：{fmt}（可选 {SUPPORTED_FORMATS}）")
+        if fmt == "parquet":
+            import pyarrow  # noqa: F401  提前暴露缺失依赖
+
+        stem, _ = os.path.splitext(path)
+        self.path = f"{stem}.{fmt}"
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+
+        self._buffer = []
+        self._columns = None
+        self._file = None
+        self._writer = None
+        self._opened_at = None
+        self._last_flush = time.monotonic()
+        self.rows_written = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    # -------- 对外接口 --------
+    def write(self, row):
+        self._buffer.append(_normalize(row))
+        if (len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+
+        columns = list(self._columns or [])
+        for row in rows:
+            for key in row:
+                if key not in columns:
+                    columns.append(key)
+
+        if self._file is not None and (columns != self._columns or self._type_drift(rows)
+                                       or self._should_rotate()):
+            self._rotate()
+        if self._file is None:
+            self._open(columns, rows)
+
+        if self.fmt == "csv":
+            self._writer.writerows(rows)
+            self._file.flush()
+        else:
+            import pyarrow as pa
+            table = pa.Table.from_pylist(self._coerce(rows), schema=self._schema)
+            self._writer.write_table(table)
+        self.rows_written += len(rows)
+
+    def close(self):
+        self.flush()
+        self._close_file()
+
+    # -------- 内部实现 --------
+    def _should_rotate(self):
+        if self.rotate_interval and time.monotonic() - self._opened_at >= self.rotate_interval:
+            return True
+        try:
+            return os.path.getsize(self.path) >= self.max_bytes
+        except OSError:
+            return False
+
+    def _type_drift(self, rows):
+        """
+        parquet 的 schema 在打开文件时固定：某个 float64 列出现了非数值字符串时需要轮转，
+        新文件按新数据把该列建成 string
+        """
+        if self.fmt != "parquet":
+            return False
+        float_columns = {field.name for field in self._schema if field.type != _arrow_string()}
+        return any(isinstance(value, str) and key in float_columns
+                   for row in rows for key, value in row.items())
+
+    def _coerce(self, rows):
+        """
+        按当前 schema 统一取值类型：string 列转字符串，float64 列无法转换的值记为空
+        """
+        string_columns = {field.name for field in self._schema if field.type == _arrow_string()}
+        coerced = []
+        for row in rows:
+            fixed = {}
+            for key, value in row.items():
+                if value is None:
+                    fixed[key] = None
+                elif key in string_columns:
+                    fixed[key] = value if isinstance(value, str) else str(value)
+                else:
+                    try:
+                        fixed[key] = float(value)
+                    except (TypeError, ValueError):
+                        fixed[key] = None
+            coerced.append(fixed)
+        return coerced
+
+    def _open(self, columns, rows):
+        if os.path.exists(self.path):
+            self._archive()  # 上次运行遗留的活动文件，先归档，避免表头错位
+
+        self._columns = columns
+        self._opened_at = time.monotonic()
+        if self.fmt == "csv":
+            self._file = open(self.path, "w", newline="")
+            self._writer = csv.DictWriter(self._file, fieldnames=columns, restval="")
+            self._writer.writeheader()
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            string_columns = _STRING_COLUMNS | {
+                key for row in rows for key, value in row.items() if isinstance(value, str)
+            }
+            self._schema = pa.schema([
+                pa.field(name, pa.string() if name in string_columns else pa.float64())
+                for name in columns
+            ])
+            self._file = open(self.path, "wb")
+            self._writer = pq.ParquetWriter(self._file, self._schema, compression="zstd")
+
+    def _close_file(self):
+        if self._file is None:
+            return
+        if self.fmt == "parquet":
+            self._writer.close()
+        self._file.close()
+        self._file = None
+        self._writer = None
+
+    def _rotate(self):
+        self._close_file()
+        self._archive()
+
+    def _archive(self):
+        stem, ext = os.path.splitext(self.path)
+        suffix = datetime.now().strftime("%Y%m%d-%H%M%S")
+        target = f"{stem}-{suffix}{ext}"
+        index = 1
+        while os.path.exists(target):
+            target = f"{stem}-{suffix}-{index}{ext}"
+            index += 1
+        os.replace(self.path, target)
+
+
+def _arrow_string():
+    import pyarrow as pa
+    return pa.string()
+
+
+def _archive_sort_key(path, stem, ext):
+    """
+    归档文件名 <stem>-YYYYmmdd-HHMMSS[-N]<ext> 按数值排序（字典序会把 -10 排在 -2 之前）
+    """
+    suffix = path[len(stem) + 1:len(path) - len(ext)]
+    parts = suffix.split("-")
+    key = [(0, int(part)) if part.isdigit() else (1, part) for part in parts]
+    if len(key) < 3:
+        key.append((0, 0))  # 同一秒内的第一个归档没有序号
+    return key
+
+
+def close_on_exit(writer):
+    """
+    进程退出（正常结束、Ctrl+C、SIGTERM）时刷新并关闭日志
+    """
+    atexit.register(writer.close)
+
+    def _on_sigterm(signum, frame):
+        sys.exit(0)  # 转成 SystemExit，走正常的 finally / atexit 流程
+
+    signal.signal(signal.SIGTERM, _on_sigterm)
+
+
+def load_metric_logs(path):
+    """
+    读取某个日志的所有文件（活动文件 + 轮转归档），按时间顺序合并为 DataFrame
+    """
+    import pandas as pd
+
+    stem, ext = os.path.splitext(path)
+    files = sorted(glob.glob(f"{stem}-*{ext}"), key=lambda f: _archive_sort_key(f, stem, ext))
+    if os.path.exists(path):
+        files.append(path)
+    if not files:
+        return pd.DataFrame()
+
+    if ext == ".parquet":
+        frames = [pd.read_parquet(f) for f in files]
+    else:
+        frames = [pd.read_csv(f) for f in files if os.path.getsize(f) > 0]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
@@ -1,9 +1,60 @@
 import psutil
 
-def get_network_info():
-    net = psutil.net_io_counters()
+from monitor.rates import compute_rates, safe_ratio
+
+# 参与速率换算的网卡计数器
+NET_COUNTERS = [
+    "bytes_sent", "bytes_recv", "packets_sent", "packets_recv",
+    "errin", "errout", "dropin", "dropout"
+]
+
+
+def _net_rates(namespace, net):
+    """
+    将 psutil 的累计网卡计数器转换为吞吐、包速率和错误/丢包速率
+    """
+    rates = compute_rates(namespace, {key: getattr(net, key, 0) for key in NET_COUNTERS})
     return {
+        "bytes_sent_per_sec": round(rates["bytes_sent"], 1),
+        "bytes_recv_per_sec": round(rates["bytes_recv"], 1),
+        "packets_sent_per_sec": round(rates["packets_sent"], 2),
+        "packets_recv_per_sec": round(rates["packets_recv"], 2),
+        "avg_packet_size": round(safe_ratio(
+            rates["bytes_sent"] + rates["bytes_recv"],
+            rates["packets_sent"] + rates["packets_recv"]
+        ), 1),
+        "net_errors_per_sec": round(rates["errin"] + rates["errout"], 2),
+        "net_drops_per_sec": round(rates["dropin"] + rates["dropout"], 2)
+    }
+
+
+def get_network_info_per_nic():
+    """
+    按网卡返回速率指标：{"eth0": {...}, "lo": {...}}
+    """
+    results = {}
+    for nic, net in psutil.net_io_counters(pernic=True).items():
+        results[nic] = _net_rates(f"net:{nic}", net)
+    return results
+
+
+def get_network_info(per_nic=False):
+    """
+    采集网络指标：
+    - bytes_sent/bytes_recv：累计字节数（仅用于日志，不宜作为特征）
+    - *_per_sec / avg_packet_size / net_*_per_sec：距上次采样的速率
+    - per_nic=True 时额外输出 net_{nic}_* 分网卡指标
+    """
+    net = psutil.net_io_counters()
+    data = {
         "bytes_sent": net.bytes_sent,
         "bytes_recv": net.bytes_recv
     }
+    data.update(_net_rates("net", net))
+
+    if per_nic:
+        for nic, nic_rates in get_network_info_per_nic().items():
+            for key, value in nic_rates.items():
+                data[f"net_{nic}_{key.removeprefix('net_')}"] = value
 
+    return data
@@ -0,0 +1,144 @@
+import os
+
+from monitor.process import FdReader, PAGE_SIZE
+from monitor.rates import compute_rates, safe_ratio
+
+PROC_ROOT = "/proc"
+
+PSI_RESOURCES = ["cpu", "memory", "io"]
+
+# 竞争类特征（供负载分类器 / 参数推荐器使用），内核不支持的项恒为 0
+PRESSURE_FEATURES = [
+    # PSI：采样间隔内有任务因资源不足而停顿的时间占比（%），some=至少一个任务，full=所有任务
+    "psi_cpu_some", "psi_memory_some", "psi_memory_full", "psi_io_some", "psi_io_full",
+    # 调度：每秒累计的运行队列等待时间、平均每次调度的等待、上下文切换与 fork 速率
+    "runqueue_wait_ms_per_sec", "avg_runqueue_wait_us", "ctxt_per_sec", "forks_per_sec",
+    "procs_running", "procs_blocked",
+    # 内存回收 / 回写
+    "pgmajfault_per_sec", "pswpin_per_sec", "pswpout_per_sec", "dirty_bytes", "writeback_bytes"
+]
+
+_reader = FdReader()
+
+
+def _read(name, root=None):
+    return _reader.read(os.path.join(root or PROC_ROOT, name))
+
+
+# -------- PSI --------
+def parse_psi(text):
+    """
+    /proc/pressure/<res> → {"some": {"avg10", "avg60", "avg300", "total"}, "full": {...}}
+    """
+    result = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        result[parts[0]] = {k: float(v) for k, v in (item.split("=") for item in parts[1:])}
+    return result
+
+
+def get_pressure_info(root=None):
+    """
+    PSI 停顿占比：由 total（累计停顿微秒）的增量计算采样间隔内的百分比，
+    另输出内核给出的 avg10 便于对照；无 PSI（老内核 / 未开启 psi=1）时为 0
+    """
+    data = {}
+    counters = {}
+    for resource in PSI_RESOURCES:
+        psi = parse_psi(_read(f"pressure/{resource}", root) or "")
+        for kind in ("some", "full"):
+            stats = psi.get(kind, {})
+            counters[f"{resource}_{kind}"] = stats.get("total", 0)
+            data[f"psi_{resource}_{kind}_avg10"] = stats.get("avg10", 0.0)
+
+    rates = compute_rates("psi", counters)
+    for key, usec_per_sec in rates.items():
+        data[f"psi_{key}"] = round(min(usec_per_sec / 1e4, 100.0), 3)  # µs/s → %
+    return data
+
+
+# -------- 调度 --------
+def parse_schedstat(text):
+    """
+    /proc/schedstat 各 cpuN 行第 7~9 个字段：运行时间(ns)、运行队列等待时间(ns)、时间片数，返回全核合计
+    """
+    totals = {"run_ns": 0, "wait_ns": 0, "timeslices": 0}
+    for line in text.splitlines():
+        if line.startswith("cpu"):
+            fields = line.split()
+            if len(fields) >= 10:
+                totals["run_ns"] += int(fields[7])
+                totals["wait_ns"] += int(fields[8])
+                totals["timeslices"] += int(fields[9])
+    return totals
+
+
+def parse_proc_stat(text):
+    stats = {}
+    for line in text.splitlines():
+        key, _, value = line.partition(" ")
+        if key in ("ctxt", "processes", "procs_running", "procs_blocked"):
+            stats[key] = int(value.split()[0])
+    return stats
+
+
+def get_sched_info(root=None):
+    """
+    运行队列等待（/proc/schedstat）与上下文切换 / fork 速率、可运行与阻塞进程数（/proc/stat）
+    """
+    sched = parse_schedstat(_read("schedstat", root) or "")
+    stat = parse_proc_stat(_read("stat", root) or "")
+    rates = compute_rates("sched", {
+        "wait_ns": sched["wait_ns"],
+        "timeslices": sched["timeslices"],
+        "ctxt": stat.get("ctxt", 0),
+        "processes": stat.get("processes", 0)
+    })
+    return {
+        "runqueue_wait_ms_per_sec": round(rates["wait_ns"] / 1e6, 3),
+        "avg_runqueue_wait_us": round(safe_ratio(rates["wait_ns"], rates["timeslices"]) / 1e3, 3),
+        "ctxt_per_sec": round(rates["ctxt"], 1),
+        "forks_per_sec": round(rates["processes"], 2),
+        "procs_running": stat.get("procs_running", 0),
+        "procs_blocked": stat.get("procs_blocked", 0)
+    }
+
+
+# -------- vmstat --------
+VMSTAT_COUNTERS = ["pgmajfault", "pswpin", "pswpout"]
+VMSTAT_GAUGES = ["nr_dirty", "nr_writeback"]
+
+
+def parse_vmstat(text, keys):
+    values = {}
+    for line in text.splitlines():
+        key, _, value = line.partition(" ")
+        if key in keys:
+            values[key] = int(value)
+    return values
+
+
+def get_vmstat_info(root=None):
+    """
+    主缺页、换入/换出速率（页/秒）与脏页、回写中页面的字节数
+    """
+    values = parse_vmstat(_read("vmstat", root) or "", set(VMSTAT_COUNTERS + VMSTAT_GAUGES))
+    rates = compute_rates("vmstat", {key: values.get(key, 0) for key in VMSTAT_COUNTERS})
+    return {
+        "pgmajfault_per_sec": round(rates["pgmajfault"], 2),
+        "pswpin_per_sec": round(rates["pswpin"], 2),
+        "pswpout_per_sec": round(rates["pswpout"], 2),
+        "dirty_bytes": values.get("nr_dirty", 0) * PAGE_SIZE,
+        "writeback_bytes": values.get("nr_writeback", 0) * PAGE_SIZE
+    }
+
+
+if __name__ == "__main__":
+    import json
+    import time
+    for probe in (get_pressure_info, get_sched_info, get_vmstat_info):
+        probe()
+    time.sleep(1)
+    print(json.dumps({**get_pressure_info(), **get_sched_info(), **get_vmstat_info()}, indent=2))
@@ -0,0 +1,392 @@
+import errno
+import os
+import threading
+import time
+
+PROC_ROOT = "/proc"
+
+
+def _detect_cgroup_root():
+    """
+    cgroup v2 挂载点：纯 v2 主机为 /sys/fs/cgroup，混合模式下为 /sys/fs/cgroup/unified
+    """
+    for path in ("/sys/fs/cgroup", "/sys/fs/cgroup/unified"):
+        if os.path.exists(os.path.join(path, "cgroup.controllers")):
+            return path
+    return "/sys/fs/cgroup"
+
+
+CGROUP_ROOT = _detect_cgroup_root()
+
+TOP_N = 5
+
+def _default_max_open():
+    """
+    常驻文件描述符上限：进程 RLIMIT_NOFILE 软限制的 1/4，给本进程的其它文件、socket 留出余量
+    """
+    try:
+        import resource
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    except (ImportError, OSError, ValueError):
+        return 256
+    if soft == resource.RLIM_INFINITY:
+        return 4096
+    return max(soft // 4, 16)
+
+
+# 常驻文件描述符上限，超出部分每次读取时临时 open/close
+MAX_OPEN_FDS = _default_max_open()
+
+# 打开文件失败时视为“描述符耗尽”而不是“进程已退出”的错误码
+_FD_EXHAUSTED = (errno.EMFILE, errno.ENFILE)
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# cgroup 负载分类阈值（规则命中 0 个为 idle，多个为 mixed）
+CPU_BUSY_PERCENT = 50.0               # 占用超过半个核
+IO_BUSY_BYTES_PER_SEC = 10 * 1024 ** 2
+IO_BUSY_IOPS = 200
+MEM_GROWTH_BYTES_PER_SEC = 10 * 1024 ** 2
+MEM_BUSY_SHARE = 0.2                  # 占物理内存 20% 以上
+
+READ_CHUNK = 4096
+
+
+class FdReader:
+    """
+    以常驻文件描述符 + pread 反复读取小文件（/proc、cgroup 伪文件从偏移 0 重读即得到最新内容）
+    """
+
+    def __init__(self, max_open=MAX_OPEN_FDS):
+        self.max_open = max_open
+        self.fds = {}
+
+    def read(self, path):
+        """
+        返回文件内容（str），文件不存在 / 无权限 / 进程已退出时返回 None
+        """
+        fd = self.fds.get(path)
+        try:
+            if fd is None:
+                fd = self._open(path)
+                if len(self.fds) < self.max_open:
+                    self.fds[path] = fd
+                else:
+                    try:
+                        return self._pread_all(fd)
+                    finally:
+                        os.close(fd)
+            return self._pread_all(fd)
+        except OSError:
+            self.close(path)
+            return None
+
+    def _open(self, path):
+        """
+        打开文件；描述符耗尽（EMFILE / ENFILE）时释放一半常驻描述符、降低上限后重试一次
+        """
+        try:
+            return os.open(path, os.O_RDONLY)
+        except OSError as e:
+            if e.errno not in _FD_EXHAUSTED or not self.fds:
+                raise
+        evict = max(len(self.fds) // 2, 1)
+        for cached in list(self.fds)[:evict]:
+            self.close(cached)
+        self.max_open = max(len(self.fds), 1)
+        print(f"⚠️ 文件描述符不足，已释放 {evict} 个常驻描述符，上限调整为 {self.max_open}")
+        return os.open(path, os.O_RDONLY)
+
+    @staticmethod
+    def _pread_all(fd):
+        data = b""
+        while True:
+            chunk = os.pread(fd, READ_CHUNK, len(data))
+            data += chunk
+            if len(chunk) < READ_CHUNK:
+                return data.decode(errors="replace")
+
+    def close(self, path):
+        fd = self.fds.pop(path, None)
+        if fd is not None:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def close_prefix(self, prefix):
+        for path in [p for p in self.fds if p.startswith(prefix)]:
+            self.close(path)
+
+    def close_all(self):
+        for path in list(self.fds):
+            self.close(path)
+
+
+# -------- 解析 --------
+def parse_pid_stat(text):
+    """
+    /proc/<pid>/stat → (comm, cpu_ticks, num_threads, rss_bytes)；comm 可能含空格，以最后一个 ')' 为界
+    """
+    left, right = text.index("("), text.rindex(")")
+    fields = text[right + 2:].split()
+    utime, stime = int(fields[11]), int(fields[12])
+    return text[left + 1:right], utime + stime, int(fields[17]), int(fields[21]) * PAGE_SIZE
+
+
+def parse_keyed(text):
+    """
+    "key value" 每行一项的文件（/proc/<pid>/io、cpu.stat）→ {key: int}
+    """
+    result = {}
+    for line in text.splitlines():
+        parts = line.replace(":", " ").split()
+        if len(parts) >= 2:
+            try:
+                result[parts[0]] = int(parts[1])
+            except ValueError:
+                pass
+    return result
+
+
+def parse_io_stat(text):
+    """
+    cgroup v2 io.stat（每行一个设备："8:0 rbytes=.. wbytes=.. rios=.. wios=.."）→ 各设备合计
+    """
+    totals = {"rbytes": 0, "wbytes": 0, "rios": 0, "wios": 0}
+    for line in text.splitlines():
+        for item in line.split()[1:]:
+            key, _, value = item.partition("=")
+            if key in totals:
+                totals[key] += int(value)
+    return totals
+
+
+def parse_cgroup_path(text):
+    """
+    /proc/<pid>/cgroup 中 v2 条目（"0::/system.slice/nginx.service"）的路径
+    """
+    for line in text.splitlines():
+        if line.startswith("0::"):
+            return line[3:] or "/"
+    return "/"
+
+
+def classify_cgroup(stats, mem_total=None):
+    """
+    基于规则给 cgroup 打负载标签：cpu_bound / io_bound / memory_bound / mixed / idle
+    """
+    labels = []
+    if stats["cpu_percent"] >= CPU_BUSY_PERCENT:
+        labels.append("cpu_bound")
+    if stats["io_bytes_per_sec"] >= IO_BUSY_BYTES_PER_SEC or stats["iops"] >= IO_BUSY_IOPS:
+        labels.append("io_bound")
+    if (stats["mem_growth_per_sec"] >= MEM_GROWTH_BYTES_PER_SEC
+            or (mem_total and stats["memory_current"] >= MEM_BUSY_SHARE * mem_total)):
+        labels.append("memory_bound")
+    if not labels:
+        return "idle"
+    return labels[0] if len(labels) == 1 else "mixed"
+
+
+class ProcessScanner:
+    """
+    增量式进程 / cgroup 扫描：
+    - 每个进程的 stat / io 文件描述符常驻，只用 pread 重读
+    - 只有 /proc/stat 的 processes（累计 fork 次数）变化时才重新列出 /proc，
+      已退出的进程在读取失败时移除
+    - 进程所属 cgroup 只在发现时读取一次，cgroup 的 cpu.stat / io.stat / memory.current 同样常驻读取
+    """
+
+    def __init__(self, proc_root=PROC_ROOT, cgroup_root=CGROUP_ROOT):
+        self.proc_root = proc_root
+        self.cgroup_root = cgroup_root
+        self.reader = FdReader()
+        self.procs = {}      # pid -> {"cgroup", "ticks", "io", "has_io"}
+        self.cgroups = {}    # path -> 上次的累计计数
+        self.last_forks = None
+        self.last_time = None
+        self.rescans = 0
+        self.lock = threading.Lock()
+
+    def _fork_count(self):
+        text = self.reader.read(os.path.join(self.proc_root, "stat")) or ""
+        for line in text.splitlines():
+            if line.startswith("processes "):
+                return int(line.split()[1])
+        return None
+
+    def _rescan(self):
+        self.rescans += 1
+        try:
+            pids = {int(name) for name in os.listdir(self.proc_root) if name.isdigit()}
+        except OSError:
+            return
+        for pid in set(self.procs) - pids:
+            self._drop(pid)
+        for pid in pids - set(self.procs):
+            text = self.reader.read(os.path.join(self.proc_root, str(pid), "cgroup"))
+            self.reader.close(os.path.join(self.proc_root, str(pid), "cgroup"))
+            self.procs[pid] = {"cgroup": parse_cgroup_path(text or ""), "ticks": None,
+                               "io": None, "has_io": True}
+
+    def _drop(self, pid):
+        self.procs.pop(pid, None)
+        self.reader.close_prefix(os.path.join(self.proc_root, str(pid)) + "/")
+
+    def _read_cgroup(self, path):
+        base = os.path.join(self.cgroup_root, path.lstrip("/"))
+        cpu = parse_keyed(self.reader.read(os.path.join(base, "cpu.stat")) or "")
+        io = parse_io_stat(self.reader.read(os.path.join(base, "io.stat")) or "")
+        memory = self.reader.read(os.path.join(base, "memory.current"))
+        return {
+            "usage_usec": cpu.get("usage_usec", 0),
+            "rbytes": io["rbytes"], "wbytes": io["wbytes"],
+            "ios": io["rios"] + io["wios"],
+            "memory_current": int(memory) if memory and memory.strip().isdigit() else 0
+        }
+
+    def scan(self):
+        """
+        扫描一次，返回 (进程列表, cgroup 列表)，速率为距上次扫描的平均值（首次扫描速率为 0）
+        """
+        with self.lock:
+            now = time.monotonic()
+            dt = now - self.last_time if self.last_time else 0.0
+            self.last_time = now
+
+            forks = self._fork_count()
+            if forks is None or forks != self.last_forks:
+                self._rescan()
+                self.last_forks = forks
+
+            processes = []
+            for pid in list(self.procs):
+                info = self.procs[pid]
+                pid_dir = os.path.join(self.proc_root, str(pid))
+                text = self.reader.read(os.path.join(pid_dir, "stat"))
+                if text is None:
+                    self._drop(pid)  # 进程已退出（PID 可能已被复用，下次扫描时重新列出 /proc）
+                    self.last_forks = None
+                    continue
+                try:
+                    comm, ticks, threads, rss = parse_pid_stat(text)
+                except (ValueError, IndexError):
+                    continue
+
+                io = None
+                if info["has_io"]:
+                    io_text = self.reader.read(os.path.join(pid_dir, "io"))
+                    if io_text is None:
+                        info["has_io"] = False  # 无权限读取其他用户进程的 io，不再重试
+                    else:
+                        io = parse_keyed(io_text)
+
+                entry = {"pid": pid, "name": comm, "cgroup": info["cgroup"], "threads": threads,
+                         "rss": rss, "cpu_percent": 0.0, "read_bytes_per_sec": 0.0,
+                         "write_bytes_per_sec": 0.0}
+                if dt > 0 and info["ticks"] is not None:
+                    entry["cpu_percent"] = round(max(ticks - info["ticks"], 0) / CLOCK_TICKS / dt * 100, 2)
+                    if io is not None and info["io"] is not None:
+                        entry["read_bytes_per_sec"] = round(
+                            max(io.get("read_bytes", 0) - info["io"].get("read_bytes", 0), 0) / dt, 1)
+                        entry["write_bytes_per_sec"] = round(
+                            max(io.get("write_bytes", 0) - info["io"].get("write_bytes", 0), 0) / dt, 1)
+                info["ticks"], info["io"] = ticks, io
+                processes.append(entry)
+
+            cgroups = []
+            active = {p["cgroup"] for p in processes}
+            for path in set(self.cgroups) - active:
+                self.cgroups.pop(path, None)
+                self.reader.close_prefix(os.path.join(self.cgroup_root, path.lstrip("/")) + "/")
+            for path in active:
+                current = self._read_cgroup(path)
+                previous = self.cgroups.get(path)
+                self.cgroups[path] = current
+                stats = {"cgroup": path, "memory_current": current["memory_current"],
+                         "cpu_percent": 0.0, "io_bytes_per_sec": 0.0, "iops": 0.0, "mem_growth_per_sec": 0.0,
+                         "processes": sum(1 for p in processes if p["cgroup"] == path)}
+                if previous is not None and dt > 0:
+                    stats["cpu_percent"] = round(max(current["usage_usec"] - previous["usage_usec"], 0) / 1e4 / dt, 2)
+                    stats["io_bytes_per_sec"] = round(max(
+                        current["rbytes"] + current["wbytes"] - previous["rbytes"] - previous["wbytes"], 0) / dt, 1)
+                    stats["iops"] = round(max(current["ios"] - previous["ios"], 0) / dt, 2)
+                    stats["mem_growth_per_sec"] = round(
+                        (current["memory_current"] - previous["memory_current"]) / dt, 1)
+                cgroups.append(stats)
+            return processes, cgroups
+
+    def close(self):
+        with self.lock:
+            self.reader.close_all()
+            self.procs.clear()
+            self.cgroups.clear()
+
+
+_scanner = None
+_last = {"processes": [], "cgroups": []}
+
+
+def get_scanner():
+    global _scanner
+    if _scanner is None:
+        _scanner = ProcessScanner()
+    return _scanner
+
+
+def _mem_total():
+    try:
+        import psutil
+        return psutil.virtual_memory().total
+    except Exception:
+        return None
+
+
+def get_top_processes(n=TOP_N, by="cpu_percent"):
+    """
+    最近一次扫描中按 by（cpu_percent / rss / read_bytes_per_sec / write_bytes_per_sec）排序的前 n 个进程
+    """
+    return sorted(_last["processes"], key=lambda p: p.get(by, 0), reverse=True)[:n]
+
+
+def get_cgroup_workloads():
+    """
+    最近一次扫描中各 cgroup 的资源使用与负载标签，按 CPU 占用降序
+    """
+    return sorted(_last["cgroups"], key=lambda c: c["cpu_percent"], reverse=True)
+
+
+def get_process_info():
+    """
+    采集插件入口：扫描一次并输出固定的标量字段（保证日志 schema 稳定），
+    明细通过 get_top_processes / get_cgroup_workloads 获取
+    """
+    processes, cgroups = get_scanner().scan()
+    mem_total = _mem_total()
+    for stats in cgroups:
+        stats["workload"] = classify_cgroup(stats, mem_total)
+    _last["processes"], _last["cgroups"] = processes, cgroups
+
+    top_proc = get_top_processes(1)
+    top_cgroup = get_cgroup_workloads()[:1]
+    total_cpu = sum(c["cpu_percent"] for c in cgroups)
+    return {
+        "proc_count": len(processes),
+        "cgroup_count": len(cgroups),
+        "top_process": top_proc[0]["name"] if top_proc else "",
+        "top_process_cpu_percent": top_proc[0]["cpu_percent"] if top_proc else 0.0,
+        "top_cgroup": top_cgroup[0]["cgroup"] if top_cgroup else "",
+        "top_cgroup_workload": top_cgroup[0]["workload"] if top_cgroup else "idle",
+        "top_cgroup_cpu_share": round(top_cgroup[0]["cpu_percent"] / total_cpu, 3) if total_cpu > 0 else 0.0
+    }
+
+
+if __name__ == "__main__":
+    import json
+    get_process_info()
+    time.sleep(1)
+    print(json.dumps(get_process_info(), indent=2, ensure_ascii=False))
+    print(json.dumps(get_top_processes(), indent=2, ensure_ascii=False))
+    print(json.dumps(get_cgroup_workloads()[:TOP_N], indent=2, ensure_ascii=False))
@@ -0,0 +1,96 @@
+import time
+
+# 计数器回绕边界（部分网卡/老内核仍是 32 位计数器）
+WRAP_32 = 2 ** 32
+
+# 32 位计数器只有在上次取值已接近上限（落在最后这一段）时才按回绕处理，否则视为重置
+WRAP_WINDOW = 2 ** 30
+
+# 离线推导时，相邻两行间隔超过该值（秒）视为不连续，速率记 0
+MAX_GAP_SECONDS = 60
+
+# 每个命名空间上一次的 (单调时间戳, 计数器快照)
+_last_counters = {}
+
+
+def counter_delta(prev, cur, bits=64):
+    """
+    计算累计计数器的增量，处理 32 位回绕与计数器重置（如设备重新挂载）。
+    只有已知为 32 位（bits=32）且上次取值接近 2**32 的计数器才按回绕处理；
+    其余情况下变小一律视为重置，避免 64 位计数器重置被算成接近 4G 的增量
+    """
+    if cur >= prev:
+        return cur - prev
+    if bits == 32 and WRAP_32 - WRAP_WINDOW <= prev < WRAP_32:
+        return cur + WRAP_32 - prev  # 32 位计数器回绕
+    return cur  # 计数器被重置，从 0 开始累计
+
+
+def compute_rates(namespace, counters, now=None, wrap32=()):
+    """
+    将一组累计计数器转换为每秒速率（基于 time.monotonic 时间戳）。
+    namespace 用于区分不同来源（如 "disk"、"disk:nvme0n1"、"net:eth0"）；
+    wrap32 为已知是 32 位、可能回绕的计数器名（psutil 的磁盘/网卡计数器已自行处理回绕，无需传入）；
+    首次调用没有历史快照，返回全 0。
+    """
+    now = time.monotonic() if now is None else now
+    prev = _last_counters.get(namespace)
+    _last_counters[namespace] = (now, dict(counters))
+
+    if prev is None:
+        return {key: 0.0 for key in counters}
+
+    prev_time, prev_counters = prev
+    elapsed = now - prev_time
+    if elapsed <= 0:
+        return {key: 0.0 for key in counters}
+
+    rates = {}
+    for key, value in counters.items():
+        delta = counter_delta(prev_counters.get(key, value), value, 32 if key in wrap32 else 64)
+        rates[key] = delta / elapsed
+    return rates
+
+
+def reset_rates(namespace=None):
+    """
+    清除速率状态（namespace 为 None 时全部清除）
+    """
+    if namespace is None:
+        _last_counters.clear()
+    else:
+        _last_counters.pop(namespace, None)
+
+
+def safe_ratio(numerator, denominator):
+    return numerator / denominator if denominator > 0 else 0.0
+
+
+def add_rate_columns(df):
+    """
+    为只含累计计数器的历史日志（如 data/workload_training_data.csv）离线推导速率列，
+    按 timestamp 相邻行做差；缺少次数计数器的 IOPS 列填 0。
+    """
+    import pandas as pd
+
+    df = df.copy()
+    elapsed = pd.to_datetime(df["timestamp"]).diff().dt.total_seconds()
+    valid = (elapsed > 0) & (elapsed <= MAX_GAP_SECONDS)
+
+    columns = {
+        "read_bytes": "read_bytes_per_sec",
+        "write_bytes": "write_bytes_per_sec",
+        "bytes_sent": "bytes_sent_per_sec",
+        "bytes_recv": "bytes_recv_per_sec"
+    }
+    for counter, rate in columns.items():
+        if rate in df.columns or counter not in df.columns:
+            continue
+        delta = df[counter].diff()
+        df[rate] = (delta / elapsed).where(valid & (delta >= 0), 0.0).fillna(0.0)
+
+    for rate in ["read_iops", "write_iops"]:
+        if rate not in df.columns:
+            df[rate] = 0.0
+
+    return df
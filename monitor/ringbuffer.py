@@ -0,0 +1,233 @@
+import json
+import os
+import time
+import zlib
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+from monitor.pressure import PRESSURE_FEATURES
+
+# 默认放在共享内存文件系统上，多个进程映射同一文件即可共享数据
+SHM_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+DEFAULT_PATH = os.path.join(SHM_DIR, "os_tuner_metrics.ring")
+
+MAGIC = b"OSRB"
+VERSION = 2
+HEADER_SIZE = 64
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S4"),
+    ("version", "<u4"),
+    ("capacity", "<u8"),
+    ("n_fields", "<u4"),
+    ("fields_crc", "<u4"),
+    ("rate", "<f8"),
+    ("writer_pid", "<i8"),
+    ("write_seq", "<u8")   # 累计写入条数，最后更新（读者据此判断可读范围）
+])
+
+# 定长记录的字段（float64），timestamp 为 epoch 秒；拥塞算法名由编码列还原，
+# 其它不在此列表中的字段（进程 / cgroup 归因的字符串、分卡 GPU 指标等）写入旁路文件（见 extra_path）
+RING_FIELDS = [
+    "timestamp",
+    "cpu_percent", "load_avg_1", "load_avg_5", "load_avg_15",
+    "cpu_user", "cpu_system", "cpu_iowait", "cpu_steal", "cpu_softirq",
+    "cpu_core_max", "cpu_core_min",
+    "gpu_util", "gpu_mem_used", "gpu_temp", "gpu_power", "gpu_count",
+    "gpu_util_avg", "gpu_mem_used_total", "gpu_temp_max", "gpu_power_total",
+    "mem_total", "mem_available", "mem_used", "mem_percent",
+    "swap_total", "swap_used", "swap_percent",
+    "read_bytes", "write_bytes",
+    "read_bytes_per_sec", "write_bytes_per_sec", "read_iops", "write_iops",
+    "avg_read_size", "avg_write_size", "disk_util",
+    "bytes_sent", "bytes_recv",
+    "bytes_sent_per_sec", "bytes_recv_per_sec",
+    "packets_sent_per_sec", "packets_recv_per_sec", "avg_packet_size",
+    "net_errors_per_sec", "net_drops_per_sec",
+    "tcp_congestion_encoded",
+    "top_process_cpu_percent", "top_cgroup_cpu_share"
+] + PRESSURE_FEATURES
+
+
+def fields_crc(fields):
+    return zlib.crc32(",".join(fields).encode())
+
+
+def extra_path(path):
+    """
+    旁路文件：保存最新一条记录中不在定长字段里的键值（JSON），读者与定长记录合并
+    """
+    return f"{path}.extra.json"
+
+
+class RingBufferWriter:
+    """
+    单写者环形缓冲：每条记录是 len(fields) 个 float64，写完数据后再推进 write_seq
+    """
+
+    def __init__(self, path=DEFAULT_PATH, capacity=120, fields=RING_FIELDS, rate=0.2):
+        self.path = path
+        self.fields = list(fields)
+        self._field_set = set(self.fields)
+        self.capacity = capacity
+        size = HEADER_SIZE + capacity * len(self.fields) * 8
+
+        # 先建临时文件再原子替换：已映射旧文件的读者不会因文件被截断而 SIGBUS
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.truncate(size)
+        self._mm = np.memmap(tmp_path, dtype=np.uint8, mode="r+", shape=(size,))
+        self._header = self._mm[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)
+        self._data = self._mm[HEADER_SIZE:].view("<f8").reshape(capacity, len(self.fields))
+
+        self._header["magic"] = MAGIC
+        self._header["version"] = VERSION
+        self._header["capacity"] = capacity
+        self._header["n_fields"] = len(self.fields)
+        self._header["fields_crc"] = fields_crc(self.fields)
+        self._header["rate"] = rate
+        self._header["writer_pid"] = os.getpid()
+        self._header["write_seq"] = 0
+        os.replace(tmp_path, path)
+
+    def append(self, metrics):
+        seq = int(self._header["write_seq"][0])
+        row = self._data[seq % self.capacity]
+        for i, field in enumerate(self.fields):
+            value = metrics.get(field, np.nan)
+            try:
+                row[i] = float(value)
+            except (TypeError, ValueError):
+                row[i] = np.nan
+        if "timestamp" in self.fields:
+            row[self.fields.index("timestamp")] = time.time()
+        self._write_extra({k: v for k, v in metrics.items() if k not in self._field_set})
+        self._header["write_seq"] = seq + 1
+
+    def _write_extra(self, extra):
+        # 先写临时文件再原子替换，读者不会读到写了一半的 JSON
+        target = extra_path(self.path)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(extra, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, target)
+
+    def close(self):
+        self._header["writer_pid"] = 0
+        self._mm.flush()
+        del self._data, self._header, self._mm
+
+
+class RingBufferReader:
+    """
+    只读映射：latest()/last_seconds() 在不跨越环尾时直接返回 NumPy 视图（零拷贝），
+    跨越环尾时拼接为一份拷贝。视图会被写者持续覆盖，需要长期保存时请自行 copy()。
+    """
+
+    def __init__(self, path=DEFAULT_PATH, fields=RING_FIELDS):
+        self._mm = np.memmap(path, dtype=np.uint8, mode="r")
+        self._header = self._mm[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)
+        header = self._header[0]
+        if header["magic"] != MAGIC or header["version"] != VERSION:
+            raise ValueError(f"不是有效的指标环形缓冲文件：{path}")
+        if header["fields_crc"] != fields_crc(fields):
+            raise ValueError("环形缓冲字段布局与当前版本不一致，请重启采样守护进程")
+
+        self.fields = list(fields)
+        self.index = {field: i for i, field in enumerate(self.fields)}
+        self.path = path
+        self.capacity = int(header["capacity"])
+        self.rate = float(header["rate"])
+        self._data = self._mm[HEADER_SIZE:].view("<f8").reshape(self.capacity, len(self.fields))
+
+    @property
+    def write_seq(self):
+        return int(self._header["write_seq"][0])
+
+    @property
+    def writer_alive(self):
+        pid = int(self._header["writer_pid"][0])
+        if pid <= 0:
+            return False
+        try:
+            os.kill(pid, 0)
+            return True
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+
+    def latest(self, n):
+        """
+        返回最近 n 条记录，形状 (n, len(fields))，按时间从旧到新
+        """
+        seq = self.write_seq
+        n = min(n, seq, self.capacity)
+        if n <= 0:
+            return self._data[:0]
+        end = seq % self.capacity
+        start = (seq - n) % self.capacity
+        if start < end:
+            return self._data[start:end]
+        return np.concatenate([self._data[start:], self._data[:end]])
+
+    def last_seconds(self, seconds):
+        return self.latest(int(seconds * self.rate))
+
+    def column(self, field, n):
+        return self.latest(n)[:, self.index[field]]
+
+    def latest_record(self):
+        """
+        最新一条记录转换为 dict（与 collect_all_metrics 的键保持一致）
+        """
+        rows = self.latest(1)
+        if len(rows) == 0:
+            return None
+        return {field: float(value) for field, value in zip(self.fields, rows[0])}
+
+    def latest_extra(self):
+        """
+        最新一条记录的非定长字段（旁路文件不存在或损坏时为空）
+        """
+        try:
+            with open(extra_path(self.path)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def close(self):
+        del self._data, self._header, self._mm
+
+
+_reader = None
+
+
+def read_latest_metrics(path=DEFAULT_PATH, max_age=2.0):
+    """
+    优先从采样守护进程的环形缓冲读取最新指标；守护进程未运行或数据过旧时
+    退回直接采集（collect_all_metrics）
+    """
+    global _reader
+    from monitor.collector import collect_all_metrics, TCP_CONGESTION_CODES
+
+    try:
+        if _reader is None:
+            _reader = RingBufferReader(path)
+        record = _reader.latest_record()
+    except (OSError, ValueError):
+        _reader = None
+        record = None
+
+    if record is None or time.time() - record["timestamp"] > max_age:
+        _reader = None  # 守护进程重启后会替换文件，下次重新映射
+        return collect_all_metrics()
+
+    record = {**_reader.latest_extra(), **record}
+    codes = {code: name for name, code in TCP_CONGESTION_CODES.items()}
+    record["tcp_congestion_encoded"] = int(record["tcp_congestion_encoded"])
+    record["tcp_congestion_control"] = codes.get(record["tcp_congestion_encoded"], "unknown")
+    record["timestamp"] = datetime.fromtimestamp(record["timestamp"]).strftime("%Y-%m-%d %H:%M:%S")
+    return record
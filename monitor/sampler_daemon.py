@@ -0,0 +1,57 @@
+import argparse
+import signal
+import time
+
+from monitor.collector import collect_all_metrics
+from monitor.ringbuffer import DEFAULT_PATH, RingBufferWriter
+
+# 默认采样频率与 run.py 的默认采样间隔（5 秒）一致：cpu_percent 与各 *_per_sec 速率都是
+# “距上次采样”的平均值，模型是在 5 秒窗口的数据上训练的。提高频率会让这些特征变成
+# 更短窗口上的值（噪声更大、分布不同），需要用同一频率采集的数据重新训练模型
+DEFAULT_RATE = 0.2
+
+_running = True
+
+
+def _stop(signum, frame):
+    global _running
+    _running = False
+
+
+def run(path=DEFAULT_PATH, rate=DEFAULT_RATE, history_seconds=600):
+    """
+    后台采样守护进程：按固定频率采集指标并写入共享内存环形缓冲，
+    run.py / 仪表盘 / 评估脚本通过 RingBufferReader 读取同一数据流
+    """
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    capacity = max(int(rate * history_seconds), 1)
+    writer = RingBufferWriter(path, capacity=capacity, rate=rate)
+    interval = 1.0 / rate
+    print(f"📡 采样守护进程已启动：{rate} Hz，保留 {history_seconds} 秒 → {path}")
+
+    next_tick = time.monotonic()
+    try:
+        while _running:
+            writer.append(collect_all_metrics())
+            # 按绝对节拍调度，避免采集耗时累积成漂移
+            next_tick += interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()
+    finally:
+        writer.close()
+        print("⛔ 采样守护进程已退出")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="系统指标采样守护进程")
+    parser.add_argument("--path", default=DEFAULT_PATH, help="环形缓冲文件路径")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help="采样频率（Hz），默认与 run.py 的 5 秒采样间隔一致；改变频率后需按同一频率采集数据重新训练模型")
+    parser.add_argument("--history", type=float, default=600, help="保留的历史时长（秒）")
+    args = parser.parse_args()
+    run(args.path, args.rate, args.history)
@@ -1,10 +1,6 @@
-import subprocess
+from sysparams.sysctl import read_sysctl
 
 def get_tcp_congestion():
-    try:
-        result = subprocess.run(['sysctl', 'net.ipv4.tcp_congestion_control'], capture_output=True, text=True)
-        algo = result.stdout.strip().split('=')[1].strip()
-        return {"tcp_congestion_control": algo}
-    except:
-        return {"tcp_congestion_control": "unknown"}
-
+    # 直接读 /proc/sys（常驻 fd + 缓存），不再每次 fork sysctl 进程
+    algo = read_sysctl("net.ipv4.tcp_congestion_control", default="unknown")
+    return {"tcp_congestion_control": algo or "unknown"}
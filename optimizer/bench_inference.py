@@ -0,0 +1,62 @@
+import time
+import warnings
+import numpy as np
+import pandas as pd
+
+from monitor.rates import add_rate_columns
+import optimizer.workload_classifier as wc
+from optimizer.fast_inference import CompiledForest, metrics_to_vector, rows_to_matrix
+
+warnings.filterwarnings("ignore")
+
+
+def _timeit(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(repeat=200, batch_size=10000):
+    """
+    推理路径对比：原 pandas 单行 DataFrame 路径 vs NumPy 特征向量 vs 展开后的扁平森林
+    """
+    if wc._model is None:
+        print("❌ 模型未加载，无法测试")
+        return
+
+    model = wc._model
+    columns = wc._columns
+    compiled = CompiledForest(model)
+
+    df = add_rate_columns(pd.read_csv("data/workload_training_data.csv"))
+    rows = df.to_dict("records")
+    metrics = rows[0]
+
+    def legacy():
+        row = {feature: metrics.get(feature, 0) for feature in columns}
+        return model.predict(pd.DataFrame([row]))[0]
+
+    def numpy_sklearn():
+        return model.predict(metrics_to_vector(metrics, columns))[0]
+
+    def numpy_compiled():
+        return compiled.predict(metrics_to_vector(metrics, columns))[0]
+
+    print(f"📏 单条推理（平均 {repeat} 次）：")
+    print(f"- pandas + sklearn：{_timeit(legacy, repeat):.3f} ms")
+    print(f"- numpy + sklearn：{_timeit(numpy_sklearn, repeat):.3f} ms")
+    print(f"- numpy + 扁平森林：{_timeit(numpy_compiled, repeat):.3f} ms")
+
+    X = rows_to_matrix(df, columns)
+    X = X[np.random.default_rng(0).integers(0, len(X), batch_size)]
+    print(f"\n📦 批量推理（{batch_size} 条）：")
+    print(f"- sklearn：{_timeit(lambda: model.predict(X), 3):.1f} ms")
+    print(f"- 扁平森林：{_timeit(lambda: compiled.predict(X), 3):.1f} ms")
+
+    agree = np.mean(model.predict(X) == compiled.predict(X))
+    print(f"\n✅ 两条路径预测一致率：{agree:.4%}")
+
+
+if __name__ == "__main__":
+    main()
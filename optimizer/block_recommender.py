@@ -0,0 +1,109 @@
+from sysparams.io import get_io_params
+
+# 平均请求大小阈值（字节）：大于 SEQ_IO_SIZE 视为顺序大块 IO，小于 SMALL_IO_SIZE 视为随机小 IO
+SEQ_IO_SIZE = 128 * 1024
+SMALL_IO_SIZE = 32 * 1024
+
+# 低于该 IOPS 的设备视为空闲，不做调整
+MIN_ACTIVE_IOPS = 5
+
+# 读写都超过该占比时视为读写混合
+MIXED_RW_SHARE = 0.2
+
+# 加深队列的目标深度；带调度器时 nr_requests 不能超过内核的 MAX_SCHED_RQ（旧内核为 256）
+DEEP_NR_REQUESTS = 256
+
+
+def io_pattern(dev_metrics):
+    """
+    由设备的速率指标（monitor.io_runtime.get_disk_io_per_device 的单个设备）判断 IO 模式：
+    idle / sequential / random / mixed_random
+    """
+    read_iops = dev_metrics.get("read_iops", 0)
+    write_iops = dev_metrics.get("write_iops", 0)
+    iops = read_iops + write_iops
+    if iops < MIN_ACTIVE_IOPS:
+        return "idle"
+    total_bytes = dev_metrics.get("read_bytes_per_sec", 0) + dev_metrics.get("write_bytes_per_sec", 0)
+    avg_size = total_bytes / iops
+    if avg_size >= SEQ_IO_SIZE:
+        return "sequential"
+    if avg_size < SMALL_IO_SIZE and min(read_iops, write_iops) / iops >= MIXED_RW_SHARE:
+        return "mixed_random"
+    return "random"
+
+
+def _pick(preferred, available):
+    for scheduler in preferred:
+        if scheduler in available:
+            return scheduler
+    return None
+
+
+def recommend_device(info, pattern):
+    """
+    单个设备的规则推荐，返回目标值 {param: value}（未包含的参数保持不变）：
+    - 调度器：多队列 SSD/NVMe 用 none（随机读写混合时用 kyber 控制延迟），
+      单队列 SSD 用 mq-deadline，机械盘顺序 IO 用 mq-deadline、随机 IO 用 bfq；
+      dm/md 等栈式设备不设置调度器（由下层设备负责）
+    - read_ahead_kb：顺序读放大预读，随机读收小预读
+    - nr_requests：顺序 / 高并发时加深队列；目标调度器为 none 时上限是硬件队列深度，
+      切换调度器时内核会重置该值，因此 none 下不设置，其余调度器按切换后的上限取值
+    - max_sectors_kb：顺序大块 IO 时放宽到硬件上限（不超过 1024）
+    """
+    target = {}
+    available = info.get("available_schedulers", [])
+    rotational = info.get("rotational") == 1
+    multi_queue = isinstance(info.get("nr_hw_queues"), int) and info["nr_hw_queues"] > 1
+
+    if available:
+        if rotational:
+            preferred = ["mq-deadline"] if pattern == "sequential" else ["bfq", "mq-deadline"]
+        elif multi_queue or info.get("type") == "nvme":
+            preferred = ["kyber", "none"] if pattern == "mixed_random" else ["none"]
+        else:
+            preferred = ["mq-deadline", "none"]
+        scheduler = _pick(preferred, available)
+        if scheduler:
+            target["scheduler"] = scheduler
+
+    if pattern == "sequential":
+        target["read_ahead_kb"] = 4096 if rotational else 1024
+        max_hw = info.get("max_hw_sectors_kb")
+        if isinstance(max_hw, int):
+            target["max_sectors_kb"] = min(max_hw, 1024)
+    elif pattern in ("random", "mixed_random"):
+        target["read_ahead_kb"] = 128 if rotational else 16
+
+    nr_requests = info.get("nr_requests")
+    scheduler = target.get("scheduler", info.get("scheduler"))
+    switching = scheduler != info.get("scheduler")
+    if isinstance(nr_requests, int) and info.get("type") not in ("dm", "md") and scheduler != "none":
+        if pattern == "sequential" or (pattern != "idle" and not rotational):
+            # 切换调度器后旧深度（可能是 none 下的硬件深度）不再适用
+            target["nr_requests"] = DEEP_NR_REQUESTS if switching else max(nr_requests, DEEP_NR_REQUESTS)
+        elif rotational and pattern != "idle":
+            target["nr_requests"] = 128
+
+    return target
+
+
+def recommend_block_params(device_metrics, io_params=None, block_path=None):
+    """
+    按各设备观察到的 IO 模式推荐队列参数，只返回与当前值不同的项：{dev: {param: value}}。
+    device_metrics 为 {dev: 速率指标}，空闲设备不做调整
+    """
+    io_params = io_params if io_params is not None else get_io_params(block_path)
+    recommendations = {}
+    for dev, info in io_params.items():
+        pattern = io_pattern(device_metrics.get(dev, {}))
+        if pattern == "idle":
+            continue
+        target = recommend_device(info, pattern)
+        changes = {param: value for param, value in target.items() if info.get(param) != value}
+        # 调度器变化会重置 nr_requests，即使目标值等于当前值也要在切换后重新写入
+        if "scheduler" in changes and "nr_requests" in target:
+            changes["nr_requests"] = target["nr_requests"]
+        if changes:
+            recommendations[dev] = changes
+    return recommendations
@@ -0,0 +1,110 @@
+import numpy as np
+
+
+def metrics_to_vector(metrics, columns):
+    """
+    按预先确定的特征顺序把一条指标 dict 转成 1×F 数组（缺失/非数值填 0）
+    """
+    row = np.zeros((1, len(columns)), dtype=np.float64)
+    for i, feature in enumerate(columns):
+        value = metrics.get(feature, 0)
+        try:
+            row[0, i] = float(value)
+        except (TypeError, ValueError):
+            pass
+    return row
+
+
+def rows_to_matrix(rows, columns):
+    """
+    批量转换：rows 可以是 DataFrame 或 dict 列表，返回 N×F 数组（用于回放日志）
+    """
+    if hasattr(rows, "reindex"):
+        import pandas as pd
+        frame = rows.reindex(columns=list(columns), fill_value=0)
+        frame = frame.apply(pd.to_numeric, errors="coerce").fillna(0)
+        return frame.to_numpy(dtype=np.float64)
+    if not rows:
+        return np.zeros((0, len(columns)), dtype=np.float64)
+    return np.vstack([metrics_to_vector(row, columns) for row in rows])
+
+
+class CompiledForest:
+    """
+    把 scikit-learn 的随机森林（分类/回归）展开成扁平数组：
+    feature / threshold / left / right / value 按树首尾拼接，叶子节点的左右孩子指向自身。
+    推理时对 (样本 × 树) 的节点下标矩阵做 max_depth 次向量化跳转，没有逐节点的 Python 分支。
+    """
+
+    def __init__(self, model):
+        estimators = model.estimators_
+        self.is_classifier = hasattr(model, "classes_")
+        self.classes_ = getattr(model, "classes_", None)
+        self.n_features = model.n_features_in_
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            n = tree.node_count
+            node_ids = np.arange(n)
+            leaf = tree.children_left == -1
+
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, 0.0, tree.threshold))
+            lefts.append(np.where(leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(leaf, node_ids, tree.children_right) + offset)
+
+            if self.is_classifier:
+                value = tree.value[:, 0, :].astype(np.float64)
+                totals = value.sum(axis=1, keepdims=True)
+                totals[totals == 0] = 1.0
+                values.append(value / totals)  # 兼容计数/比例两种存储方式
+            else:
+                values.append(tree.value[:, 0, 0].astype(np.float64))
+
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        self.feature = np.concatenate(features).astype(np.intp)
+        self.threshold = np.concatenate(thresholds)
+        self.left = np.concatenate(lefts).astype(np.intp)
+        self.right = np.concatenate(rights).astype(np.intp)
+        self.value = np.concatenate(values)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = max_depth
+
+    def _leaves(self, X):
+        # 与 scikit-learn 一致：输入先转 float32 再与 float64 阈值比较
+        X = np.asarray(X, dtype=np.float32)
+        n = X.shape[0]
+        nodes = np.broadcast_to(self.roots, (n, len(self.roots))).copy()
+        sample_idx = np.arange(n)[:, None]
+        for _ in range(self.max_depth):
+            go_left = X[sample_idx, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        return self.value[self._leaves(X)].mean(axis=1)
+
+    def predict(self, X):
+        if self.is_classifier:
+            return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+        return self.value[self._leaves(X)].mean(axis=1)
+
+
+def compile_forest(model):
+    """
+    模型为随机森林时返回 CompiledForest，否则返回 None（调用方退回原生 predict）
+    """
+    if not hasattr(model, "estimators_") or not hasattr(model, "n_features_in_"):
+        return None
+    try:
+        if not all(hasattr(e, "tree_") for e in model.estimators_):
+            return None
+        return CompiledForest(model)
+    except Exception:
+        return None
@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+
+import joblib
+import psutil
+
+# 默认模型路径
+MODEL_PATHS = {
+    "perf": "optimizer/perf_model.pkl",
+    "param": "optimizer/param_model.pkl",
+    "workload": "optimizer/workload_model.pkl"
+}
+
+# 两次检查模型文件是否更新的最小间隔（秒），避免每次推理都 stat
+RELOAD_CHECK_INTERVAL = 2.0
+
+# 以内存映射方式加载 joblib 中的 numpy 数组：多个进程共享同一份页缓存
+MMAP_MODE = "r"
+
+_lock = threading.Lock()
+_entries = {}
+
+
+def register_model(name, path):
+    """
+    注册（或修改）模型路径；已加载的旧模型会在下次 get_model 时按新路径重新加载
+    """
+    with _lock:
+        entry = _entries.get(name)
+        if entry is None or entry["path"] != path:
+            _entries[name] = {
+                "path": path,
+                "model": None,
+                "signature": None,
+                "checked_at": 0.0,
+                "load_time_ms": 0.0,
+                "file_size_bytes": 0,
+                "rss_delta_bytes": 0,
+                "loaded_at": None,
+                "reloads": 0,
+                "missing_reported": False
+            }
+
+
+def _file_signature(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+
+def _load(name, entry, signature):
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    start = time.perf_counter()
+    try:
+        model = joblib.load(entry["path"], mmap_mode=MMAP_MODE)
+    except Exception as e:
+        print(f"❌ 模型加载失败（{name}）：{e}")
+        return
+
+    reloaded = entry["model"] is not None
+    entry.update({
+        "model": model,
+        "signature": signature,
+        "load_time_ms": round((time.perf_counter() - start) * 1000, 2),
+        "file_size_bytes": signature[2],
+        "rss_delta_bytes": max(process.memory_info().rss - rss_before, 0),
+        "loaded_at": time.time(),
+        "reloads": entry["reloads"] + (1 if reloaded else 0),
+        "missing_reported": False
+    })
+    action = "重新加载" if reloaded else "加载"
+    print(f"✅ 模型{action}成功（{name}，{entry['load_time_ms']} ms）")
+
+
+def get_model(name, check_reload=True):
+    """
+    获取模型：首次调用时加载，此后复用；模型文件 mtime 变化时自动热重载。
+    文件不存在时返回 None（若之前已加载则继续使用旧模型）
+    """
+    if name not in _entries:
+        register_model(name, MODEL_PATHS[name])
+
+    with _lock:
+        entry = _entries[name]
+        now = time.monotonic()
+        if entry["model"] is not None and (
+                not check_reload or now - entry["checked_at"] < RELOAD_CHECK_INTERVAL):
+            return entry["model"]
+        entry["checked_at"] = now
+
+        try:
+            signature = _file_signature(entry["path"])
+        except OSError:
+            if not entry["missing_reported"]:
+                print(f"❌ 模型文件未找到：{entry['path']}")
+                entry["missing_reported"] = True
+            return entry["model"]
+
+        if signature != entry["signature"]:
+            _load(name, entry, signature)
+        return entry["model"]
+
+
+def save_model(model, path):
+    """
+    原子地写入模型文件：先写同目录临时文件再 os.replace。
+    正在运行的进程通过文件签名（mtime / inode）发现新模型并热重载，不会读到写了一半的文件；
+    已按旧文件 mmap 的数组在旧 inode 上继续有效
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def reload_model(name):
+    """
+    强制重新加载（忽略检查间隔与 mtime）
+    """
+    if name not in _entries:
+        register_model(name, MODEL_PATHS[name])
+    with _lock:
+        entry = _entries[name]
+        entry["signature"] = None
+        entry["checked_at"] = 0.0
+    return get_model(name)
+
+
+def get_model_stats():
+    """
+    返回各模型的加载耗时、文件大小、加载引起的 RSS 增量、加载时间与热重载次数
+    """
+    with _lock:
+        return {
+            name: {key: value for key, value in entry.items() if key not in ("model", "signature")}
+            for name, entry in _entries.items()
+        }
@@ -0,0 +1,398 @@
+"""
+增量 / 在线模型训练：持续消费监控日志的新增行，热启动随机森林并在留出集上验证，通过后原子替换模型文件
+
+    python -m optimizer.online_training --model workload --interval 60
+    python -m optimizer.online_training --model perf --log data/sysparam_training_data.csv --once
+
+- LogTailer 按字节偏移增量读取 CSV 日志，跟踪 inode，日志轮转时先读完旧文件的剩余部分
+- 每轮把新行按比例分入留出集与训练缓冲（伪标签行单独缓冲，不进留出集也不进蓄水池）；缓冲攒够 min_new_rows 行后，
+  用“新行 + 历史样本蓄水池”热启动（warm_start）追加 trees_per_update 棵树，超过 max_trees 时淘汰最早的树，模型大小恒定；
+  伪标签行按 max_pseudo_share 下采样，只用一次
+- 留出集（真实标签）不少于 min_holdout 行、候选模型得分有效且不低于当前模型 - tolerance 才会上线；
+  写入走 model_registry.save_model，正在运行的调优进程由注册表按文件签名热重载，无需重启
+- 负载分类日志中的 workload_type 来自在线识别（伪标签），只使用 workload_confidence ≥ min_confidence 的行；
+  没有该列的日志（如 generate_training_data 采集的数据）视为真实标签
+"""
+import argparse
+import copy
+import io
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.metrics import accuracy_score, r2_score
+from sklearn.pipeline import Pipeline
+
+from optimizer import model_registry
+from optimizer import train_workload_model as workload_trainer
+from optimizer import train_param_model as perf_trainer
+
+STATE_DIR = "optimizer/online_training"
+
+# 各模型的数据整理方式、特征 / 目标列、评分函数与默认数据源
+MODEL_SPECS = {
+    "workload": {
+        "model_path": workload_trainer.MODEL_PATH,
+        "log_path": "system_metrics_log_with_workload.csv",
+        "seed_path": workload_trainer.DATA_PATH,
+        "select": None,
+        "prepare": workload_trainer.prepare_workload_data,
+        "build": workload_trainer.build_workload_model,
+        "features": workload_trainer.FEATURES,
+        "target": "workload_type",
+        "score": accuracy_score,
+        "classifier": True
+    },
+    "perf": {
+        "model_path": perf_trainer.MODEL_PATH,
+        "log_path": perf_trainer.DATA_PATH,
+        "seed_path": None,
+        # 增量数据不允许退回旧版本分数，否则历史样本中会混入两种 perf_score
+        "select": lambda df: perf_trainer.select_score_version(df, fallback=False),
+        "prepare": perf_trainer.prepare_perf_data,
+        "build": perf_trainer.build_perf_model,
+        "features": perf_trainer.FEATURE_COLS_FULL,
+        "target": perf_trainer.TARGET_COL,
+        "score": r2_score,
+        "classifier": False
+    }
+}
+
+
+class LogTailer:
+    """
+    增量读取 CSV 日志的新增完整行（半行留到下次）。状态为 {"inode", "offset", "header"}，可持久化
+    """
+
+    def __init__(self, path, state=None):
+        self.path = path
+        state = state or {}
+        self.inode = state.get("inode")
+        self.offset = state.get("offset", 0)
+        self.header = state.get("header")
+
+    def state(self):
+        return {"inode": self.inode, "offset": self.offset, "header": self.header}
+
+    def _find_rotated(self):
+        """
+        MetricLogWriter 轮转时把活动文件重命名为 <stem>-<时间戳>.csv，按 inode 找回
+        """
+        stem, ext = os.path.splitext(self.path)
+        directory = os.path.dirname(self.path) or "."
+        prefix = os.path.basename(stem) + "-"
+        for name in sorted(os.listdir(directory)):
+            if name.startswith(prefix) and name.endswith(ext):
+                candidate = os.path.join(directory, name)
+                if os.stat(candidate).st_ino == self.inode:
+                    return candidate
+        return None
+
+    def _read_from(self, path):
+        with open(path, "rb") as f:
+            if self.offset == 0 or self.header is None:
+                header = f.readline()
+                if not header.endswith(b"\n"):
+                    return None
+                self.header = header.decode("utf-8")
+                self.offset = len(header)
+            f.seek(self.offset)
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1
+        if end == 0:
+            return None
+        self.offset += end
+        return pd.read_csv(io.StringIO(self.header + chunk[:end].decode("utf-8")))
+
+    def read_new(self):
+        frames = []
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            st = None
+
+        if self.inode is not None and (st is None or st.st_ino != self.inode):
+            rotated = self._find_rotated()
+            if rotated is not None:
+                frames.append(self._read_from(rotated))
+            self.inode, self.offset, self.header = None, 0, None
+
+        if st is not None:
+            if self.inode is None:
+                self.inode, self.offset = st.st_ino, 0
+            elif st.st_size < self.offset:
+                self.offset, self.header = 0, None  # 文件被截断重写
+            frames.append(self._read_from(self.path))
+
+        frames = [frame for frame in frames if frame is not None and not frame.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def _final_estimator(model):
+    return model.steps[-1][1] if isinstance(model, Pipeline) else model
+
+
+def warm_start_fit(model, X, y, trees_per_update=10, max_trees=200):
+    """
+    在已训练的随机森林上追加 trees_per_update 棵用新数据训练的树（Pipeline 只更新最后一步，
+    预处理沿用原有拟合结果），超过 max_trees 时丢弃最早的树
+    """
+    forest = _final_estimator(model)
+    X_fit = model[:-1].transform(X) if isinstance(model, Pipeline) else X
+    forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + trees_per_update)
+    forest.fit(X_fit, y)
+    if len(forest.estimators_) > max_trees:
+        forest.estimators_ = forest.estimators_[-max_trees:]
+        forest.set_params(n_estimators=max_trees)
+    forest.set_params(warm_start=False)
+    return model
+
+
+class OnlineTrainer:
+    def __init__(self, kind="workload", log_path=None, model_path=None, state_dir=STATE_DIR,
+                 holdout_fraction=0.2, max_holdout=2000, reservoir_size=5000, min_new_rows=50,
+                 min_holdout=30, trees_per_update=10, max_trees=200, tolerance=0.01,
+                 min_confidence=0.8, max_pseudo_share=0.2, seed=42):
+        self.kind = kind
+        self.spec = MODEL_SPECS[kind]
+        self.log_path = log_path or self.spec["log_path"]
+        self.model_path = model_path or self.spec["model_path"]
+        self.holdout_fraction = holdout_fraction
+        self.max_holdout = max_holdout
+        self.reservoir_size = reservoir_size
+        self.min_new_rows = min_new_rows
+        self.min_holdout = min_holdout
+        self.trees_per_update = trees_per_update
+        self.max_trees = max_trees
+        self.tolerance = tolerance
+        self.min_confidence = min_confidence
+        self.max_pseudo_share = max_pseudo_share
+        self.rng = np.random.default_rng(seed)
+
+        os.makedirs(state_dir, exist_ok=True)
+        self.state_path = os.path.join(state_dir, f"{kind}_state.json")
+        self.data_paths = {name: os.path.join(state_dir, f"{kind}_{name}.csv")
+                           for name in ("pending", "pseudo", "reservoir", "holdout")}
+
+        state = self._load_state()
+        self.tailer = LogTailer(self.log_path, state.get("tailer"))
+        self.seen = state.get("seen", 0)  # 进入过蓄水池的样本总数（蓄水池采样用）
+        self.frames = {name: self._load_frame(path) for name, path in self.data_paths.items()}
+        if not state and self.spec["seed_path"] and os.path.exists(self.spec["seed_path"]):
+            # 首次运行：用离线训练数据初始化蓄水池与留出集
+            self._add_rows(self._labelled(pd.read_csv(self.spec["seed_path"])), to_pending=False, truth=True)
+            print(f"🌱 已用 {self.spec['seed_path']} 初始化历史样本")
+
+    # -------- 状态持久化 --------
+    def _load_state(self):
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _load_frame(path):
+        return pd.read_csv(path) if os.path.exists(path) and os.path.getsize(path) > 0 else pd.DataFrame()
+
+    def save_state(self):
+        for name, path in self.data_paths.items():
+            tmp_path = f"{path}.tmp"
+            self.frames[name].to_csv(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"tailer": self.tailer.state(), "seen": self.seen, "saved_at": time.time()}, f)
+        os.replace(tmp_path, self.state_path)
+
+    # -------- 数据 --------
+    def _labelled(self, df):
+        """
+        整理新行并只保留可用作训练标签的行
+        """
+        target = self.spec["target"]
+        if df.empty or target not in df.columns:
+            return pd.DataFrame()
+        if self.spec["classifier"]:
+            df = df[df[target].notna() & (df[target] != "unknown")]
+            if "workload_confidence" in df.columns:
+                confidence = pd.to_numeric(df["workload_confidence"], errors="coerce").fillna(0)
+                df = df[confidence >= self.min_confidence]
+        else:
+            df = df[pd.to_numeric(df[target], errors="coerce").notna()]
+        if self.spec["select"] is not None:
+            df = self.spec["select"](df)
+        if df.empty:
+            return pd.DataFrame()
+        df = self.spec["prepare"](df.reset_index(drop=True))
+        return df[self.spec["features"] + [target]]
+
+    def _add_rows(self, df, to_pending=True, truth=True):
+        """
+        新行按比例分入留出集；truth=False（在线识别的伪标签）时只进伪标签缓冲，
+        否则模型会在自己给出的标签上验证、在蓄水池里不断累积，错误会自我强化
+        """
+        if df.empty:
+            return
+        if not truth:
+            self.frames["pseudo"] = pd.concat([self.frames["pseudo"], df], ignore_index=True)
+            return
+        mask = self.rng.random(len(df)) < self.holdout_fraction
+        holdout = pd.concat([self.frames["holdout"], df[mask]], ignore_index=True)
+        self.frames["holdout"] = holdout.tail(self.max_holdout).reset_index(drop=True)
+        rest = df[~mask]
+        if to_pending:
+            self.frames["pending"] = pd.concat([self.frames["pending"], rest], ignore_index=True)
+        else:
+            self._add_to_reservoir(rest)
+
+    def _add_to_reservoir(self, df):
+        """
+        蓄水池采样：历史样本均匀保留 reservoir_size 行，热启动时与新行一起训练，
+        避免新树只见过最近的负载类型
+        """
+        reservoir = self.frames["reservoir"]
+        appended, replaced = [], []
+        for i in range(len(df)):
+            self.seen += 1
+            if len(reservoir) + len(appended) < self.reservoir_size:
+                appended.append(i)
+            else:
+                j = int(self.rng.integers(self.seen))
+                if j < self.reservoir_size:
+                    replaced.append((i, j))
+        if appended:
+            reservoir = pd.concat([reservoir, df.iloc[appended]], ignore_index=True)
+        for i, j in replaced:
+            reservoir.iloc[j] = df.iloc[i]
+        self.frames["reservoir"] = reservoir
+
+    # -------- 训练 --------
+    def evaluate(self, model, df):
+        if model is None or df.empty:
+            return float("nan")
+        target = self.spec["target"]
+        try:
+            return float(self.spec["score"](df[target], model.predict(df[self.spec["features"]])))
+        except ValueError:
+            return float("nan")
+
+    def _can_warm_start(self, current, y):
+        """
+        只有特征列与类别集合都和当前模型一致时才能追加树
+        """
+        if current is None or not hasattr(_final_estimator(current), "estimators_"):
+            return False
+        if list(getattr(current, "feature_names_in_", [])) != list(self.spec["features"]):
+            return False
+        return not self.spec["classifier"] or set(_final_estimator(current).classes_) == set(y.unique())
+
+    def _pseudo_sample(self, pseudo, truth_rows):
+        """
+        伪标签行最多占训练批次的 max_pseudo_share，超出部分随机丢弃
+        """
+        share = min(max(self.max_pseudo_share, 0.0), 0.99)
+        limit = int(truth_rows * share / (1 - share))
+        if len(pseudo) <= limit:
+            return pseudo
+        keep = self.rng.choice(len(pseudo), size=limit, replace=False)
+        return pseudo.iloc[np.sort(keep)]
+
+    def _candidate(self, current, train_df):
+        X, y = train_df[self.spec["features"]], train_df[self.spec["target"]]
+        if self._can_warm_start(current, y):
+            return warm_start_fit(copy.deepcopy(current), X, y, self.trees_per_update, self.max_trees), "warm_start"
+        # 没有可热启动的模型，或出现了新的类别：在全部历史样本上重训
+        model = self.spec["build"]()
+        model.fit(X, y)
+        return model, "refit"
+
+    def update(self):
+        """
+        执行一轮：读取新行 → 攒够后训练候选模型 → 留出集验证 → 通过则原子替换。
+        返回本轮结果 dict（未训练时为 None）
+        """
+        raw = self.tailer.read_new()
+        # 带 workload_confidence 列的分类日志，标签来自在线识别
+        pseudo = self.spec["classifier"] and "workload_confidence" in raw.columns
+        self._add_rows(self._labelled(raw), truth=not pseudo)
+        pending, pseudo = self.frames["pending"], self.frames["pseudo"]
+        if len(pending) + len(pseudo) < self.min_new_rows:
+            self.save_state()
+            return None
+
+        truth_df = pd.concat([pending, self.frames["reservoir"]], ignore_index=True)
+        pseudo_used = self._pseudo_sample(pseudo, len(truth_df))
+        if truth_df.empty:
+            print(f"⚠️ {self.kind} 没有真实标签样本，不训练（丢弃 {len(pseudo)} 行伪标签）")
+            self.frames["pseudo"] = pseudo.iloc[:0]
+            self.save_state()
+            return None
+
+        current = joblib.load(self.model_path) if os.path.exists(self.model_path) else None
+        train_df = pd.concat([truth_df, pseudo_used], ignore_index=True)
+        candidate, mode = self._candidate(current, train_df)
+
+        holdout = self.frames["holdout"]
+        new_score = self.evaluate(candidate, holdout)
+        old_score = self.evaluate(current, holdout)
+        if len(holdout) < self.min_holdout:
+            # 没有足够的真实标签验证，任何候选模型都不上线（包括还没有模型时）
+            accepted, reason = False, f"留出集样本不足（{len(holdout)}/{self.min_holdout}）"
+        elif not np.isfinite(new_score):
+            accepted, reason = False, "候选模型无法在留出集上评估"
+        elif np.isnan(old_score):
+            accepted, reason = True, "当前模型无法评估"
+        else:
+            accepted = new_score >= old_score - self.tolerance
+            reason = "通过留出集验证" if accepted else "留出集得分下降"
+
+        if accepted:
+            model_registry.save_model(candidate, self.model_path)
+            print(f"✅ {self.kind} 模型已更新（{mode}，留出集 {old_score:.4f} → {new_score:.4f}）")
+        else:
+            print(f"⚠️ {self.kind} 候选模型未上线：{reason}（{old_score:.4f} → {new_score:.4f}）")
+
+        # 无论是否上线，已消费的真实标签行都进入历史样本；伪标签行只用这一次
+        self._add_to_reservoir(pending)
+        self.frames["pending"] = pending.iloc[:0]
+        self.frames["pseudo"] = pseudo.iloc[:0]
+        self.save_state()
+        return {"mode": mode, "rows": len(pending), "pseudo_rows": len(pseudo_used), "accepted": accepted,
+                "reason": reason, "old_score": old_score, "new_score": new_score}
+
+    def run(self, interval=60.0):
+        print(f"🔁 在线训练已启动：{self.kind} ← {self.log_path}")
+        try:
+            while True:
+                self.update()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print("⛔ 用户终止，保存在线训练状态...")
+            self.save_state()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="从监控日志增量训练模型")
+    parser.add_argument("--model", default="workload", choices=list(MODEL_SPECS), help="要更新的模型")
+    parser.add_argument("--log", default=None, help="增量读取的 CSV 日志（默认按模型类型）")
+    parser.add_argument("--model-path", default=None, help="模型文件（默认按模型类型）")
+    parser.add_argument("--state-dir", default=STATE_DIR, help="读取偏移、历史样本与留出集的保存目录")
+    parser.add_argument("--interval", type=float, default=60, help="轮询间隔（秒）")
+    parser.add_argument("--min-rows", type=int, default=50, help="触发一次训练所需的新行数")
+    parser.add_argument("--trees", type=int, default=10, help="每次热启动追加的树数")
+    parser.add_argument("--max-trees", type=int, default=200, help="森林规模上限")
+    parser.add_argument("--max-pseudo-share", type=float, default=0.2, help="伪标签行在训练批次中的最大占比")
+    parser.add_argument("--once", action="store_true", help="只执行一轮")
+    args = parser.parse_args()
+
+    trainer = OnlineTrainer(args.model, args.log, args.model_path, args.state_dir,
+                            min_new_rows=args.min_rows, trees_per_update=args.trees, max_trees=args.max_trees,
+                            max_pseudo_share=args.max_pseudo_share)
+    if args.once:
+        trainer.update()
+    else:
+        trainer.run(args.interval)
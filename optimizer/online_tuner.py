@@ -0,0 +1,311 @@
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+from optimizer.param_space import SAFE_PARAM_SPACE, PARAM_NAMES, decode, encode, is_safe_config
+from optimizer.param_search import sample_configs
+from controller.param_applier import apply_sysctl_params
+
+# 状态文件（重启后继续之前的探索结果）
+STATE_PATH = "optimizer/online_tuner_state.json"
+
+# 默认奖励：各负载类型下“有效吞吐 - 延迟/等待代价”的指标加权和（对窗口均值计算）。
+# 注意：这些只是 CPU 利用率、IO 字节数、PSI 等系统级代理指标，并不等于业务吞吐/延迟
+# （例如 cpu_user 升高也可能是参数让程序做了更多无用功）。有业务吞吐/延迟数据时
+# 应通过 reward_fn 传入，或用 run.py --reward-file 读取业务侧写出的奖励值
+REWARD_PROFILES = {
+    "cpu_bound": {"cpu_user": 1.0, "cpu_system": -0.5, "cpu_iowait": -0.5, "cpu_steal": -0.5,
+                  "psi_cpu_some": -0.5},
+    "io_bound": {"read_bytes_per_sec": 1e-6, "write_bytes_per_sec": 1e-6,
+                 "read_iops": 1e-3, "write_iops": 1e-3, "cpu_iowait": -0.2, "psi_io_some": -0.2},
+    "memory_bound": {"cpu_user": 1.0, "swap_percent": -1.0, "cpu_iowait": -0.5,
+                     "psi_memory_some": -1.0, "pgmajfault_per_sec": -0.01},
+    "mixed": {"cpu_user": 0.5, "read_bytes_per_sec": 1e-6, "write_bytes_per_sec": 1e-6,
+              "bytes_sent_per_sec": 1e-6, "bytes_recv_per_sec": 1e-6, "cpu_iowait": -0.2},
+    "network_bound": {"bytes_sent_per_sec": 1e-6, "bytes_recv_per_sec": 1e-6,
+                      "packets_sent_per_sec": 1e-4, "packets_recv_per_sec": 1e-4,
+                      "net_errors_per_sec": -1.0, "net_drops_per_sec": -1.0}
+}
+
+
+def _mean(window, key):
+    values = []
+    for metrics in window:
+        try:
+            values.append(float(metrics.get(key, 0)))
+        except (TypeError, ValueError):
+            pass
+    return sum(values) / len(values) if values else 0.0
+
+
+def default_reward(workload, window):
+    """
+    按 REWARD_PROFILES 计算一个测量窗口的奖励（越大越好）
+    """
+    profile = REWARD_PROFILES.get(workload, REWARD_PROFILES["mixed"])
+    return sum(weight * _mean(window, key) for key, weight in profile.items())
+
+
+def read_reward_file(path):
+    """
+    读取业务侧写出的奖励值（文件最后一个非空行，如每秒请求数或负的 p99 延迟）；读不到时返回 None
+    """
+    try:
+        with open(path) as f:
+            lines = [line.strip() for line in f if line.strip()]
+        return float(lines[-1]) if lines else None
+    except (OSError, ValueError):
+        return None
+
+
+def measured_reward(key="reward", lower_is_better=False):
+    """
+    以每个采样点上的实测值 metrics[key] 为奖励（窗口均值）；lower_is_better 用于延迟类指标
+    """
+    sign = -1.0 if lower_is_better else 1.0
+
+    def reward(workload, window):
+        values = [m[key] for m in window if m.get(key) is not None]
+        return sign * sum(values) / len(values) if values else float("nan")
+    return reward
+
+
+class OnlineTuner:
+    """
+    闭环在线调优：每种负载类型维护一组候选参数（arm），用折扣 Thompson 采样选择下一组参数，
+    应用后先等待 settle_seconds 让系统稳定，再在 window_seconds 内采集指标计算实测奖励。
+    - discount < 1 时历史观测按轮次衰减，负载特征漂移后旧结论会逐渐失效
+    - 每 refresh_every 轮用当前最优参数的邻域样本替换后验最差的 arm，逐步逼近更优区域
+    - 只在 SAFE_PARAM_SPACE 中探索：参数空间中标记为 unsafe 的取值（如 vm.overcommit_memory=2、
+      net.ipv4.tcp_syncookies=0）不会在线试探；状态文件中残留的此类 arm 加载时替换为安全样本
+    - 传入 guard（TuningGuard）时每组参数都经守护应用：相对上一组确认良好的参数出现显著退化即自动回滚，
+      守护未就绪（观察期 / 基线未采满）时等待一个稳定期后重试
+    """
+
+    def __init__(self, state_path=STATE_PATH, reward_fn=None, n_arms=8, discount=0.95,
+                 settle_seconds=10.0, window_seconds=30.0, refresh_every=10,
+                 space=SAFE_PARAM_SPACE, apply_fn=apply_sysctl_params, guard=None, seed=None):
+        self.state_path = state_path
+        self.reward_fn = reward_fn or default_reward
+        self.n_arms = n_arms
+        self.discount = discount
+        self.settle_seconds = settle_seconds
+        self.window_seconds = window_seconds
+        self.refresh_every = refresh_every
+        self.space = space
+        self.apply_fn = apply_fn
+        self.guard = guard
+        self.rng = np.random.default_rng(seed)
+
+        self.bandits = {}
+        self.workload = None
+        self.current_arm = None
+        self.applied_at = 0.0
+        self.window = []
+        self.load_state()
+
+    # -------- 状态持久化 --------
+    def load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path) as f:
+                self.bandits = json.load(f).get("bandits", {})
+            print(f"✅ 已恢复在线调优状态：{self.state_path}")
+            self._replace_unsafe_arms()
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 在线调优状态读取失败，重新开始：{e}")
+            self.bandits = {}
+
+    def save_state(self):
+        if not self.state_path:
+            return
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"bandits": self.bandits, "saved_at": time.time()}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.state_path)
+
+    def _replace_unsafe_arms(self):
+        """
+        旧版本在全空间中采样的 arm 可能含 unsafe 取值：换成安全空间中的新样本（观测清零）
+        """
+        replaced = 0
+        for bandit in self.bandits.values():
+            for i, arm in enumerate(bandit["arms"]):
+                if not is_safe_config(arm["config"]):
+                    seed = int(self.rng.integers(2 ** 31))
+                    bandit["arms"][i] = self._new_arm(sample_configs("random", 1, seed, self.space)[0])
+                    replaced += 1
+        if replaced:
+            print(f"⚠️ {replaced} 组含不安全取值的候选参数已替换")
+
+    # -------- 老虎机 --------
+    @staticmethod
+    def _new_arm(config):
+        return {"config": config, "n": 0.0, "sum": 0.0, "sum_sq": 0.0, "pulls": 0}
+
+    def _bandit(self, workload):
+        bandit = self.bandits.get(workload)
+        if bandit is None:
+            seed = int(self.rng.integers(2 ** 31))
+            configs = sample_configs("lhs", self.n_arms, seed, self.space)
+            bandit = {"arms": [self._new_arm(c) for c in configs], "rounds": 0}
+            self.bandits[workload] = bandit
+        return bandit
+
+    @staticmethod
+    def _noise_std(bandit):
+        """
+        所有 arm 的合并观测方差（观测太少时退回奖励量级的 10%）
+        """
+        n = sum(arm["n"] for arm in bandit["arms"])
+        if n < 2:
+            return 1.0
+        total = sum(arm["sum"] for arm in bandit["arms"])
+        total_sq = sum(arm["sum_sq"] for arm in bandit["arms"])
+        mean = total / n
+        var = max(total_sq / n - mean ** 2, 0.0)
+        return max(math.sqrt(var), 0.1 * abs(mean), 1e-6)
+
+    def posterior(self, workload):
+        """
+        返回各 arm 的 (后验均值, 后验标准差)；以全部观测均值作为先验均值、一次虚拟观测作为先验强度
+        """
+        bandit = self._bandit(workload)
+        n_total = sum(arm["n"] for arm in bandit["arms"])
+        prior_mean = sum(arm["sum"] for arm in bandit["arms"]) / n_total if n_total > 0 else 0.0
+        sigma = self._noise_std(bandit)
+        result = []
+        for arm in bandit["arms"]:
+            n = arm["n"] + 1.0
+            mean = (arm["sum"] + prior_mean) / n
+            result.append((mean, sigma / math.sqrt(n)))
+        return result
+
+    def select_arm(self, workload, exclude=()):
+        """
+        Thompson 采样：从每个 arm 的后验中抽一个样本，取最大者；从未尝试过的 arm 优先。
+        exclude 中的 arm 本轮不参与选择（全部被排除时返回 None）
+        """
+        bandit = self._bandit(workload)
+        candidates = [i for i in range(len(bandit["arms"])) if i not in exclude]
+        if not candidates:
+            return None
+        untried = [i for i in candidates if bandit["arms"][i]["pulls"] == 0]
+        if untried:
+            return int(self.rng.choice(untried))
+        posterior = self.posterior(workload)
+        draws = {i: self.rng.normal(*posterior[i]) for i in candidates}
+        return max(draws, key=draws.get)
+
+    def update(self, workload, arm_index, reward):
+        bandit = self._bandit(workload)
+        for arm in bandit["arms"]:
+            arm["n"] *= self.discount
+            arm["sum"] *= self.discount
+            arm["sum_sq"] *= self.discount
+        arm = bandit["arms"][arm_index]
+        arm["n"] += 1.0
+        arm["sum"] += reward
+        arm["sum_sq"] += reward ** 2
+        arm["pulls"] += 1
+        bandit["rounds"] += 1
+        if self.refresh_every and bandit["rounds"] % self.refresh_every == 0:
+            self._refresh_arms(workload)
+        self.save_state()
+
+    def _neighbour(self, config, scale=0.1):
+        unit = encode(config, self.space) + self.rng.normal(0.0, scale, len(self.space))
+        return decode(np.clip(unit, 0.0, 1.0 - 1e-9), self.space)
+
+    def _refresh_arms(self, workload):
+        bandit = self._bandit(workload)
+        means = [mean for mean, _ in self.posterior(workload)]
+        best, worst = int(np.argmax(means)), int(np.argmin(means))
+        if best == worst or worst == self.current_arm:
+            return
+        existing = {tuple(arm["config"].values()) for arm in bandit["arms"]}
+        candidate = self._neighbour(bandit["arms"][best]["config"])
+        if tuple(candidate.values()) not in existing:
+            bandit["arms"][worst] = self._new_arm(candidate)
+
+    def best_config(self, workload):
+        """
+        当前后验均值最高（且至少测量过一次）的参数组合
+        """
+        bandit = self._bandit(workload)
+        tried = [(mean, i) for i, (mean, _) in enumerate(self.posterior(workload))
+                 if bandit["arms"][i]["pulls"] > 0]
+        if not tried:
+            return None
+        return dict(bandit["arms"][max(tried)[1]]["config"])
+
+    # -------- 闭环 --------
+    def _apply_next(self, workload, now):
+        """
+        选择并应用下一组参数。应用失败视为暂时性错误（本机没有的参数已由 applier 跳过）：
+        本轮改试其它 arm，失败的 arm 保留在状态中，下次仍可被选中
+        """
+        self.workload, self.current_arm = workload, None
+        self.applied_at, self.window = now, []
+        failed = set()
+        while True:
+            index = self.select_arm(workload, exclude=failed)
+            if index is None:
+                print(f"⚠️ 在线调优（{workload}）：本轮所有候选参数均应用失败，稍后重试")
+                return
+            arm = self._bandit(workload)["arms"][index]
+            params = {k: arm["config"][k] for k in PARAM_NAMES if k in arm["config"]}
+            if self.guard is not None:
+                report = self.guard.apply(params, workload, source="online", queue=False)
+            else:
+                report = self.apply_fn(params)
+            if report.get("deferred"):
+                print(f"⏳ 在线调优（{workload}）：等待变更守护就绪后再尝试新参数")
+                return
+            if report.get("success", False):
+                self.current_arm = index
+                print(f"🎰 在线调优（{workload}）：尝试第 {index} 组参数，已测 {arm['pulls']} 次")
+                return
+            print(f"⚠️ 第 {index} 组参数本轮应用失败，改试其它候选")
+            failed.add(index)
+
+    def step(self, metrics, workload, now=None):
+        """
+        每个采样周期调用一次。负载类型变化时放弃当前窗口并切换到对应的老虎机；
+        测量窗口结束时计算奖励、更新后验并应用下一组参数。返回本周期得到的奖励（无则 None）
+        """
+        now = time.monotonic() if now is None else now
+        if workload != self.workload:
+            print(f"\n⚙️ 在线调优切换负载：{self.workload} ➜ {workload}")
+            self._apply_next(workload, now)
+            return None
+        if self.current_arm is None:
+            # 上一轮全部应用失败：隔一个稳定期再重试
+            if now - self.applied_at >= self.settle_seconds:
+                self._apply_next(workload, now)
+            return None
+
+        elapsed = now - self.applied_at
+        if elapsed < self.settle_seconds:
+            return None
+        self.window.append(metrics)
+        if elapsed < self.settle_seconds + self.window_seconds:
+            return None
+
+        reward = float(self.reward_fn(workload, self.window))
+        if not math.isfinite(reward):
+            # 窗口内没有拿到实测奖励：不更新后验，直接换下一组参数
+            print(f"⚠️ 在线调优（{workload}）：第 {self.current_arm} 组参数没有有效奖励，跳过本轮")
+            self._apply_next(workload, now)
+            return None
+        self.update(workload, self.current_arm, reward)
+        print(f"📏 在线调优（{workload}）：第 {self.current_arm} 组参数奖励 {reward:.4f}")
+        self._apply_next(workload, now)
+        return reward
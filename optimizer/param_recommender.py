@@ -1,7 +1,9 @@
-import os
-import joblib
 import pandas as pd
 
+from optimizer import model_registry
+from monitor.pressure import PRESSURE_FEATURES
+from optimizer.param_space import features_to_config, clamp_config, validate_config, supported_config
+
 # 模型路径
 MODEL_PATH = "optimizer/param_model.pkl"
 
@@ -10,65 +12,61 @@ FEATURE_COLUMNS = [
     "cpu_percent", "load_avg_1", "load_avg_5", "load_avg_15",
     "gpu_util", "gpu_mem_used", "gpu_temp", "gpu_power",
     "mem_percent", "mem_used", "swap_used", "swap_percent",
-    "read_bytes", "write_bytes", "bytes_sent", "bytes_recv",
-    "tcp_congestion_encoded", "workload_type"
+    "read_bytes_per_sec", "write_bytes_per_sec", "read_iops", "write_iops",
+    "bytes_sent_per_sec", "bytes_recv_per_sec",
+    "tcp_congestion_encoded"
+] + PRESSURE_FEATURES + ["workload_type"]
+
+# 早期模型（无 target_columns_ 属性）的 8 个输出依次对应的参数特征列
+LEGACY_TARGET_COLUMNS = [
+    "sched_latency_ns", "sched_migration_cost_ns", "swappiness", "dirty_ratio",
+    "dirty_expire_centisecs", "tcp_rmem_min", "tcp_rmem_default", "tcp_rmem_max"
 ]
 
-# 加载模型（一次性）
-_model = None
-_encoder = None
+# 模型由注册表统一加载（一次性加载，文件更新后自动热重载）
+model_registry.register_model("param", MODEL_PATH)
 
 def load_model():
-    global _model
-    if not os.path.exists(MODEL_PATH):
-        print("❌ 参数推荐模型文件不存在：", MODEL_PATH)
-        return
-    try:
-        _model = joblib.load(MODEL_PATH)
-        print("✅ 参数推荐模型加载成功")
-    except Exception as e:
-        print(f"❌ 模型加载失败：{e}")
-        _model = None
+    return model_registry.get_model("param")
 
 # 初始化加载
 load_model()
 
 def recommend_params(metrics: dict) -> dict:
     """
-    根据当前系统状态（metrics）推理推荐的参数组合
+    根据当前系统状态（metrics）推理推荐的参数组合：
+    模型的每个输出对应一个参数特征列，按参数空间解码、去掉本机不存在的参数，
+    再吸附到合法取值并满足跨参数约束
     """
-    if _model is None:
+    model = load_model()
+    if model is None:
         print("⚠️ 模型未加载，返回空参数组合")
         return {}
 
-
-    # 构造输入特征行（缺失填 0，确保为 float 类型）
+    # 构造输入特征行（缺失填 0），优先使用模型训练时记录的特征顺序；
+    # workload_type 保留原始文本格式（如 cpu_bound）
+    columns = getattr(model, "feature_names_in_", FEATURE_COLUMNS)
     row = {}
-    for feature in FEATURE_COLUMNS:
+    for feature in columns:
         val = metrics.get(feature, 0)
+        if feature == "workload_type":
+            row[feature] = val
+            continue
         try:
             row[feature] = float(val)
-        except:
+        except (TypeError, ValueError):
             row[feature] = 0.0
 
-    # 构造输入特征行（缺失填 0）
-    row = {feature: metrics.get(feature, 0) for feature in FEATURE_COLUMNS}
-
-    # workload_type 保留原始文本格式（如 cpu_bound）
-    df = pd.DataFrame([row])
-
     try:
-        preds = _model.predict(df)[0]
-        # 解析预测值为参数字典
-        param_dict = {
-            "kernel.sched_latency_ns": int(preds[0]),
-            "kernel.sched_migration_cost_ns": int(preds[1]),
-            "vm.swappiness": int(preds[2]),
-            "vm.dirty_ratio": int(preds[3]),
-            "vm.dirty_expire_centisecs": int(preds[4]),
-            "net.ipv4.tcp_rmem": f"{int(preds[5])} {int(preds[6])} {int(preds[7])}"
-        }
-        return param_dict
+        preds = model.predict(pd.DataFrame([row]))[0]
     except Exception as e:
         print(f"❌ 推理失败：{e}")
         return {}
+
+    targets = getattr(model, "target_columns_", LEGACY_TARGET_COLUMNS)
+    params = clamp_config(supported_config(features_to_config(dict(zip(targets, preds)))))
+    errors = validate_config(params)
+    if errors:
+        print(f"⚠️ 推荐参数未通过校验：{errors}")
+        return {}
+    return params
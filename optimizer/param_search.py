@@ -0,0 +1,133 @@
+import math
+import warnings
+import numpy as np
+
+from optimizer.param_space import PARAM_SPACE, decode, encode
+
+STRATEGIES = ["random", "lhs", "sobol", "bayes"]
+
+
+# -------- 单位超立方体采样 --------
+def random_unit(n, d, rng):
+    return rng.random((n, d))
+
+
+def lhs_unit(n, d, rng):
+    """
+    拉丁超立方：每一维都被均匀切成 n 段，每段恰好落一个样本
+    """
+    samples = np.empty((n, d))
+    for j in range(d):
+        samples[:, j] = (rng.permutation(n) + rng.random(n)) / n
+    return samples
+
+
+def sobol_unit(n, d, rng):
+    """
+    Sobol 低差异序列（scipy 不可用时退回拉丁超立方）
+    """
+    try:
+        from scipy.stats import qmc
+    except ImportError:
+        return lhs_unit(n, d, rng)
+    sampler = qmc.Sobol(d, scramble=True, seed=rng)
+    return sampler.random_base2(max(math.ceil(math.log2(max(n, 2))), 1))[:n]
+
+
+_SAMPLERS = {
+    "random": random_unit,
+    "lhs": lhs_unit,
+    "sobol": sobol_unit
+}
+
+
+def sample_unit(strategy="lhs", budget=100, seed=42, space=PARAM_SPACE):
+    """
+    返回 budget×d 的单位坐标矩阵（配合 unit_to_features 做大规模向量化打分）
+    """
+    if strategy not in _SAMPLERS:
+        raise ValueError(f"不支持的采样策略：{strategy}（可选 {list(_SAMPLERS)}）")
+    return _SAMPLERS[strategy](budget, len(space), np.random.default_rng(seed))
+
+
+def sample_configs(strategy="lhs", budget=100, seed=42, space=PARAM_SPACE):
+    """
+    按策略在整个参数空间中抽取 budget 组参数（去重后返回）。
+    取代原先截取笛卡尔网格前 100 组、只改变最后几维的做法。
+    """
+    if strategy not in _SAMPLERS:
+        raise ValueError(f"不支持的采样策略：{strategy}（可选 {list(_SAMPLERS)}，bayes 请使用 bayes_optimize）")
+    rng = np.random.default_rng(seed)
+    configs, seen = [], set()
+    for row in _SAMPLERS[strategy](budget, len(space), rng):
+        config = decode(row, space)
+        key = tuple(config.values())
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+
+# -------- 贝叶斯优化 --------
+def _expected_improvement(mu, sigma, best, xi=0.01):
+    from scipy.stats import norm
+    sigma = np.maximum(sigma, 1e-9)
+    z = (mu - best - xi) / sigma
+    return (mu - best - xi) * norm.cdf(z) + sigma * norm.pdf(z)
+
+
+def bayes_optimize(objective, budget=50, n_init=10, n_candidates=2000, seed=42, space=PARAM_SPACE):
+    """
+    高斯过程 + 期望提升（EI）的贝叶斯优化，objective(config) 返回越大越好的分数。
+    先用拉丁超立方做 n_init 次初始评估，之后每轮在随机候选池中选 EI 最大的点，
+    总评估次数固定为 budget。返回按分数降序的 [(config, score), ...]
+    """
+    from sklearn.gaussian_process import GaussianProcessRegressor
+    from sklearn.gaussian_process.kernels import Matern, WhiteKernel
+
+    rng = np.random.default_rng(seed)
+    d = len(space)
+    history = []
+    seen = set()
+
+    def evaluate(config):
+        key = tuple(config.values())
+        if key in seen:
+            return
+        seen.add(key)
+        history.append((config, float(objective(config))))
+
+    for config in sample_configs("lhs", min(n_init, budget), seed, space):
+        evaluate(config)
+
+    gp = GaussianProcessRegressor(
+        kernel=Matern(nu=2.5) + WhiteKernel(),
+        normalize_y=True,
+        random_state=seed
+    )
+    while len(history) < budget:
+        X = np.array([encode(config, space) for config, _ in history])
+        y = np.array([score for _, score in history])
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # 噪声项收敛到下界的提示不影响选点
+            gp.fit(X, y)
+
+        candidates = [decode(row, space) for row in lhs_unit(n_candidates, d, rng)]
+        candidates = [c for c in candidates if tuple(c.values()) not in seen]
+        if not candidates:
+            break
+        mu, sigma = gp.predict(np.array([encode(c, space) for c in candidates]), return_std=True)
+        evaluate(candidates[int(np.argmax(_expected_improvement(mu, sigma, y.max())))])
+
+    return sorted(history, key=lambda item: item[1], reverse=True)
+
+
+def search(objective, strategy="lhs", budget=100, seed=42, space=PARAM_SPACE):
+    """
+    统一入口：在固定评估预算内搜索，返回按分数降序的 [(config, score), ...]
+    """
+    if strategy == "bayes":
+        return bayes_optimize(objective, budget=budget, seed=seed, space=space)
+    history = [(config, float(objective(config)))
+               for config in sample_configs(strategy, budget, seed, space)]
+    return sorted(history, key=lambda item: item[1], reverse=True)
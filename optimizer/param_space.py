@@ -0,0 +1,261 @@
+import os
+
+import numpy as np
+
+from sysparams.sysctl import sysctl_path
+
+# 可调参数空间（声明式定义），同时驱动采样、训练目标、推理解码、裁剪校验与应用：
+# - name：sysctl 名称，对应 /proc/sys 下的路径（读写都经 sysctl_path 解析）
+# - type="int"：low..high 之间按 step 取值
+# - type="choice"：在给定的候选值中选择（开关、枚举、tcp_rmem 这类三元组）
+# - unit：仅用于展示
+# - unsafe：在生产主机上在线试探有风险的取值（离线扫描可用，在线调优排除，见 safe_space）
+PARAM_SPACE = [
+    # kernel params
+    {"name": "kernel.sched_latency_ns", "type": "int", "low": 16000000, "high": 32000000, "step": 1000000, "unit": "ns"},
+    {"name": "kernel.sched_migration_cost_ns", "type": "int", "low": 250000, "high": 750000, "step": 50000, "unit": "ns"},
+    {"name": "kernel.sched_wakeup_granularity_ns", "type": "int", "low": 2000000, "high": 6000000, "step": 500000, "unit": "ns"},
+    {"name": "kernel.sched_min_granularity_ns", "type": "int", "low": 1500000, "high": 4500000, "step": 500000, "unit": "ns"},
+    {"name": "kernel.sched_child_runs_first", "type": "choice", "choices": [0, 1]},
+    {"name": "kernel.sched_autogroup_enabled", "type": "choice", "choices": [0, 1]},
+    {"name": "kernel.sched_rr_timeslice_ms", "type": "int", "low": 50, "high": 150, "step": 10, "unit": "ms"},
+
+    # vm params
+    {"name": "vm.swappiness", "type": "int", "low": 30, "high": 90, "step": 5},
+    {"name": "vm.dirty_ratio", "type": "int", "low": 5, "high": 15, "step": 1, "unit": "%"},
+    {"name": "vm.dirty_background_ratio", "type": "int", "low": 3, "high": 7, "step": 1, "unit": "%"},
+    {"name": "vm.dirty_expire_centisecs", "type": "int", "low": 1500, "high": 4500, "step": 500, "unit": "cs"},
+    {"name": "vm.dirty_writeback_centisecs", "type": "int", "low": 250, "high": 750, "step": 50, "unit": "cs"},
+    {"name": "vm.min_free_kbytes", "type": "int", "low": 45056, "high": 135168, "step": 11264, "unit": "KB"},
+    # 2 = 严格记账，配合较低的 overcommit_ratio 会让正常进程 ENOMEM / fork 失败
+    {"name": "vm.overcommit_memory", "type": "choice", "choices": [0, 1, 2], "unsafe": [2]},
+    {"name": "vm.overcommit_ratio", "type": "int", "low": 25, "high": 75, "step": 5, "unit": "%"},
+    {"name": "vm.vfs_cache_pressure", "type": "int", "low": 100, "high": 300, "step": 50},
+
+    # net params
+    {"name": "net.core.somaxconn", "type": "choice", "choices": [2048, 4096, 8192]},
+    {"name": "net.ipv4.tcp_fin_timeout", "type": "int", "low": 30, "high": 90, "step": 10, "unit": "s"},
+    {"name": "net.ipv4.tcp_tw_reuse", "type": "choice", "choices": [0, 1, 2]},
+    # 0 = 关闭 SYN cookie，SYN 洪泛时半连接队列会被打满
+    {"name": "net.ipv4.tcp_syncookies", "type": "choice", "choices": [0, 1], "unsafe": [0]},
+    {"name": "net.ipv4.tcp_max_syn_backlog", "type": "choice", "choices": [2048, 4096, 8192]},
+    {"name": "net.ipv4.tcp_rmem", "type": "choice", "choices": [
+        "4096 65536 2097152",
+        "4096 131072 6291456",
+        "8192 262144 8388608"
+    ]},
+    {"name": "net.ipv4.tcp_wmem", "type": "choice", "choices": [
+        "4096 8192 2097152",
+        "4096 16384 4194304",
+        "8192 32768 8388608"
+    ]},
+]
+
+PARAM_NAMES = [param["name"] for param in PARAM_SPACE]
+
+# 跨参数约束：(较小的参数, 较大的参数)，裁剪时把较小者压到较大者之下
+ORDERED_PAIRS = [
+    ("vm.dirty_background_ratio", "vm.dirty_ratio"),
+    ("kernel.sched_min_granularity_ns", "kernel.sched_latency_ns"),
+]
+
+
+def param_path(param, root=None):
+    """
+    参数对应的文件路径（与 apply_sysctl_params 写入的路径一致）
+    """
+    return sysctl_path(param["name"], root)
+
+
+def supported_config(config, space=PARAM_SPACE, root=None):
+    """
+    只保留本机内核存在的参数（如 5.13 起 kernel.sched_* 移入 debugfs，/proc/sys 下不再有）；
+    不在参数空间内的参数原样保留
+    """
+    by_name = {param["name"]: param for param in space}
+    return {name: value for name, value in config.items()
+            if name not in by_name or os.path.exists(param_path(by_name[name], root))}
+
+
+def safe_space(space=PARAM_SPACE):
+    """
+    去掉 unsafe 取值后的参数空间，用于在生产主机上直接应用的在线探索
+    """
+    safe = []
+    for param in space:
+        unsafe = param.get("unsafe")
+        if unsafe:
+            param = {**param, "choices": [v for v in param["choices"] if v not in unsafe]}
+        safe.append(param)
+    return safe
+
+
+SAFE_PARAM_SPACE = safe_space()
+
+
+def is_safe_config(config, space=PARAM_SPACE):
+    """
+    参数组合中是否不含任何 unsafe 取值
+    """
+    unsafe = {param["name"]: param.get("unsafe", []) for param in space}
+    return all(value not in unsafe.get(name, []) for name, value in config.items())
+
+
+def param_values(param):
+    """
+    参数的全部离散取值
+    """
+    if param["type"] == "choice":
+        return list(param["choices"])
+    return list(range(param["low"], param["high"] + 1, param["step"]))
+
+
+def space_size(space=PARAM_SPACE):
+    size = 1
+    for param in space:
+        size *= len(param_values(param))
+    return size
+
+
+def decode(unit_row, space=PARAM_SPACE):
+    """
+    [0,1)^d 中的一点映射为参数组合：每一维按取值个数等分
+    """
+    config = {}
+    for u, param in zip(unit_row, space):
+        values = param_values(param)
+        index = min(int(u * len(values)), len(values) - 1)
+        config[param["name"]] = values[index]
+    return config
+
+
+def encode(config, space=PARAM_SPACE):
+    """
+    参数组合映射回 [0,1)^d（取各维所在区间的中点），供贝叶斯优化建模
+    """
+    row = np.zeros(len(space))
+    for i, param in enumerate(space):
+        values = param_values(param)
+        value = config[param["name"]]
+        index = values.index(value) if value in values else 0
+        row[i] = (index + 0.5) / len(values)
+    return row
+
+
+# -------- 参数 → 模型特征 --------
+def param_feature_names(param):
+    """
+    参数在训练数据中的特征列名（与 collect_all_sysparams 的输出一致）：
+    kernel.sched_latency_ns → sched_latency_ns，net.ipv4.tcp_rmem → tcp_rmem_min/default/max
+    """
+    short = param["name"].split(".")[-1]
+    if param["type"] == "choice" and isinstance(param["choices"][0], str):
+        return [f"{short}_min", f"{short}_default", f"{short}_max"]
+    return [short]
+
+
+PARAM_FEATURE_COLUMNS = [column for param in PARAM_SPACE for column in param_feature_names(param)]
+
+
+def _feature_table(param):
+    """
+    参数每个取值对应的特征值，形状 (取值个数, 特征列数)
+    """
+    values = param_values(param)
+    if isinstance(values[0], str):
+        return np.array([[float(v) for v in value.split()] for value in values])
+    return np.array(values, dtype=np.float64)[:, None]
+
+
+def unit_to_features(unit_matrix, space=PARAM_SPACE):
+    """
+    向量化版 decode：N×d 的单位坐标直接查表得到 N×P 的参数特征矩阵，不构造任何 dict
+    """
+    blocks = []
+    for j, param in enumerate(space):
+        table = _feature_table(param)
+        index = np.minimum((unit_matrix[:, j] * len(table)).astype(np.intp), len(table) - 1)
+        blocks.append(table[index])
+    return np.hstack(blocks)
+
+
+# -------- 模型输出 → 参数 --------
+def _nearest_index(table, target):
+    """
+    在取值表中找与目标特征最近的取值（各列按取值范围归一化，三元组按整体距离）
+    """
+    scale = np.maximum(table.max(axis=0) - table.min(axis=0), 1.0)
+    return int(np.argmin((((table - target) / scale) ** 2).sum(axis=1)))
+
+
+def features_to_config(features, space=PARAM_SPACE):
+    """
+    unit_to_features 的逆过程：模型输出的参数特征（dict 或按 PARAM_FEATURE_COLUMNS 排列的向量）
+    逐参数吸附到最近的合法取值，越界的值自然被裁剪到 low / high
+    """
+    if not isinstance(features, dict):
+        columns = [column for param in space for column in param_feature_names(param)]
+        features = dict(zip(columns, features))
+
+    config = {}
+    for param in space:
+        columns = param_feature_names(param)
+        if not all(column in features for column in columns):
+            continue
+        target = np.array([float(features[column]) for column in columns])
+        config[param["name"]] = param_values(param)[_nearest_index(_feature_table(param), target)]
+    return config
+
+
+def clamp_value(param, value):
+    """
+    单个参数值吸附到最近的合法取值
+    """
+    if isinstance(value, str):
+        target = np.array([float(v) for v in value.split()])
+    else:
+        target = np.array([float(value)])
+    table = _feature_table(param)
+    if table.shape[1] != len(target):
+        raise ValueError(f"{param['name']} 的取值格式不正确：{value}")
+    return param_values(param)[_nearest_index(table, target)]
+
+
+def clamp_config(config, space=PARAM_SPACE):
+    """
+    裁剪整组参数：每个值吸附到合法取值，再满足 ORDERED_PAIRS 的大小约束；
+    不在参数空间内的参数原样保留
+    """
+    by_name = {param["name"]: param for param in space}
+    clamped = {name: clamp_value(by_name[name], value) if name in by_name else value
+               for name, value in config.items()}
+
+    for low_name, high_name in ORDERED_PAIRS:
+        if low_name in clamped and high_name in clamped and clamped[low_name] >= clamped[high_name]:
+            allowed = [v for v in param_values(by_name[low_name]) if v < clamped[high_name]]
+            if allowed:
+                clamped[low_name] = allowed[-1]
+    return clamped
+
+
+def validate_config(config, space=PARAM_SPACE):
+    """
+    校验参数组合，返回问题列表（空列表表示合法）
+    """
+    by_name = {param["name"]: param for param in space}
+    errors = []
+    for name, value in config.items():
+        param = by_name.get(name)
+        if param is None:
+            errors.append(f"{name} 不在参数空间内")
+        elif value not in param_values(param):
+            errors.append(f"{name}={value} 不是合法取值")
+
+    for low_name, high_name in ORDERED_PAIRS:
+        if low_name in config and high_name in config:
+            try:
+                if float(config[low_name]) >= float(config[high_name]):
+                    errors.append(f"{low_name} 必须小于 {high_name}")
+            except (TypeError, ValueError):
+                pass
+    return errors
@@ -1,68 +1,129 @@
-import os
-import joblib
+import numpy as np
 import pandas as pd
-from itertools import islice
 
-from monitor.collector import collect_all_metrics
-from sysparams.collector import collect_all_sysparams
-from data.generate_param_sysdata import generate_param_grid  # 如果你把该函数放那里
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
-from sklearn.compose import ColumnTransformer
+from monitor.ringbuffer import read_latest_metrics
+from optimizer.param_space import PARAM_SPACE, PARAM_FEATURE_COLUMNS, decode, unit_to_features
+from optimizer.param_search import sample_unit
+from optimizer.model_registry import get_model
+from monitor.pressure import PRESSURE_FEATURES
 
-def predict_best_param(workload_type="cpu_bound", top_k=5):
-    # === 加载评分模型 ===
-    model_path = "optimizer/perf_model.pkl"
-    if not os.path.exists(model_path):
-        print("❌ 找不到模型文件：", model_path)
-        return
+# 系统状态特征列（与 train_param_model.py 保持一致）
+STATE_FEATURE_COLUMNS = [
+    "cpu_percent", "load_avg_1", "load_avg_5", "load_avg_15",
+    "gpu_util", "gpu_mem_used", "gpu_temp", "gpu_power",
+    "mem_percent", "mem_used", "swap_used", "swap_percent",
+    "read_bytes_per_sec", "write_bytes_per_sec", "read_iops", "write_iops",
+    "bytes_sent_per_sec", "bytes_recv_per_sec",
+    "tcp_congestion_encoded", "exec_time", "cpu_avg"
+] + PRESSURE_FEATURES
 
-    model = joblib.load(model_path)
-    print("✅ 已加载评分模型")
+# 单次送入模型的最大候选数（控制峰值内存）
+SCORE_CHUNK_SIZE = 200000
+
+
+def _state_value(metrics, column):
+    try:
+        return float(metrics.get(column, 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _fast_pipeline_parts(model):
+    """
+    训练脚本产出的 Pipeline（StandardScaler + OneHotEncoder + 随机森林）可以绕开 DataFrame：
+    数值列直接做仿射变换，workload_type 的独热编码对所有候选相同，只算一次
+    """
+    steps = getattr(model, "named_steps", {})
+    preprocessor, regressor = steps.get("preprocessor"), steps.get("regressor")
+    if preprocessor is None or regressor is None:
+        return None
+    transformers = {name: (trans, cols) for name, trans, cols in preprocessor.transformers_}
+    if set(transformers) - {"num", "cat", "remainder"} or "num" not in transformers:
+        return None
+    scaler, num_cols = transformers["num"]
+    if not hasattr(scaler, "mean_"):
+        return None
+    return preprocessor, regressor, scaler, list(num_cols)
+
+
+def score_candidates(model, metrics, workload_type, unit_matrix, space=PARAM_SPACE):
+    """
+    向量化打分：当前系统状态广播到 N 行，与 N 组参数特征拼成输入矩阵，返回 N 个预测分数
+    """
+    n = len(unit_matrix)
+    param_matrix = unit_to_features(unit_matrix, space)
+    param_index = {col: i for i, col in enumerate(PARAM_FEATURE_COLUMNS)}
+
+    def column_values(col):
+        if col in param_index:
+            return param_matrix[:, param_index[col]]
+        return np.full(n, _state_value(metrics, col))
+
+    parts = _fast_pipeline_parts(model)
+    if parts is not None:
+        preprocessor, regressor, scaler, num_cols = parts
+        numeric = np.column_stack([column_values(col) for col in num_cols])
+        numeric = (numeric - scaler.mean_) / scaler.scale_
+        # 其余列（独热编码）在所有候选上取值相同：用第一行算一次再广播
+        first = {col: [column_values(col)[0]] for col in num_cols}
+        first["workload_type"] = [workload_type]
+        tail = preprocessor.transform(pd.DataFrame(first))[:, len(num_cols):]
+        if hasattr(tail, "toarray"):
+            tail = tail.toarray()
+        X = np.hstack([numeric, np.broadcast_to(tail, (n, tail.shape[1]))])
+        predict = regressor.predict
+    else:
+        columns = list(getattr(model, "feature_names_in_",
+                               STATE_FEATURE_COLUMNS + PARAM_FEATURE_COLUMNS + ["workload_type"]))
+        data = {col: column_values(col) for col in columns if col != "workload_type"}
+        if "workload_type" in columns:
+            data["workload_type"] = np.full(n, workload_type, dtype=object)
+        X = pd.DataFrame(data)[columns]
+        predict = model.predict
+
+    scores = np.empty(n)
+    for start in range(0, n, SCORE_CHUNK_SIZE):
+        scores[start:start + SCORE_CHUNK_SIZE] = predict(X[start:start + SCORE_CHUNK_SIZE])
+    return scores
+
+
+def top_k_indices(scores, k):
+    """
+    argpartition 取前 k（O(N)），只对这 k 个排序
+    """
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def predict_best_param(workload_type="cpu_bound", top_k=5, strategy="random", budget=100000, seed=42):
+    # === 加载评分模型（注册表缓存，文件更新后自动热重载）===
+    model = get_model("perf")
+    if model is None:
+        return pd.DataFrame()
 
     # === 采集当前系统状态 ===
-    system_metrics = collect_all_metrics()
-    system_metrics["workload_type"] = workload_type
+    system_metrics = read_latest_metrics()
     system_metrics["exec_time"] = 0   # placeholder
     system_metrics["cpu_avg"] = system_metrics.get("cpu_percent", 0)  # 用当前值代替平均
 
-    # 提取特征列
-    feature_cols = [
-        "cpu_percent", "load_avg_1", "load_avg_5", "load_avg_15",
-        "gpu_util", "gpu_mem_used", "gpu_temp", "gpu_power",
-        "mem_percent", "mem_used", "swap_used", "swap_percent",
-        "read_bytes", "write_bytes", "bytes_sent", "bytes_recv",
-        "tcp_congestion_encoded", "exec_time", "cpu_avg", "workload_type"
-    ]
-
-    base_row = {col: system_metrics.get(col, 0) for col in feature_cols}
-    
-    # === 构造每个参数组合对应的输入样本 ===
-    #param_grid = list(generate_param_grid())
-    param_grid = list(islice(generate_param_grid(), 100))  # 只用前 100 组
-    candidates = []
-
-    for param in param_grid:
-        row = base_row.copy()
-        row.update(param)  # 这些不会被模型用到，但可以存储
-        candidates.append(row)
-
-    df = pd.DataFrame(candidates)
-
-    # 模型中只会使用特征列
-    X_input = df[feature_cols]
-
-    # === 预测性能分数 ===
-    y_pred = model.predict(X_input)
-    df["predicted_perf_score"] = y_pred
-
-    # === 排序并选出最优参数组合 ===
-    df_sorted = df.sort_values(by="predicted_perf_score", ascending=False)
-    top_df = df_sorted.head(top_k)
-
-    print(f"\n🏆 Top {top_k} 参数组合推荐（按预测性能分数降序）:")
-    for idx, row in top_df.iterrows():
+    # === 在整个参数空间中抽取 budget 组候选并向量化打分 ===
+    unit_matrix = sample_unit(strategy, budget, seed)
+    scores = score_candidates(model, system_metrics, workload_type, unit_matrix)
+
+    # === 选出最优参数组合（只解码前 k 个）===
+    top = top_k_indices(scores, top_k)
+    rows = []
+    for i in top:
+        row = decode(unit_matrix[i])
+        row["predicted_perf_score"] = float(scores[i])
+        rows.append(row)
+    top_df = pd.DataFrame(rows)
+
+    print(f"\n🏆 Top {top_k} 参数组合推荐（按预测性能分数降序，候选 {budget} 组）:")
+    for _, row in top_df.iterrows():
         print(f"\n🔹 得分：{row['predicted_perf_score']:.4f}")
-        print({k: row[k] for k in param_grid[0].keys()})  # 打印调优参数
+        print({k: row[k] for k in row.index if k != "predicted_perf_score"})  # 打印调优参数
 
     return top_df
 
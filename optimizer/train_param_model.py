@@ -1,7 +1,5 @@
 import pandas as pd
 import os
-import joblib
-import matplotlib.pyplot as plt
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
@@ -9,73 +7,121 @@ from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 from sklearn.metrics import mean_squared_error, r2_score
 
-# === 加载数据 ===
-data_path = "data/sysparam_training_data.csv"
-if not os.path.exists(data_path):
-    print("❌ 找不到训练数据文件：", data_path)
-    exit(1)
+from monitor.rates import add_rate_columns
+from optimizer import model_registry
+from optimizer.param_space import PARAM_FEATURE_COLUMNS
+from monitor.pressure import PRESSURE_FEATURES
 
-df = pd.read_csv(data_path)
+DATA_PATH = "data/sysparam_training_data.csv"
+MODEL_PATH = "optimizer/perf_model.pkl"
 
 # === 目标列（评分指标）===
-target_col = "perf_score"
+TARGET_COL = "perf_score"
 
-# === 输入特征列 ===
-feature_cols = [
+# perf_score 的定义版本：1 = 早期 exec_time / cpu_avg 代理分数（无 score_version 列），
+# 2 = log1p(吞吐) - 0.5 × log1p(p99 延迟)。两种分数量纲不同，训练时不能混用
+SCORE_VERSION_COL = "score_version"
+SCORE_VERSION = 2
+LEGACY_SCORE_VERSION = 1
+
+# === 输入特征列：系统状态 + 竞争类指标 + 系统参数本身（模型才能区分不同参数组合的效果）===
+FEATURE_COLS = [
     "cpu_percent", "load_avg_1", "load_avg_5", "load_avg_15",
     "gpu_util", "gpu_mem_used", "gpu_temp", "gpu_power",
     "mem_percent", "mem_used", "swap_used", "swap_percent",
-    "read_bytes", "write_bytes", "bytes_sent", "bytes_recv",
+    "read_bytes_per_sec", "write_bytes_per_sec", "read_iops", "write_iops",
+    "bytes_sent_per_sec", "bytes_recv_per_sec",
     "tcp_congestion_encoded", "exec_time", "cpu_avg"
-]
-
-feature_cols_full = feature_cols + ["workload_type"]
-
-# === 拆分特征 & 目标 ===
-X_raw = df[feature_cols_full]
-y = df[target_col]
-
-# === 特征预处理 ===
-preprocessor = ColumnTransformer(
-    transformers=[
-        ("num", StandardScaler(), feature_cols),
-        ("cat", OneHotEncoder(), ["workload_type"])
-    ]
-)
-
-# === 回归模型（单输出）===
-model = Pipeline(steps=[
-    ("preprocessor", preprocessor),
-    ("regressor", RandomForestRegressor(n_estimators=100, random_state=42))
-])
-
-# === 拆分训练集 & 测试集 ===
-X_train, X_test, y_train, y_test = train_test_split(
-    X_raw, y, test_size=0.2, random_state=42
-)
-
-# === 模型训练 ===
-model.fit(X_train, y_train)
-print("✅ 模型训练完成")
-
-# === 保存模型 ===
-os.makedirs("optimizer", exist_ok=True)
-joblib.dump(model, "optimizer/perf_model.pkl")
-print("💾 模型已保存为 optimizer/perf_model.pkl")
-
-# === 性能评估 ===
-y_pred = model.predict(X_test)
-mse = mean_squared_error(y_test, y_pred)
-r2 = r2_score(y_test, y_pred)
-print(f"\n📊 perf_score - MSE: {mse:.4f} | R²: {r2:.4f}")
-
-# === 可视化实际 vs 预测 ===
-plt.figure(figsize=(8, 6))
-plt.scatter(y_test, y_pred, alpha=0.6)
-plt.xlabel("Actual perf_score")
-plt.ylabel("Predicted perf_score")
-plt.title("Actual vs Predicted Performance Score")
-plt.grid(True)
-plt.tight_layout()
-plt.savefig("optimizer/perf_model_prediction.png")
-print("📈 可视化图已保存：optimizer/perf_model_prediction.png")
+] + PRESSURE_FEATURES + PARAM_FEATURE_COLUMNS
+
+FEATURE_COLS_FULL = FEATURE_COLS + ["workload_type"]
+
+
+def select_score_version(df, fallback=True):
+    """
+    只保留当前版本 perf_score 的样本；数据中还没有当前版本的样本且 fallback=True 时，
+    整体退回旧版本样本（同样不混用），并提示重新采集
+    """
+    if df.empty:
+        return df
+    if SCORE_VERSION_COL in df.columns:
+        versions = pd.to_numeric(df[SCORE_VERSION_COL], errors="coerce").fillna(LEGACY_SCORE_VERSION)
+    else:
+        versions = pd.Series(LEGACY_SCORE_VERSION, index=df.index)
+    current = df[versions == SCORE_VERSION]
+    if not current.empty or not fallback:
+        return current
+    print(f"⚠️ 训练数据中没有第 {SCORE_VERSION} 版 perf_score 的样本，暂用旧版本分数训练，"
+          f"请用 data/generate_param_sysdata.py 或 data/sweep.py 重新采集")
+    return df[versions == LEGACY_SCORE_VERSION]
+
+
+def prepare_perf_data(df):
+    """
+    整理训练数据：离线推导速率列，缺失的特征列（如早期数据没有的竞争类指标）按 0 处理
+    """
+    # 历史数据只有累计计数器时，离线推导速率列
+    df = add_rate_columns(df)
+    df = df.reindex(columns=list(df.columns) + [c for c in FEATURE_COLS if c not in df.columns], fill_value=0)
+    for col in FEATURE_COLS:
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
+    return df
+
+
+def build_perf_model(n_estimators=100):
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ("num", StandardScaler(), FEATURE_COLS),
+            ("cat", OneHotEncoder(handle_unknown="ignore"), ["workload_type"])
+        ]
+    )
+    # 回归模型（单输出）
+    return Pipeline(steps=[
+        ("preprocessor", preprocessor),
+        ("regressor", RandomForestRegressor(n_estimators=n_estimators, random_state=42))
+    ])
+
+
+def train_perf_model(df, test_size=0.2):
+    """
+    训练性能评分模型，返回 (模型, 测试集特征, 测试集目标)
+    """
+    X_train, X_test, y_train, y_test = train_test_split(
+        df[FEATURE_COLS_FULL], df[TARGET_COL], test_size=test_size, random_state=42
+    )
+    model = build_perf_model()
+    model.fit(X_train, y_train)
+    return model, X_test, y_test
+
+
+def plot_predictions(y_test, y_pred, path="optimizer/perf_model_prediction.png"):
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(8, 6))
+    plt.scatter(y_test, y_pred, alpha=0.6)
+    plt.xlabel("Actual perf_score")
+    plt.ylabel("Predicted perf_score")
+    plt.title("Actual vs Predicted Performance Score")
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig(path)
+    print(f"📈 可视化图已保存：{path}")
+
+
+if __name__ == "__main__":
+    if not os.path.exists(DATA_PATH):
+        print("❌ 找不到训练数据文件：", DATA_PATH)
+        exit(1)
+
+    df = prepare_perf_data(select_score_version(pd.read_csv(DATA_PATH)))
+    model, X_test, y_test = train_perf_model(df)
+    print("✅ 模型训练完成")
+
+    model_registry.save_model(model, MODEL_PATH)
+    print(f"💾 模型已保存为 {MODEL_PATH}")
+
+    # === 性能评估 ===
+    y_pred = model.predict(X_test)
+    mse = mean_squared_error(y_test, y_pred)
+    r2 = r2_score(y_test, y_pred)
+    print(f"\n📊 perf_score - MSE: {mse:.4f} | R²: {r2:.4f}")
+    plot_predictions(y_test, y_pred)
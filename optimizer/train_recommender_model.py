@@ -0,0 +1,103 @@
+import os
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.pipeline import Pipeline
+from sklearn.compose import ColumnTransformer
+from sklearn.metrics import r2_score
+
+from monitor.rates import add_rate_columns
+from optimizer import model_registry
+from optimizer.param_space import PARAM_FEATURE_COLUMNS
+from optimizer.param_recommender import FEATURE_COLUMNS, MODEL_PATH
+from optimizer.train_param_model import select_score_version
+
+DATA_PATH = "data/sysparam_training_data.csv"
+PLOT_PATH = "optimizer/param_model_r2_scores.png"
+
+# 每类负载内 perf_score 位于前 (1 - TOP_QUANTILE) 的样本作为“好参数”的训练目标
+TOP_QUANTILE = 0.75
+
+
+def load_training_data(path=DATA_PATH):
+    # 分位数筛选依赖 perf_score 的量纲，只用同一版本的分数
+    df = add_rate_columns(select_score_version(pd.read_csv(path)))
+    state_cols = [c for c in FEATURE_COLUMNS if c != "workload_type"]
+    # 早期采集的数据缺少的状态列（如竞争类指标）按 0 处理
+    df = df.reindex(columns=list(df.columns) + [c for c in state_cols if c not in df.columns], fill_value=0)
+    for col in state_cols + PARAM_FEATURE_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0) if col in df.columns else 0
+    return df
+
+
+def select_good_samples(df, quantile=TOP_QUANTILE):
+    """
+    按负载类型分组，只保留 perf_score 不低于组内分位数的样本：
+    模型学习的是“在这种状态下表现好的参数”，而不是随机扫描到的参数
+    """
+    threshold = df.groupby("workload_type")["perf_score"].transform(lambda s: s.quantile(quantile))
+    return df[df["perf_score"] >= threshold]
+
+
+def build_model():
+    state_cols = [c for c in FEATURE_COLUMNS if c != "workload_type"]
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ("num", StandardScaler(), state_cols),
+            ("cat", OneHotEncoder(handle_unknown="ignore"), ["workload_type"])
+        ]
+    )
+    # 随机森林原生支持多输出：每个参数特征列（tcp_rmem 拆为 min/default/max）对应一个输出
+    return Pipeline(steps=[
+        ("preprocessor", preprocessor),
+        ("regressor", RandomForestRegressor(n_estimators=100, min_samples_leaf=2, random_state=42, n_jobs=-1))
+    ])
+
+
+def train(data_path=DATA_PATH, model_path=MODEL_PATH):
+    if not os.path.exists(data_path):
+        print("❌ 找不到训练数据文件：", data_path)
+        return None
+
+    df = select_good_samples(load_training_data(data_path))
+    X = df[FEATURE_COLUMNS]
+    y = df[PARAM_FEATURE_COLUMNS]
+    print(f"📦 训练样本：{len(df)}，输出参数列：{len(PARAM_FEATURE_COLUMNS)}")
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    model = build_model()
+    model.fit(X_train, y_train)
+    # 推理时按列名解码输出，不再依赖输出下标
+    model.target_columns_ = list(PARAM_FEATURE_COLUMNS)
+    print("✅ 模型训练完成")
+
+    y_pred = model.predict(X_test)
+    scores = {}
+    for i, col in enumerate(PARAM_FEATURE_COLUMNS):
+        # 取值恒定的列 R² 无意义
+        scores[col] = r2_score(y_test[col], y_pred[:, i]) if y_test[col].nunique() > 1 else float("nan")
+    for col, score in scores.items():
+        print(f"📊 {col:<32} R²: {score:.4f}")
+
+    model_registry.save_model(model, model_path)
+    print(f"💾 模型已保存为 {model_path}")
+    return model, scores
+
+
+def plot_scores(scores, path=PLOT_PATH):
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(10, 8))
+    plt.barh(list(scores.keys()), list(scores.values()))
+    plt.xlabel("R²")
+    plt.title("Per-parameter R² of the recommender")
+    plt.grid(True, axis="x")
+    plt.tight_layout()
+    plt.savefig(path)
+    print(f"📈 可视化图已保存：{path}")
+
+
+if __name__ == "__main__":
+    result = train()
+    if result is not None:
+        plot_scores(result[1])
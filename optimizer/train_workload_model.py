@@ -1,87 +1,112 @@
 import os
-import joblib
 import pandas as pd
-import matplotlib.pyplot as plt
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import (
     accuracy_score, confusion_matrix, ConfusionMatrixDisplay,
     classification_report
 )
-from sklearn.preprocessing import LabelEncoder
 
-# 1. 加载数据
-data_path = "data/workload_training_data.csv"
-if not os.path.exists(data_path):
-    print("❌ 数据文件不存在，请确认路径为 data/workload_training_data.csv")
-    exit(1)
+from monitor.rates import add_rate_columns
+from optimizer import model_registry
+from monitor.pressure import PRESSURE_FEATURES
+from monitor.collector import TCP_CONGESTION_CODES
 
-df = pd.read_csv(data_path)
+DATA_PATH = "data/workload_training_data.csv"
+MODEL_PATH = "optimizer/workload_model.pkl"
 
-# 2. 编码字符串类型特征（如 TCP 拥塞算法）
-if 'tcp_congestion_control' in df.columns:
-    le = LabelEncoder()
-    df['tcp_congestion_encoded'] = le.fit_transform(df['tcp_congestion_control'])
+WORKLOAD_LABELS = ["cpu_bound", "io_bound", "memory_bound", "mixed", "network_bound"]
 
-# 3. 特征选择（CPU/GPU/内存/I/O/网络等）
-features = [
+# 特征（CPU/GPU/内存/I/O/网络 + 竞争类指标），与 workload_classifier.FEATURE_COLUMNS 一致
+FEATURES = [
     "cpu_percent", "load_avg_1", "load_avg_5", "load_avg_15",
     "gpu_util", "gpu_mem_used", "gpu_temp", "gpu_power",
     "mem_percent", "mem_used", "swap_used", "swap_percent",
-    "read_bytes", "write_bytes", "bytes_sent", "bytes_recv"
-]
-if "tcp_congestion_encoded" in df.columns:
-    features.append("tcp_congestion_encoded")
-
-X = df[features]
-y = df["workload_type"]
-
-# 4. 数据集划分
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# 5. 模型训练
-model = RandomForestClassifier(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
-
-# 6. 模型评估
-y_pred = model.predict(X_test)
-acc = accuracy_score(y_test, y_pred)
-print(f"\n🎯 模型准确率：{acc:.4f}\n")
-
-# 7. 分类报告输出
-report = classification_report(y_test, y_pred, digits=3)
-print("📋 分类报告：\n")
-print(report)
-
-# 8. 混淆矩阵保存
-labels = ["cpu_bound", "io_bound", "memory_bound", "mixed"]
-cm = confusion_matrix(y_test, y_pred, labels=labels)
-disp = ConfusionMatrixDisplay(confusion_matrix=cm, display_labels=labels)
-disp.plot(cmap=plt.cm.Blues)
-plt.title("Confusion Matrix")
-plt.savefig("optimizer/model_confusion_matrix.png")
-print("📊 混淆矩阵已保存：optimizer/model_confusion_matrix.png")
-
-# 9. 特征重要性图保存
-plt.figure(figsize=(10, 6))
-importance = pd.Series(model.feature_importances_, index=features)
-importance.sort_values().plot(kind='barh')
-plt.title("Feature Importance")
-plt.tight_layout()
-plt.savefig("optimizer/feature_importance.png")
-print("📈 特征重要性图已保存：optimizer/feature_importance.png")
-
-# 10. 保存模型
-model_path = "optimizer/workload_model.pkl"
-joblib.dump(model, model_path)
-print(f"✅ 模型训练完成，已保存至 {model_path}")
-
-# 11. 保存训练日志
-with open("optimizer/train_log.txt", "w") as f:
-    f.write("🌟 模型训练日志\n")
-    f.write(f"模型类型：RandomForestClassifier(n_estimators=100)\n")
-    f.write(f"准确率：{acc:.4f}\n\n")
-    f.write("使用特征：\n" + "\n".join(features) + "\n\n")
-    f.write("分类报告：\n" + report)
-
-print("📝 日志已保存：optimizer/train_log.txt")
+    "read_bytes_per_sec", "write_bytes_per_sec", "read_iops", "write_iops",
+    "bytes_sent_per_sec", "bytes_recv_per_sec",
+    "tcp_congestion_encoded"
+] + PRESSURE_FEATURES
+
+
+def prepare_workload_data(df):
+    """
+    整理训练数据：离线推导速率列、编码 TCP 拥塞算法，缺失的特征列（如早期数据没有的竞争类指标）按 0 处理
+    """
+    # 历史数据只有累计计数器时，离线推导速率列
+    df = add_rate_columns(df)
+
+    # 与采集端使用同一套编码，训练与推理一致
+    if "tcp_congestion_control" in df.columns:
+        df["tcp_congestion_encoded"] = df["tcp_congestion_control"].map(TCP_CONGESTION_CODES).fillna(-1)
+
+    df = df.reindex(columns=list(df.columns) + [c for c in FEATURES if c not in df.columns], fill_value=0)
+    for col in FEATURES:
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
+    return df
+
+
+def build_workload_model(n_estimators=100):
+    return RandomForestClassifier(n_estimators=n_estimators, random_state=42)
+
+
+def train_workload_model(df, test_size=0.2):
+    """
+    训练负载分类器，返回 (模型, 测试集特征, 测试集标签)
+    """
+    X = df[FEATURES]
+    y = df["workload_type"]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42)
+    model = build_workload_model()
+    model.fit(X_train, y_train)
+    return model, X_test, y_test
+
+
+def save_reports(model, X_test, y_test, report, acc):
+    import matplotlib.pyplot as plt
+
+    # 混淆矩阵
+    labels = [label for label in WORKLOAD_LABELS if label in set(y_test) | set(model.classes_)]
+    cm = confusion_matrix(y_test, model.predict(X_test), labels=labels)
+    disp = ConfusionMatrixDisplay(confusion_matrix=cm, display_labels=labels)
+    disp.plot(cmap=plt.cm.Blues)
+    plt.title("Confusion Matrix")
+    plt.savefig("optimizer/model_confusion_matrix.png")
+    print("📊 混淆矩阵已保存：optimizer/model_confusion_matrix.png")
+
+    # 特征重要性
+    plt.figure(figsize=(10, 6))
+    importance = pd.Series(model.feature_importances_, index=FEATURES)
+    importance.sort_values().plot(kind='barh')
+    plt.title("Feature Importance")
+    plt.tight_layout()
+    plt.savefig("optimizer/feature_importance.png")
+    print("📈 特征重要性图已保存：optimizer/feature_importance.png")
+
+    # 训练日志
+    with open("optimizer/train_log.txt", "w") as f:
+        f.write("🌟 模型训练日志\n")
+        f.write(f"模型类型：RandomForestClassifier(n_estimators={model.n_estimators})\n")
+        f.write(f"准确率：{acc:.4f}\n\n")
+        f.write("使用特征：\n" + "\n".join(FEATURES) + "\n\n")
+        f.write("分类报告：\n" + report)
+    print("📝 日志已保存：optimizer/train_log.txt")
+
+
+if __name__ == "__main__":
+    if not os.path.exists(DATA_PATH):
+        print(f"❌ 数据文件不存在，请确认路径为 {DATA_PATH}")
+        exit(1)
+
+    df = prepare_workload_data(pd.read_csv(DATA_PATH))
+    model, X_test, y_test = train_workload_model(df)
+
+    y_pred = model.predict(X_test)
+    acc = accuracy_score(y_test, y_pred)
+    print(f"\n🎯 模型准确率：{acc:.4f}\n")
+    report = classification_report(y_test, y_pred, digits=3)
+    print("📋 分类报告：\n")
+    print(report)
+
+    model_registry.save_model(model, MODEL_PATH)
+    print(f"✅ 模型训练完成，已保存至 {MODEL_PATH}")
+    save_reports(model, X_test, y_test, report, acc)
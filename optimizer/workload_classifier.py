@@ -1,6 +1,11 @@
-import os
-import joblib
-import pandas as pd
+import warnings
+
+from optimizer import model_registry
+from optimizer.fast_inference import compile_forest, metrics_to_vector, rows_to_matrix
+from monitor.pressure import PRESSURE_FEATURES
+
+# 用 NumPy 数组推理时 scikit-learn 会提示缺少列名，特征顺序已由 _columns 保证
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
 
 # 模型路径
 MODEL_PATH = "optimizer/workload_model.pkl"
@@ -10,44 +15,101 @@ FEATURE_COLUMNS = [
     "cpu_percent", "load_avg_1", "load_avg_5", "load_avg_15",
     "gpu_util", "gpu_mem_used", "gpu_temp", "gpu_power",
     "mem_percent", "mem_used", "swap_used", "swap_percent",
-    "read_bytes", "write_bytes", "bytes_sent", "bytes_recv",
+    "read_bytes_per_sec", "write_bytes_per_sec", "read_iops", "write_iops",
+    "bytes_sent_per_sec", "bytes_recv_per_sec",
     "tcp_congestion_encoded"
-]
+] + PRESSURE_FEATURES  # PSI / 运行队列 / 回收等竞争信号
+
+# 是否把随机森林展开为扁平数组推理（结果与 scikit-learn 一致，单条延迟低两个数量级）
+USE_COMPILED_FOREST = True
+
+# 超过该行数的批量推理交给 scikit-learn 的 C 实现（大批量时更快）
+COMPILED_BATCH_LIMIT = 256
 
 # 全局模型缓存
 _model = None
+_columns = FEATURE_COLUMNS   # 预先解析好的特征顺序
+_compiled = None             # CompiledForest（模型不是随机森林时为 None）
+
+def _set_model(model):
+    global _model, _columns, _compiled
+    _model = model
+    if model is None:
+        _columns, _compiled = FEATURE_COLUMNS, None
+        return
+    # 优先使用模型训练时记录的特征顺序
+    _columns = list(getattr(model, "feature_names_in_", FEATURE_COLUMNS))
+    _compiled = compile_forest(model) if USE_COMPILED_FOREST else None
+
+def _refresh():
+    """
+    从模型注册表取模型（首次加载 / 文件更新后热重载），模型对象变化时重建推理缓存
+    """
+    model = model_registry.get_model("workload")
+    if model is not _model:
+        _set_model(model)
+    return _model
 
 def load_model():
-    global _model
-    if not os.path.exists(MODEL_PATH):
-        print(f"❌ 模型文件未找到：{MODEL_PATH}")
-        return None
-    try:
-        _model = joblib.load(MODEL_PATH)
-        print("✅ 模型加载成功")
-    except Exception as e:
-        print(f"❌ 模型加载失败：{e}")
-        _model = None
+    return _refresh()
 
 # 用于外部热重载模型
 def reload_model():
-    load_model()
+    model_registry.reload_model("workload")
+    return _refresh()
 
 # 初始化加载
+model_registry.register_model("workload", MODEL_PATH)
 load_model()
 
+def _predict_matrix(X):
+    if _compiled is not None and len(X) <= COMPILED_BATCH_LIMIT:
+        return _compiled.predict(X)
+    return _model.predict(X)
+
 def predict_workload(metrics: dict) -> str:
-    if _model is None:
+    if _refresh() is None:
         return "unknown"  # 模型未加载时兜底
 
     # 构造特征行（缺失项填 0）
-    row = {feature: metrics.get(feature, 0) for feature in FEATURE_COLUMNS}
-    df = pd.DataFrame([row])
+    X = metrics_to_vector(metrics, _columns)
 
     try:
-        prediction = _model.predict(df)[0]
+        prediction = _predict_matrix(X)[0]
     except Exception as e:
         print(f"❌ 预测失败：{e}")
         return "unknown"
 
-    return prediction
+    return str(prediction)
+
+def predict_workload_batch(rows):
+    """
+    批量预测（DataFrame 或 dict 列表），用于回放历史日志
+    """
+    if _refresh() is None:
+        return ["unknown"] * len(rows)
+    return [str(label) for label in _predict_matrix(rows_to_matrix(rows, _columns))]
+
+def feature_columns():
+    """
+    当前模型使用的特征顺序
+    """
+    _refresh()
+    return list(_columns)
+
+def predict_workload_proba(metrics: dict) -> dict:
+    """
+    返回各负载类型的概率 {label: p}，模型未加载时返回空 dict
+    """
+    if _refresh() is None:
+        return {}
+    X = metrics_to_vector(metrics, _columns)
+    try:
+        if _compiled is not None and _compiled.is_classifier:
+            proba = _compiled.predict_proba(X)[0]
+        else:
+            proba = _model.predict_proba(X)[0]
+    except Exception as e:
+        print(f"❌ 预测失败：{e}")
+        return {}
+    return {str(label): float(p) for label, p in zip(_model.classes_, proba)}
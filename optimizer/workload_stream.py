@@ -0,0 +1,176 @@
+import math
+from collections import deque
+
+from optimizer.workload_classifier import feature_columns, predict_workload_proba
+
+# 滑动窗口长度（采样点数）
+DEFAULT_WINDOW = 12
+
+# 累计浮点误差控制：每更新这么多次，从窗口内原始数据重算一次累加量
+RECOMPUTE_EVERY = 10000
+
+
+def _sum_squares(m):
+    """
+    0² + 1² + ... + m²
+    """
+    return m * (m + 1) * (2 * m + 1) / 6 if m > 0 else 0.0
+
+
+class RollingStats:
+    """
+    定长滑动窗口上的均值 / 方差 / 斜率，每次 push 为 O(1)：
+    维护 Σy、Σy²、Σ(i·y)（i 为全局采样序号），Σi 与 Σi² 由连续序号的闭式公式得到
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.values = deque()
+        self.next_index = 0
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.sum_iy = 0.0
+        self._updates = 0
+
+    def push(self, value):
+        i = self.next_index
+        self.next_index += 1
+        self.values.append(value)
+        self.sum += value
+        self.sum_sq += value * value
+        self.sum_iy += i * value
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            old_i = i - self.window
+            self.sum -= old
+            self.sum_sq -= old * old
+            self.sum_iy -= old_i * old
+
+        self._updates += 1
+        if self._updates % RECOMPUTE_EVERY == 0:
+            self._recompute()
+
+    def _recompute(self):
+        first = self.next_index - len(self.values)
+        self.sum = sum(self.values)
+        self.sum_sq = sum(v * v for v in self.values)
+        self.sum_iy = sum((first + k) * v for k, v in enumerate(self.values))
+
+    @property
+    def count(self):
+        return len(self.values)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    @property
+    def var(self):
+        n = self.count
+        if n < 2:
+            return 0.0
+        return max(self.sum_sq / n - self.mean ** 2, 0.0)
+
+    @property
+    def std(self):
+        return math.sqrt(self.var)
+
+    @property
+    def slope(self):
+        """
+        窗口内最小二乘斜率（每个采样点的变化量）
+        """
+        n = self.count
+        if n < 2:
+            return 0.0
+        first = self.next_index - n
+        sum_i = n * first + n * (n - 1) / 2
+        sum_ii = _sum_squares(first + n - 1) - _sum_squares(first - 1)
+        denom = n * sum_ii - sum_i ** 2
+        if denom == 0:
+            return 0.0
+        return (n * self.sum_iy - sum_i * self.sum) / denom
+
+
+class WorkloadStream:
+    """
+    流式负载识别：
+    - 每个特征维护滑动窗口统计，用窗口均值（而非单个快照）做分类
+    - 输出 (标签, 置信度)；只有当新标签的概率 ≥ switch_confidence、领先当前标签 ≥ margin，
+      且连续 min_dwell 次保持领先、当前标签也已驻留 ≥ min_dwell 次时才切换（滞回 + 最短驻留）
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, min_dwell=3, switch_confidence=0.6, margin=0.15):
+        self.window = window
+        self.min_dwell = min_dwell
+        self.switch_confidence = switch_confidence
+        self.margin = margin
+        self.stats = {}
+        self.label = None
+        self.confidence = 0.0
+        self.dwell = 0
+        self.candidate = None
+        self.candidate_streak = 0
+
+    def push(self, metrics):
+        for column in feature_columns():
+            try:
+                value = float(metrics.get(column, 0))
+            except (TypeError, ValueError):
+                value = 0.0
+            stats = self.stats.get(column)
+            if stats is None:
+                stats = self.stats[column] = RollingStats(self.window)
+            stats.push(value)
+
+    def window_features(self):
+        """
+        窗口特征：{col}_mean / {col}_std / {col}_slope
+        """
+        features = {}
+        for column, stats in self.stats.items():
+            features[f"{column}_mean"] = stats.mean
+            features[f"{column}_std"] = stats.std
+            features[f"{column}_slope"] = stats.slope
+        return features
+
+    def window_means(self):
+        return {column: stats.mean for column, stats in self.stats.items()}
+
+    def update(self, metrics):
+        """
+        加入一个采样点并返回当前判定：
+        {"workload", "confidence", "changed", "candidate", "candidate_confidence"}
+        """
+        self.push(metrics)
+        proba = predict_workload_proba(self.window_means())
+        if not proba:
+            return {"workload": "unknown", "confidence": 0.0, "changed": False,
+                    "candidate": None, "candidate_confidence": 0.0}
+
+        top = max(proba, key=proba.get)
+        changed = False
+        self.dwell += 1
+
+        if self.label is None:
+            self.label, changed, self.dwell = top, True, 1
+        elif top != self.label:
+            self.candidate_streak = self.candidate_streak + 1 if top == self.candidate else 1
+            self.candidate = top
+            if (proba[top] >= self.switch_confidence
+                    and proba[top] - proba.get(self.label, 0.0) >= self.margin
+                    and self.candidate_streak >= self.min_dwell
+                    and self.dwell >= self.min_dwell):
+                self.label, changed, self.dwell = top, True, 1
+                self.candidate, self.candidate_streak = None, 0
+        else:
+            self.candidate, self.candidate_streak = None, 0
+
+        self.confidence = proba.get(self.label, 0.0)
+        return {
+            "workload": self.label,
+            "confidence": round(self.confidence, 3),
+            "changed": changed,
+            "candidate": self.candidate,
+            "candidate_confidence": round(proba.get(self.candidate, 0.0), 3) if self.candidate else 0.0
+        }
@@ -1,45 +1,118 @@
-import pandas as pd
+import argparse
 import time
-from monitor.collector import collect_all_metrics
-from optimizer.workload_classifier import predict_workload
+from monitor.ringbuffer import read_latest_metrics
+from monitor.metric_log import MetricLogWriter, close_on_exit
+from optimizer.workload_stream import WorkloadStream, DEFAULT_WINDOW
 from optimizer.param_recommender import recommend_params
-from controller.param_applier import apply_sysctl_params
+from controller.param_applier import apply_sysctl_params, apply_block_params
+from optimizer.block_recommender import recommend_block_params
+from monitor.io_runtime import get_disk_io_per_device
+from optimizer.online_tuner import OnlineTuner, STATE_PATH, read_reward_file, measured_reward
+from controller.guard import TuningGuard, AUDIT_PATH
+
+LOG_PATH = "system_metrics_log_with_workload.csv"
 
 if __name__ == "__main__":
-    all_data = []
+    parser = argparse.ArgumentParser(description="系统监控与智能调优")
+    parser.add_argument("--log-path", default=LOG_PATH, help="监控日志路径")
+    parser.add_argument("--log-format", default="csv", choices=["csv", "parquet"], help="监控日志格式")
+    parser.add_argument("--interval", type=float, default=5, help="采样间隔（秒）")
+    parser.add_argument("--class-window", type=int, default=DEFAULT_WINDOW, help="负载识别滑动窗口（采样点数）")
+    parser.add_argument("--min-dwell", type=int, default=3, help="负载标签切换前的最短驻留（采样点数）")
+    parser.add_argument("--online", action="store_true",
+                        help="闭环在线调优：按奖励持续探索参数。注意：未指定 --reward-file 时奖励只是 CPU/IO/PSI "
+                             "等系统级代理指标（见 online_tuner.REWARD_PROFILES），不代表业务吞吐或延迟")
+    parser.add_argument("--reward-file", default=None,
+                        help="在线调优：业务侧写出的实测奖励文件（最后一行为数值，如每秒请求数），每个采样周期读取一次")
+    parser.add_argument("--reward-lower-better", action="store_true", help="在线调优：奖励文件中的值越小越好（如延迟）")
+    parser.add_argument("--state-path", default=STATE_PATH, help="在线调优状态文件")
+    parser.add_argument("--settle", type=float, default=10, help="在线调优：参数应用后的稳定时间（秒）")
+    parser.add_argument("--window", type=float, default=30, help="在线调优：奖励测量窗口（秒）")
+    parser.add_argument("--tune-block", action="store_true", help="负载变化时按各磁盘的 IO 模式调整调度器 / 队列参数")
+    parser.add_argument("--no-guard", action="store_true", help="关闭变更守护（不做退化检测与自动回滚）")
+    parser.add_argument("--canary", type=int, default=12, help="变更守护：基线与金丝雀窗口长度（采样点数）")
+    parser.add_argument("--audit-path", default=AUDIT_PATH, help="变更守护审计日志")
+    args = parser.parse_args()
+
+    # 流式写日志：批量落盘 + 按大小/时间轮转，SIGTERM 时同样会刷新
+    log_writer = MetricLogWriter(args.log_path, fmt=args.log_format)
+    close_on_exit(log_writer)
+
+    # 参数变更经守护应用：金丝雀窗口内检测到退化即自动回滚
+    guard = None
+    if not args.no_guard:
+        if args.online:
+            # 在线调优：金丝雀窗口与奖励测量窗口对齐，每组参数与上一组确认良好的参数比较
+            samples = max(int(args.window // args.interval), 2)
+            guard = TuningGuard(baseline_samples=samples, canary_samples=samples,
+                                settle_samples=int(args.settle // args.interval), audit_path=args.audit_path)
+        else:
+            guard = TuningGuard(baseline_samples=args.canary, canary_samples=args.canary, audit_path=args.audit_path)
+
+    tuner = None
+    if args.online:
+        reward_fn = measured_reward(lower_is_better=args.reward_lower_better) if args.reward_file else None
+        if reward_fn is None:
+            print("⚠️ 在线调优使用系统级代理奖励（REWARD_PROFILES），建议通过 --reward-file 接入业务吞吐/延迟")
+        tuner = OnlineTuner(args.state_path, reward_fn=reward_fn, guard=guard,
+                            settle_seconds=args.settle, window_seconds=args.window)
+
+    if args.tune_block:
+        get_disk_io_per_device()  # 建立速率基线，负载变化时得到的是这段时间内的平均 IO 模式
+
+    # 滑动窗口 + 滞回的流式负载识别，避免单个噪声快照触发重新调优
+    stream = WorkloadStream(window=args.class_window, min_dwell=args.min_dwell)
     last_workload = None  # 用于追踪变化
     print("🔍 正在启动系统监控与智能调优，按 Ctrl+C 停止...")
 
     try:
         while True:
             # Step 1: 实时采集系统指标
-            metrics = collect_all_metrics()
+            metrics = read_latest_metrics()
 
-            # Step 2: 利用模型判断当前 workload 类型
-            workload = predict_workload(metrics)
+            # Step 2: 利用模型判断当前 workload 类型（窗口统计 + 置信度 + 滞回）
+            decision = stream.update(metrics)
+            workload = decision["workload"]
             metrics["workload_type"] = workload
+            metrics["workload_confidence"] = decision["confidence"]
 
-            # Step 3: 如果负载类型发生变化 → 自动调优
-            if workload != last_workload:
-                print(f"\n⚙️ 检测到负载变化：{last_workload} ➜ {workload}")
+            # 变更守护：先维护基线 / 金丝雀窗口（窗口结束时确认或回滚），再应用新的参数；
+            # 观察期内的推荐会排队，基线在新负载下采满后自动应用
+            if guard is not None:
+                guard.observe(metrics, workload)
+
+            # Step 3: 在线模式下按实测奖励闭环调优；否则负载类型变化时 → 一次性推荐
+            if tuner is not None:
+                if args.reward_file:
+                    metrics["reward"] = read_reward_file(args.reward_file)
+                tuner.step(metrics, workload)
+            elif decision["changed"]:
+                print(f"\n⚙️ 检测到负载变化：{last_workload} ➜ {workload}（置信度 {decision['confidence']:.2f}）")
                 #params = recommend_params(workload)
                 params = recommend_params(metrics)
                 if params:
                     print(f"🚀 推荐参数：{params}")
-                    apply_sysctl_params(params)
+                    if guard is not None:
+                        guard.apply(params, workload)
+                    else:
+                        apply_sysctl_params(params)
                 else:
                     print("ℹ️ 当前不建议修改系统参数")
+                if args.tune_block:
+                    block_params = recommend_block_params(get_disk_io_per_device())
+                    if block_params:
+                        print(f"💽 推荐块设备参数：{block_params}")
+                        apply_block_params(block_params)
                 last_workload = workload
 
             # Step 4: 打印简要信息
             print(f"[{metrics['timestamp']}] {workload.upper()} | CPU: {metrics['cpu_percent']}% | MEM: {metrics['mem_percent']}%")
 
-            all_data.append(metrics)
-            time.sleep(5)
+            log_writer.write(metrics)
+            time.sleep(args.interval)
 
     except KeyboardInterrupt:
         print("⛔ 用户终止，正在保存监控日志...")
-        df = pd.DataFrame(all_data)
-        df.to_csv("system_metrics_log_with_workload.csv", index=False)
-        print("✅ 日志已保存到 system_metrics_log_with_workload.csv")
-
+    finally:
+        log_writer.close()
+        print(f"✅ 日志已保存到 {log_writer.path}")
@@ -5,9 +5,13 @@
 from sysparams.kernel import get_kernel_params
 from sysparams.vm import get_vm_params
 from sysparams.net import get_all_net_params as get_net_params
-#from sysparams.io import get_io_params
+from sysparams.io import get_io_params, flatten_io_params
 
-def collect_all_sysparams():
+def collect_all_sysparams(include_block=True):
+    """
+    采集 kernel / vm / net 参数；include_block 时附带各块设备的队列参数（blk_{dev}_*）。
+    块设备字段随主机的磁盘而变，写入跨主机共享的训练数据时应关闭
+    """
     params = {}
     params.update(get_kernel_params())
     params.update(get_vm_params())
@@ -28,23 +32,9 @@ def collect_all_sysparams():
             params["tcp_wmem_default"] = int(wmem_parts[1])
             params["tcp_wmem_max"] = int(wmem_parts[2])
 
-    '''
-    # 只采第一个 block 设备（如 sda）
-    io_params = get_io_params()
-    if io_params:
-        first_disk = sorted(io_params.keys())[0]
-        disk_params = io_params[first_disk]
-        for key, value in disk_params.items():
-            params[f"disk_{key}"] = value  # 扁平化
-
-        # 可选：提取 scheduler 当前策略（去除中括号）
-        if "disk_scheduler" in params:
-            sched = params["disk_scheduler"]
-            for opt in sched.split():
-                if opt.startswith("[") and opt.endswith("]"):
-                    params["disk_scheduler"] = opt.strip("[]")
-                    break
-    '''
+    # 全部块设备的队列参数，展平为 blk_{dev}_{param}
+    if include_block:
+        params.update(flatten_io_params(get_io_params()))
 
     return params
 
@@ -1,50 +1,129 @@
 import os
 import re
 
-BLOCK_PATH = "/sys/block/"
+# 块设备根目录（测试时可指向伪造的 /sys/block 目录）
+BLOCK_PATH = "/sys/block"
 
-def is_valid_disk(device):
+# 跳过的虚拟设备：loop、内存盘、压缩内存盘、光驱、软驱
+SKIP_PATTERN = re.compile(r"^(loop|ram|zram|sr|fd)\d*")
+
+# 可调的 queue 参数
+TUNABLE_QUEUE_PARAMS = ["scheduler", "nr_requests", "read_ahead_kb", "max_sectors_kb"]
+
+# 只读的拓扑 / 能力参数
+TOPOLOGY_QUEUE_PARAMS = ["rotational", "max_hw_sectors_kb", "logical_block_size", "optimal_io_size"]
+
+
+def is_valid_disk(device, block_path=None):
     """
-    判断是否为有效的物理磁盘设备（跳过 loop 和 sr）
+    判断是否为可调的块设备：sd*/vd*/xvd*/nvme*/mmcblk*/dm-*/md* 等，跳过 loop、zram、光驱；
+    必须存在 queue 目录
     """
-    return re.match(r"^sd[a-z]$", device)
+    if SKIP_PATTERN.match(device):
+        return False
+    return os.path.isdir(os.path.join(block_path or BLOCK_PATH, device, "queue"))
+
+
+def device_type(device):
+    if device.startswith("nvme"):
+        return "nvme"
+    if device.startswith("dm-"):
+        return "dm"
+    if device.startswith("md"):
+        return "md"
+    if device.startswith("mmcblk"):
+        return "mmc"
+    if device.startswith(("vd", "xvd")):
+        return "virtio"
+    if device.startswith(("sd", "hd")):
+        return "scsi"
+    return "other"
+
 
-def read_queue_param(device, param):
+def read_queue_param(device, param, block_path=None):
     """
-    读取某个磁盘设备的 queue 参数
+    读取某个块设备的 queue 参数
     """
-    path = f"{BLOCK_PATH}{device}/queue/{param}"
+    path = os.path.join(block_path or BLOCK_PATH, device, "queue", param)
     try:
         with open(path, "r") as f:
             return f.read().strip()
     except Exception:
         return "N/A"
 
-def get_io_params():
+
+def parse_scheduler(text):
     """
-    获取所有物理磁盘的 I/O 调优参数：
-    - scheduler：I/O 调度算法
-    - nr_requests：队列深度
-    - read_ahead_kb：预读大小
+    "none [mq-deadline] kyber bfq" → ("mq-deadline", ["none", "mq-deadline", "kyber", "bfq"])；
+    dm/md 等栈式设备没有调度器时返回 ("none", [])
     """
-    devices = os.listdir(BLOCK_PATH)
-    results = {}
+    if not text or text == "N/A":
+        return "none", []
+    available = [opt.strip("[]") for opt in text.split()]
+    current = next((opt.strip("[]") for opt in text.split() if opt.startswith("[")), available[0])
+    return current, available
 
-    for dev in devices:
-        if not is_valid_disk(dev):
-            continue  # 跳过 loop 设备、光驱等
 
-        results[dev] = {
-            "scheduler": read_queue_param(dev, "scheduler"),
-            "nr_requests": read_queue_param(dev, "nr_requests"),
-            "read_ahead_kb": read_queue_param(dev, "read_ahead_kb")
+def _list_dir(path):
+    try:
+        return sorted(os.listdir(path))
+    except OSError:
+        return []
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def list_block_devices(block_path=None):
+    return [dev for dev in _list_dir(block_path or BLOCK_PATH) if is_valid_disk(dev, block_path)]
+
+
+def get_io_params(block_path=None):
+    """
+    获取所有块设备的 I/O 参数与队列拓扑：
+    - scheduler / available_schedulers：当前与可选的 I/O 调度算法
+    - nr_requests：队列深度；read_ahead_kb：预读大小；max_sectors_kb：单个请求上限
+    - rotational / max_hw_sectors_kb / nr_hw_queues：设备能力与硬件队列数（mq 目录）
+    - type / slaves / holders：设备类型及 dm、md 的上下层关系
+    """
+    root = block_path or BLOCK_PATH
+    results = {}
+
+    for dev in list_block_devices(root):
+        scheduler, available = parse_scheduler(read_queue_param(dev, "scheduler", root))
+        info = {
+            "scheduler": scheduler,
+            "available_schedulers": available,
+            "type": device_type(dev),
+            "nr_hw_queues": len(_list_dir(os.path.join(root, dev, "mq"))),
+            "slaves": _list_dir(os.path.join(root, dev, "slaves")),
+            "holders": _list_dir(os.path.join(root, dev, "holders"))
         }
+        for param in TUNABLE_QUEUE_PARAMS[1:] + TOPOLOGY_QUEUE_PARAMS:
+            info[param] = _to_int(read_queue_param(dev, param, root))
+        results[dev] = info
 
     return results
 
+
+def flatten_io_params(io_params):
+    """
+    展平为 blk_{dev}_{param} 标量字段（dm-0 → dm_0），用于 collect_all_sysparams（不进入共享训练数据）
+    """
+    flat = {}
+    for dev, info in io_params.items():
+        prefix = f"blk_{dev.replace('-', '_')}"
+        for key in ["scheduler", "nr_requests", "read_ahead_kb", "max_sectors_kb", "rotational", "nr_hw_queues"]:
+            flat[f"{prefix}_{key}"] = info.get(key, "N/A")
+    return flat
+
+
 # 支持独立调试运行
 if __name__ == "__main__":
     import json
     io_params = get_io_params()
     print(json.dumps(io_params, indent=2))
-
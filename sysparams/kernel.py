@@ -1,12 +1,7 @@
-import os
+from sysparams.sysctl import read_sysctl
 
 def read_kernel_param(name):
-    path = f"/proc/sys/kernel/{name}"
-    try:
-        with open(path, "r") as f:
-            return f.read().strip()
-    except:
-        return "N/A"
+    return read_sysctl(f"kernel.{name}")
 
 def get_kernel_params():
     return {
@@ -1,16 +1,12 @@
-import os
+from sysparams.sysctl import read_sysctl
 
 # -------- 核心工具函数 --------
-def read_net_param(path):
-    try:
-        with open(path, 'r') as f:
-            return f.read().strip()
-    except:
-        return "N/A"
+def read_net_param(name):
+    return read_sysctl(name)
 
 # -------- core 参数采集 --------
 def get_net_core_params():
-    base_path = "/proc/sys/net/core/"
+    base_path = "net.core."
     params = {
         "somaxconn": read_net_param(base_path + "somaxconn")
     }
@@ -18,7 +14,7 @@ def get_net_core_params():
 
 # -------- ipv4 参数采集 --------
 def get_net_ipv4_params():
-    base_path = "/proc/sys/net/ipv4/"
+    base_path = "net.ipv4."
     params = {
         "tcp_congestion_control": read_net_param(base_path + "tcp_congestion_control"),
         "tcp_fin_timeout": read_net_param(base_path + "tcp_fin_timeout"),
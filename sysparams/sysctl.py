@@ -0,0 +1,134 @@
+import functools
+import os
+import threading
+import time
+
+# sysctl 参数所在根目录（测试时可指向伪造的 /proc/sys 目录）
+PROC_SYS_ROOT = "/proc/sys"
+
+# 缓存有效期（秒）：sysctl 参数变化很慢，外部修改最多延迟这么久可见；
+# 本项目自身的写入会通过 invalidate() 立即失效
+DEFAULT_TTL = 5.0
+
+READ_CHUNK = 4096
+
+_lock = threading.Lock()
+_fds = {}     # path -> 常驻只读文件描述符
+_cache = {}   # path -> (value, 过期时间)
+
+
+def sysctl_path(name, root=None):
+    """
+    sysctl 名称转换为文件路径：net.ipv4.tcp_rmem → /proc/sys/net/ipv4/tcp_rmem。
+    名称来自模型、协调器或界面输入，含 "/"、空段或 ".." 的名称、以及解析后落在根目录之外的路径
+    一律拒绝（ValueError），避免借参数名写任意文件。
+    每次调用按当前的 PROC_SYS_ROOT 解析（测试把它指向伪造目录后立即生效）
+    """
+    return _resolve(str(name), root or PROC_SYS_ROOT)
+
+
+@functools.lru_cache(maxsize=4096)
+def _resolve(name, root):
+    # 根目录是缓存键的一部分，换根目录不会命中旧结果
+    parts = name.split(".")
+    if "/" in name or "\\" in name or any(part in ("", "..") for part in parts):
+        raise ValueError(f"非法的 sysctl 参数名：{name!r}")
+    base = os.path.realpath(root)
+    path = os.path.join(base, *parts)
+    if os.path.commonpath([base, os.path.realpath(path)]) != base:
+        raise ValueError(f"sysctl 参数路径越界：{name!r}")
+    return path
+
+
+def _get_fd(path):
+    fd = _fds.get(path)
+    if fd is None:
+        fd = os.open(path, os.O_RDONLY)
+        _fds[path] = fd
+    return fd
+
+
+def _pread_all(fd):
+    data = b""
+    while True:
+        chunk = os.pread(fd, READ_CHUNK, len(data))
+        data += chunk
+        if len(chunk) < READ_CHUNK:
+            return data
+
+
+def _drop_fd(path):
+    fd = _fds.pop(path, None)
+    if fd is not None:
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+
+def read_sysctl(name, ttl=DEFAULT_TTL, root=None, default="N/A"):
+    """
+    读取 sysctl 参数：文件描述符常驻、用 pread 从偏移 0 重读，不再每次 open/close，
+    也不再 fork sysctl 命令。ttl 秒内直接返回缓存值（ttl=0 表示每次都读）。
+    """
+    try:
+        path = sysctl_path(name, root)
+    except ValueError:
+        return default
+    now = time.monotonic()
+
+    with _lock:
+        cached = _cache.get(path)
+        if ttl > 0 and cached is not None and cached[1] > now:
+            return cached[0]
+
+        try:
+            value = _pread_all(_get_fd(path)).decode().strip()
+        except OSError:
+            _drop_fd(path)  # 文件消失/权限变化时下次重新打开
+            value = default  # 不存在的参数（如老内核没有的调度项）同样缓存，避免反复 open
+
+        if ttl > 0:
+            _cache[path] = (value, now + ttl)
+        elif cached is not None:
+            _cache[path] = (value, cached[1])  # 顺带刷新缓存，其他读者不再拿到旧值
+        return value
+
+
+def read_sysctls(names, ttl=DEFAULT_TTL, root=None, default="N/A"):
+    return {name: read_sysctl(name, ttl=ttl, root=root, default=default) for name in names}
+
+
+def invalidate(names=None, root=None):
+    """
+    使缓存失效（names 为 None 时全部失效），参数写入后由 controller 调用
+    """
+    with _lock:
+        if names is None:
+            _cache.clear()
+            return
+        for name in names:
+            try:
+                _cache.pop(sysctl_path(name, root), None)
+            except ValueError:
+                pass
+
+
+def close_all():
+    """
+    关闭所有常驻文件描述符并清空缓存
+    """
+    with _lock:
+        for path in list(_fds):
+            _drop_fd(path)
+        _cache.clear()
+
+
+if __name__ == "__main__":
+    import json
+    print(json.dumps(read_sysctls([
+        "kernel.sched_autogroup_enabled",
+        "vm.swappiness",
+        "net.ipv4.tcp_congestion_control",
+        "net.ipv4.tcp_rmem"
+    ]), indent=2))
@@ -1,12 +1,7 @@
-import os
+from sysparams.sysctl import read_sysctl
 
 def read_vm_param(name):
-    path = f"/proc/sys/vm/{name}"
-    try:
-        with open(path, "r") as f:
-            return f.read().strip()
-    except:
-        return "N/A"
+    return read_sysctl(f"vm.{name}")
 
 def get_vm_params():
     return {
@@ -6,15 +6,17 @@ import streamlit as st
 import pandas as pd
 import threading
 
-from monitor.collector import collect_all_metrics
+from monitor.ringbuffer import read_latest_metrics
 from optimizer.workload_classifier import predict_workload
 #from optimizer.param_recommender import recommend_params
 from optimizer.predict_best_param import predict_best_param
-from controller.param_applier import apply_sysctl_params
+from controller.guard import TuningGuard, read_audit_log
+from monitor.process import get_process_info, get_top_processes, get_cgroup_workloads
 
 import workloads.cpu_bound as cpu_workload
 import workloads.io_bound as io_workload
 import workloads.memory_bound as mem_workload
+import workloads.network_bound as net_workload
 
 # 页面配置
 st.set_page_config(page_title="系统智能调优仪表盘", layout="wide")
@@ -34,11 +36,16 @@ if "workload_running" not in st.session_state:
     st.session_state.workload_running = False
 if "workload_finished_message" not in st.session_state:
     st.session_state.workload_finished_message = ""
+if "guard" not in st.session_state:
+    # 所有参数变更都经守护应用：金丝雀窗口内出现退化自动回滚
+    st.session_state.guard = TuningGuard()
+guard = st.session_state.guard
 
 # 实时采集 & 分类
-metrics = collect_all_metrics()
+metrics = read_latest_metrics()
 workload = predict_workload(metrics)
 metrics["workload_type"] = workload
+guard_decision = guard.observe(metrics, workload)
 
 # 保存历史数据
 st.session_state.history.append(metrics)
@@ -55,11 +62,16 @@ if st.session_state.last_workload != workload:
     if not top_df.empty:
         param_fields = [k for k in top_df.columns if k.startswith("kernel.") or k.startswith("vm.") or k.startswith("net.")]
         params = {k: top_df.iloc[0][k] for k in param_fields}
-        for k, v in params.items():
-            apply_sysctl_params({k: v})
-            st.success(f"✅ 已应用参数：{k}={v}")
+        report = guard.apply(params, workload, source="auto")
+        if report.get("deferred"):
+            st.info("⏳ 上一次参数变更仍在观察期或新负载的基线尚未采满，本次推荐已排队，就绪后自动应用")
+        elif report["success"]:
+            st.success(f"✅ 已应用 {len(report['applied'])} 个参数，跳过 {len(report['skipped'])} 个未变化参数（{report['latency_ms']} ms）")
+        else:
+            st.error(f"❌ 参数应用失败，已回滚：{report['failed']}")
     else:
         st.warning("⚠️ 没有找到推荐参数组合")
+    st.session_state.last_workload = workload
 
 # 系统指标面板
 df = pd.DataFrame(st.session_state.history)
@@ -69,7 +81,28 @@ col2.metric("内存使用率", f"{metrics['mem_percent']}%")
 col3.metric("识别负载", workload.upper())
 
 st.subheader("📈 系统关键指标趋势")
-st.line_chart(df[["cpu_percent", "mem_percent", "write_bytes"]])
+st.line_chart(df[["cpu_percent", "mem_percent"]])
+st.subheader("💽 磁盘吞吐（MB/s）")
+st.line_chart(df[["read_bytes_per_sec", "write_bytes_per_sec"]] / 1024 ** 2)
+
+st.subheader("🔎 资源占用归因")
+get_process_info()  # 速率为距上次刷新的平均值
+proc_col, cgroup_col = st.columns(2)
+proc_col.markdown("**Top 进程（按 CPU）**")
+proc_col.dataframe(pd.DataFrame(get_top_processes()))
+cgroup_col.markdown("**cgroup 负载分类**")
+cgroup_col.dataframe(pd.DataFrame(get_cgroup_workloads()))
+
+st.subheader("🛡️ 变更守护")
+if guard_decision is not None and guard_decision["event"] == "revert":
+    st.error(f"↩️ 检测到性能退化（{', '.join(guard_decision['regressions'])}），已自动回滚")
+if guard.in_canary:
+    st.info(f"⏳ 金丝雀观察中：{len(guard.canary['samples'])}/{guard.canary_samples} 个采样点")
+audit = read_audit_log(guard.audit_path, limit=20)
+if audit:
+    st.dataframe(pd.DataFrame(audit)[["time", "event", "workload", "params"]].astype(str))
+else:
+    st.caption("暂无变更记录")
 
 st.subheader("📋 最近数据（最新 10 条）")
 st.dataframe(df.tail(10))
@@ -82,8 +115,13 @@ if st.button("🚀 一键智能优化当前系统参数"):
     if not top_df.empty:
         param_fields = [k for k in top_df.columns if k.startswith("kernel.") or k.startswith("vm.") or k.startswith("net.")]
         params = {k: top_df.iloc[0][k] for k in param_fields}
-        apply_sysctl_params(params)
-        st.success(f"✅ 已根据 {workload} 类型应用参数：{params}")
+        report = guard.apply(params, workload, source="button")
+        if report.get("deferred"):
+            st.info("⏳ 上一次参数变更仍在观察期或基线尚未采满，已排队，就绪后自动应用")
+        elif report["success"]:
+            st.success(f"✅ 已根据 {workload} 类型应用参数：{report['applied']}")
+        else:
+            st.error(f"❌ 参数应用失败，已回滚：{report['failed']}")
     else:
         st.warning("⚠️ 没有找到推荐参数组合")
 
@@ -92,7 +130,7 @@ st.download_button("📥 下载完整监控日志", data=df.to_csv(index=False),
 
 # 🧪 模拟负载（侧边栏）
 st.sidebar.title("🧪 模拟工作负载")
-selected = st.sidebar.selectbox("选择负载类型", ["不运行", "CPU 密集型", "IO 密集型", "内存密集型"])
+selected = st.sidebar.selectbox("选择负载类型", ["不运行", "CPU 密集型", "IO 密集型", "内存密集型", "网络密集型"])
 duration = st.sidebar.slider("运行时长（秒）", 5, 60, 10)
 
 # 如果选择了负载并点击运行按钮
@@ -112,6 +150,8 @@ if st.sidebar.button("▶️ 启动负载任务"):
                 io_workload.run(duration)
             elif selected == "内存密集型":
                 mem_workload.run(duration)
+            elif selected == "网络密集型":
+                net_workload.run(duration)
 
             st.session_state.workload_running = False
             st.session_state.workload_finished_message = f"✅ {selected} 任务已完成 🎉"
@@ -128,8 +168,10 @@ with st.expander("🛠 自定义参数调节"):
     custom_param = st.text_input("sysctl 参数名（如 vm.swappiness）")
     custom_value = st.text_input("设置值（如 10）")
     if st.button("应用参数"):
-        try:
-            apply_sysctl_params({custom_param: custom_value})
+        report = guard.apply({custom_param: custom_value}, workload, source="manual")
+        if report.get("deferred"):
+            st.info("⏳ 上一次参数变更仍在观察期或基线尚未采满，已排队，就绪后自动应用")
+        elif report["success"]:
             st.success(f"✅ 已应用 {custom_param}={custom_value}")
-        except:
-            st.error("❌ 应用失败，请检查参数名和值是否正确")
+        else:
+            st.error(f"❌ 应用失败，请检查参数名和值是否正确：{report['failed']}")
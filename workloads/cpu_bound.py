@@ -1,6 +1,31 @@
 import time
-def run(duration=10):
-    start = time.time()
-    while time.time() - start < duration:
-        for _ in range(10**6):
-            _ = sum(i * i for i in range(100))  # 占 CPU
+
+from workloads.pool import DutyCycle, LatencyHistogram, run_pool
+
+
+def _cpu_worker(deadline, worker_index, target_util=1.0):
+    """
+    单个进程：反复执行固定大小的整数运算块，每块计为一次操作
+    """
+    duty = DutyCycle(target_util)
+    histogram = LatencyHistogram()
+    ops = 0
+    while time.time() < deadline:
+        start = time.perf_counter()
+        _ = sum(i * i for i in range(1000))  # 占 CPU
+        histogram.record(time.perf_counter() - start)
+        ops += 1
+        duty.tick()
+    return {"ops": ops, "latency": histogram.counts}
+
+
+def benchmark(duration=10, workers=None, target_util=1.0):
+    """
+    CPU 密集型负载：workers 个进程（默认等于核数）并行计算，target_util 控制每个核的占用比例。
+    返回 ops / bytes / ops_per_sec / bytes_per_sec / p50_ms / p95_ms / p99_ms
+    """
+    return run_pool(_cpu_worker, duration, workers, target_util=target_util)
+
+
+def run(duration=10, **kwargs):
+    return benchmark(duration, **kwargs)
@@ -1,42 +1,92 @@
-'''
-import time
-def run(duration=10):
-    start = time.time()
-    with open("/tmp/io_test_file", "w") as f:
-        while time.time() - start < duration:
-            f.write("x" * 1024 * 1024)  # 写 1MB
-            f.flush()
-'''
-
 import os
+import shutil
 import time
+import threading
+
+from workloads.pool import DutyCycle, LatencyHistogram, available_cores, run_pool
+
+# 默认进程数上限：大核数主机上每核一个写进程没有意义（瓶颈在设备），还会成倍占用临时空间
+MAX_IO_WORKERS = 8
+
+# 全部测试文件的总大小上限（MB），且不超过目标目录可用空间的 FREE_SPACE_SHARE
+# （/tmp 可能是 tmpfs，写入的就是内存）
+MAX_TOTAL_FILE_MB = 2048
+FREE_SPACE_SHARE = 0.2
 
-def run(duration):
+
+def _io_worker(deadline, worker_index, target_util=1.0, io_depth=4, block_size_kb=512,
+               file_size_mb=200, sync_every=0, directory="/tmp"):
     """
-    模拟 IO 密集型任务，持续进行磁盘写入操作，写入一定大小后循环覆盖。
-    duration: 持续运行的秒数
+    单个进程：io_depth 个线程用 pwrite 并发写同一文件的不同区域（系统调用期间释放 GIL），
+    写满 file_size_mb 后回到开头循环覆盖；sync_every > 0 时每写 N 块做一次 fdatasync
     """
-    path = "/tmp/io_test_file"
-    block_size_kb = 512  # 每次写入 512KB
-    max_file_size_mb = 200  # 控制最大写入文件大小
-    max_file_size_bytes = max_file_size_mb * 1024 * 1024
+    path = os.path.join(directory, f"io_test_file.{os.getpid()}")
+    block = b"x" * block_size_kb * 1024
+    blocks_per_file = max(file_size_mb * 1024 // block_size_kb, io_depth)
+    counts = [0] * io_depth
+    histograms = [LatencyHistogram() for _ in range(io_depth)]
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
 
-    start_time = time.time()
-    written_bytes = 0
+    def writer(slot):
+        duty = DutyCycle(target_util)
+        index = slot
+        while time.time() < deadline:
+            start = time.perf_counter()
+            os.pwrite(fd, block, (index % blocks_per_file) * len(block))
+            counts[slot] += 1
+            if sync_every and counts[slot] % sync_every == 0:
+                os.fdatasync(fd)
+            histograms[slot].record(time.perf_counter() - start)
+            index += io_depth
+            duty.tick()
 
     try:
-        with open(path, "wb") as f:
-            while time.time() - start_time < duration:
-                f.write(b"x" * block_size_kb * 1024)
-                f.flush()
-                written_bytes += block_size_kb * 1024
-
-                if written_bytes >= max_file_size_bytes:
-                    f.seek(0)  # 回到文件开头重写（避免文件无限大）
-                    written_bytes = 0
+        threads = [threading.Thread(target=writer, args=(slot,)) for slot in range(io_depth)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
     except Exception as e:
         print(f"❌ IO bound workload error: {e}")
     finally:
+        os.close(fd)
         if os.path.exists(path):
             os.remove(path)
-            print("🧹 IO 测试文件已清理")
+
+    ops = sum(counts)
+    histogram = LatencyHistogram()
+    for h in histograms:
+        histogram.merge(h)
+    return {"ops": ops, "bytes": ops * len(block), "latency": histogram.counts}
+
+
+def file_budget_mb(workers, file_size_mb, directory):
+    """
+    每个进程的测试文件大小：总量不超过 MAX_TOTAL_FILE_MB 与目录可用空间的 FREE_SPACE_SHARE
+    """
+    total = MAX_TOTAL_FILE_MB
+    try:
+        total = min(total, shutil.disk_usage(directory).free * FREE_SPACE_SHARE / 1024 ** 2)
+    except OSError:
+        pass
+    return max(min(file_size_mb, int(total // workers)), 1)
+
+
+def benchmark(duration=10, workers=None, target_util=1.0, io_depth=4, block_size_kb=512,
+        file_size_mb=200, sync_every=0, directory="/tmp"):
+    """
+    模拟 IO 密集型任务：workers 个进程各写一个文件（默认每核一个，最多 MAX_IO_WORKERS 个），
+    每个进程 io_depth 路并发写入；单个文件不超过 file_size_mb，且全部文件合计受 file_budget_mb 限制。
+    duration: 持续运行的秒数；返回 ops（写入块数）/ bytes / ops_per_sec / 每次写入的 p50/p95/p99 延迟
+    """
+    workers = workers or min(available_cores(), MAX_IO_WORKERS)
+    file_size_mb = file_budget_mb(workers, file_size_mb, directory)
+    result = run_pool(_io_worker, duration, workers, target_util=target_util, io_depth=io_depth,
+                      block_size_kb=block_size_kb, file_size_mb=file_size_mb,
+                      sync_every=sync_every, directory=directory)
+    print("🧹 IO 测试文件已清理")
+    return result
+
+
+def run(duration=10, **kwargs):
+    return benchmark(duration, **kwargs)
@@ -1,7 +1,43 @@
 import time
-def run(duration=10):
-    start = time.time()
-    a = []
-    while time.time() - start < duration:
-        a.append("x" * 1024 * 1024)  # 每次加1MB
-        time.sleep(0.1)
+
+import numpy as np
+
+from workloads.pool import DutyCycle, LatencyHistogram, run_pool
+
+
+def _memory_worker(deadline, worker_index, target_util=1.0, working_set_mb=256):
+    """
+    单个进程：分配 working_set_mb 的工作集，交替做顺序遍历（带宽）和随机访问（延迟/TLB），
+    每完成一遍访问计为一次操作
+    """
+    duty = DutyCycle(target_util)
+    data = np.ones(working_set_mb * 1024 * 1024 // 8, dtype=np.float64)
+    rng = np.random.default_rng(worker_index)
+    index = rng.integers(0, len(data), size=min(len(data), 1 << 20))
+    histogram = LatencyHistogram()
+    ops = touched = 0
+    while time.time() < deadline:
+        start = time.perf_counter()
+        if ops % 2 == 0:
+            data += 1.0
+            touched += data.nbytes
+        else:
+            data[index] += 1.0
+            touched += index.size * data.itemsize
+        histogram.record(time.perf_counter() - start)
+        ops += 1
+        duty.tick()
+    return {"ops": ops, "bytes": touched, "latency": histogram.counts}
+
+
+def benchmark(duration=10, workers=None, target_util=1.0, working_set_mb=256):
+    """
+    内存密集型负载：workers 个进程各自持有 working_set_mb 的工作集并持续访问，
+    总占用约为 workers × working_set_mb
+    """
+    return run_pool(_memory_worker, duration, workers, target_util=target_util,
+                    working_set_mb=working_set_mb)
+
+
+def run(duration=10, **kwargs):
+    return benchmark(duration, **kwargs)
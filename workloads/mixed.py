@@ -1,16 +1,51 @@
 import threading
+
 import workloads.cpu_bound as cpu
 import workloads.io_bound as io
 import workloads.memory_bound as mem
+from workloads.pool import LatencyHistogram, available_cores, latency_summary
+
+# 三类负载各至少一个进程
+MIN_WORKERS = 3
+
+
+def benchmark(duration=10, workers=None, target_util=1.0, working_set_mb=128, io_depth=4):
+    """
+    混合负载：CPU / IO / 内存三类负载各自使用独立的进程池同时运行（线程只负责等待），
+    workers 是三部分合计的进程数，按 2:1:1 分给 CPU、IO、内存（合计恰好为 workers）。
+    每类至少一个进程，因此 workers 小于 3 时按 3 运行，实际进程数见返回值中的 workers。
+    返回合计的 ops / bytes / 吞吐，三部分所有操作合并后的 p50/p95/p99 延迟，以及各部分的统计（parts）
+    """
+    workers = workers or available_cores()
+    if workers < MIN_WORKERS:
+        print(f"⚠️ 混合负载至少需要 {MIN_WORKERS} 个进程（CPU / IO / 内存各一个），已按 {MIN_WORKERS} 运行")
+        workers = MIN_WORKERS
+    io_workers = max(workers // 4, 1)
+    mem_workers = max(workers // 4, 1)
+    cpu_workers = workers - io_workers - mem_workers
+
+    results = {}
+    jobs = {
+        "cpu": lambda: cpu.benchmark(duration, cpu_workers, target_util),
+        "io": lambda: io.benchmark(duration, io_workers, target_util, io_depth=io_depth),
+        "memory": lambda: mem.benchmark(duration, mem_workers, target_util, working_set_mb=working_set_mb)
+    }
+    threads = [threading.Thread(target=lambda n=name, f=func: results.__setitem__(n, f()))
+               for name, func in jobs.items()]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    summary = {"workers": cpu_workers + io_workers + mem_workers, "parts": results}
+    for key in ("ops", "bytes", "ops_per_sec", "bytes_per_sec"):
+        summary[key] = round(sum(part.get(key, 0) for part in results.values()), 2)
+    histogram = LatencyHistogram()
+    for part in results.values():
+        histogram.merge(part["latency"])
+    summary.update(latency_summary(histogram))
+    return summary
 
-def run(duration=10):
-    t1 = threading.Thread(target=cpu.run, args=(duration,))
-    t2 = threading.Thread(target=io.run, args=(duration,))
-    t3 = threading.Thread(target=mem.run, args=(duration,))
-    t1.start()
-    t2.start()
-    t3.start()
-    t1.join()
-    t2.join()
-    t3.join()
 
+def run(duration=10, **kwargs):
+    return benchmark(duration, **kwargs)
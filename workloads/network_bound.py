@@ -0,0 +1,222 @@
+import asyncio
+import multiprocessing
+import socket
+import struct
+import threading
+import time
+
+from workloads.pool import LatencyHistogram, available_cores, latency_summary, run_pool
+
+# 请求帧头：请求体长度 + 期望的响应长度
+HEADER = struct.Struct("!II")
+
+MODES = ["bulk", "churn", "rpc"]
+
+
+# -------- 服务端 --------
+async def _handle(reader, writer):
+    """
+    每个连接循环处理帧：读取请求体，按请求回写 response_len 字节（为 0 时不回写）
+    """
+    try:
+        while True:
+            header = await reader.readexactly(HEADER.size)
+            request_len, response_len = HEADER.unpack(header)
+            remaining = request_len
+            while remaining:
+                chunk = await reader.read(min(remaining, 1 << 20))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+            if response_len:
+                writer.write(b"r" * response_len)
+                await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def _serve(host, port, backlog, ready):
+    async def main():
+        server = await asyncio.start_server(_handle, host, port, backlog=backlog, reuse_port=True)
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+def _free_port(host):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+class LoopbackServer:
+    """
+    在独立进程中运行的 asyncio 服务端（SO_REUSEPORT 多进程共享端口），用作 with 上下文
+    """
+
+    def __init__(self, host="127.0.0.1", workers=1, backlog=4096):
+        self.host = host
+        self.port = _free_port(host)
+        self.workers = workers
+        self.backlog = backlog
+        self.processes = []
+
+    def __enter__(self):
+        for _ in range(self.workers):
+            ready = multiprocessing.Event()
+            p = multiprocessing.Process(target=_serve, args=(self.host, self.port, self.backlog, ready), daemon=True)
+            p.start()
+            if not ready.wait(10):
+                raise RuntimeError("网络负载服务端启动超时")
+            self.processes.append(p)
+        return self
+
+    def __exit__(self, *exc):
+        for p in self.processes:
+            p.terminate()
+        for p in self.processes:
+            p.join(5)
+
+
+# -------- 客户端 --------
+def _bulk_client(deadline, worker_index, host, port, chunk_kb=1024):
+    """
+    大块传输：一条长连接持续发送 chunk_kb 大小的帧（吞吐主要受 tcp_wmem/tcp_rmem 影响）
+    """
+    payload = HEADER.pack(chunk_kb * 1024, 0) + b"x" * chunk_kb * 1024
+    histogram = LatencyHistogram()
+    ops = 0
+    with socket.create_connection((host, port)) as sock:
+        while time.time() < deadline:
+            start = time.perf_counter()
+            sock.sendall(payload)
+            histogram.record(time.perf_counter() - start)
+            ops += 1
+    return {"ops": ops, "bytes": ops * chunk_kb * 1024, "latency": histogram.counts}
+
+
+def _churn_client(deadline, worker_index, host, port, response_bytes=64):
+    """
+    连接抖动：每次操作新建连接、一问一答后由客户端关闭（受 somaxconn / tcp_max_syn_backlog /
+    tcp_tw_reuse / tcp_fin_timeout 影响），本地端口耗尽等错误计入 errors
+    """
+    request = HEADER.pack(0, response_bytes)
+    histogram = LatencyHistogram()
+    ops = errors = 0
+    while time.time() < deadline:
+        start = time.perf_counter()
+        try:
+            with socket.create_connection((host, port), timeout=5) as sock:
+                sock.sendall(request)
+                received = 0
+                while received < response_bytes:
+                    chunk = sock.recv(response_bytes - received)
+                    if not chunk:
+                        raise ConnectionError("服务端提前关闭连接")
+                    received += len(chunk)
+        except OSError:
+            errors += 1
+            time.sleep(0.01)
+            continue
+        histogram.record(time.perf_counter() - start)
+        ops += 1
+    return {"ops": ops, "bytes": ops * (HEADER.size + response_bytes), "errors": errors,
+            "latency": histogram.counts}
+
+
+def _rpc_client(deadline, worker_index, host, port, concurrency=16, request_bytes=256, response_bytes=1024):
+    """
+    asyncio 请求/响应：concurrency 条长连接各自循环发送请求并等待完整响应，记录每次往返延迟
+    """
+    histogram = LatencyHistogram()
+    counts = {"ops": 0, "errors": 0}
+    request = HEADER.pack(request_bytes, response_bytes) + b"q" * request_bytes
+
+    async def connection():
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            counts["errors"] += 1
+            return
+        try:
+            while time.time() < deadline:
+                start = time.perf_counter()
+                writer.write(request)
+                await writer.drain()
+                await reader.readexactly(response_bytes)
+                histogram.record(time.perf_counter() - start)
+                counts["ops"] += 1
+        except (asyncio.IncompleteReadError, ConnectionError):
+            counts["errors"] += 1
+        finally:
+            writer.close()
+
+    async def main():
+        await asyncio.gather(*(connection() for _ in range(concurrency)))
+
+    asyncio.run(main())
+    ops = counts["ops"]
+    return {"ops": ops, "bytes": ops * (HEADER.size + request_bytes + response_bytes),
+            "errors": counts["errors"], "latency": histogram.counts}
+
+
+_CLIENTS = {
+    "bulk": _bulk_client,
+    "churn": _churn_client,
+    "rpc": _rpc_client
+}
+
+
+def _run_mode(mode, duration, workers, server_workers, host, **kwargs):
+    with LoopbackServer(host, server_workers) as server:
+        result = run_pool(_CLIENTS[mode], duration, workers, host=server.host, port=server.port, **kwargs)
+    result["mode"] = mode
+    return result
+
+
+def benchmark(duration=10, mode="all", workers=None, server_workers=None, host="127.0.0.1", **kwargs):
+    """
+    网络密集型负载（回环地址；host 也可以是 veth 对端地址）：
+    - bulk：长连接大块传输
+    - churn：大量短连接
+    - rpc：asyncio 请求/响应，统计往返延迟
+    - all（默认）：三种模式同时运行，客户端与服务端进程数按核数分配
+    返回 ops / bytes / 吞吐 / p50/p95/p99 延迟 / errors（all 模式下另含各模式的 parts）
+    """
+    cores = available_cores()
+    if mode != "all":
+        if mode not in _CLIENTS:
+            raise ValueError(f"不支持的网络负载模式：{mode}（可选 {MODES + ['all']}）")
+        workers = workers or max(cores // 2, 1)
+        server_workers = server_workers or max(cores // 2, 1)
+        return _run_mode(mode, duration, workers, server_workers, host, **kwargs)
+
+    per_mode = max((workers or max(cores // 2, 1)) // len(MODES), 1)
+    per_server = max((server_workers or max(cores // 2, 1)) // len(MODES), 1)
+    results = {}
+    threads = [threading.Thread(target=lambda m=m: results.__setitem__(
+        m, _run_mode(m, duration, per_mode, per_server, host))) for m in MODES]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    summary = {"workers": per_mode * len(MODES), "mode": "all", "parts": results}
+    for key in ("ops", "bytes", "ops_per_sec", "bytes_per_sec", "errors"):
+        summary[key] = round(sum(part.get(key, 0) for part in results.values()), 2)
+    histogram = LatencyHistogram()
+    for part in results.values():
+        histogram.merge(part["latency"])
+    summary.update(latency_summary(histogram))
+    return summary
+
+
+def run(duration=10, **kwargs):
+    return benchmark(duration, **kwargs)
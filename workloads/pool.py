@@ -0,0 +1,125 @@
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# 占空比控制的周期（秒）：每个周期内工作 target_util 比例的时间，其余时间休眠
+DUTY_PERIOD = 0.1
+
+# 延迟直方图：1µs ~ 100s 对数分桶，每个数量级 20 个桶（相对误差约 12%）
+HIST_MIN_EXP = -6
+HIST_BUCKETS_PER_DECADE = 20
+HIST_BUCKETS = 8 * HIST_BUCKETS_PER_DECADE
+
+# 各负载 benchmark() 返回的性能字段（写入训练数据 / 评估报告）
+BENCHMARK_KEYS = ["ops", "bytes", "ops_per_sec", "bytes_per_sec", "p50_ms", "p95_ms", "p99_ms"]
+
+
+class LatencyHistogram:
+    """
+    定长对数直方图：记录是 O(1) 的计数累加，可跨进程合并（只传计数列表），
+    用桶的几何中点估算 p50 / p95 / p99
+    """
+
+    def __init__(self, counts=None):
+        self.counts = list(counts) if counts is not None else [0] * HIST_BUCKETS
+
+    def record(self, seconds):
+        if seconds <= 0:
+            index = 0
+        else:
+            index = int((math.log10(seconds) - HIST_MIN_EXP) * HIST_BUCKETS_PER_DECADE)
+            index = min(max(index, 0), HIST_BUCKETS - 1)
+        self.counts[index] += 1
+
+    def merge(self, other):
+        counts = other.counts if isinstance(other, LatencyHistogram) else other
+        for i, count in enumerate(counts):
+            self.counts[i] += count
+        return self
+
+    @property
+    def total(self):
+        return sum(self.counts)
+
+    def percentile(self, q):
+        """
+        第 q 百分位延迟（秒），没有记录时返回 0
+        """
+        total = self.total
+        if total == 0:
+            return 0.0
+        threshold = q / 100.0 * total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= threshold and count:
+                return 10 ** (HIST_MIN_EXP + (i + 0.5) / HIST_BUCKETS_PER_DECADE)
+        return 10 ** (HIST_MIN_EXP + HIST_BUCKETS / HIST_BUCKETS_PER_DECADE)
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class DutyCycle:
+    """
+    把单个进程的 CPU 占用限制在 target_util（0~1]：worker 在循环中调用 tick()，
+    超出本周期的工作配额后休眠到周期结束
+    """
+
+    def __init__(self, target_util=1.0, period=DUTY_PERIOD):
+        self.target_util = min(max(target_util, 0.01), 1.0)
+        self.period = period
+        self.period_start = time.monotonic()
+
+    def tick(self):
+        if self.target_util >= 1.0:
+            return
+        elapsed = time.monotonic() - self.period_start
+        if elapsed >= self.period * self.target_util:
+            time.sleep(max(self.period - elapsed, 0.0))
+            self.period_start = time.monotonic()
+
+
+def run_pool(task, duration, workers=None, **kwargs):
+    """
+    在 workers 个进程中并行执行 task(deadline, worker_index, **kwargs)，
+    task 返回 {"ops", "bytes", "latency": 直方图计数列表}（可选 "errors"）。
+    汇总为基准结果：workers / duration / ops / bytes / ops_per_sec / bytes_per_sec / errors / p50_ms / p95_ms / p99_ms，
+    以及合并后的直方图计数 latency（供组合负载再次合并）。
+    进程池绕开 GIL，workers 默认等于可用核数
+    """
+    workers = workers or available_cores()
+    start = time.monotonic()
+    deadline = time.time() + duration
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(task, deadline, i, **kwargs) for i in range(workers)]
+        results = [f.result() for f in futures]
+    elapsed = max(time.monotonic() - start, 1e-9)
+
+    ops = sum(r.get("ops", 0) for r in results)
+    total_bytes = sum(r.get("bytes", 0) for r in results)
+    histogram = LatencyHistogram()
+    for r in results:
+        if "latency" in r:
+            histogram.merge(r["latency"])
+    return {
+        "workers": workers,
+        "duration": round(elapsed, 3),
+        "ops": ops,
+        "bytes": total_bytes,
+        "ops_per_sec": round(ops / elapsed, 2),
+        "bytes_per_sec": round(total_bytes / elapsed, 2),
+        "errors": sum(r.get("errors", 0) for r in results),
+        **latency_summary(histogram),
+        "latency": histogram.counts
+    }
+
+
+def latency_summary(histogram):
+    return {f"p{q}_ms": round(histogram.percentile(q) * 1000, 4) for q in (50, 95, 99)}
+